@@ -15,9 +15,11 @@
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
 import logging
+import os
 
 SHUTDOWN_ADDR = "shutdown.addr"
 SHUTDOWN_PORT = "shutdown.port"
+SHUTDOWN_DRAIN_TIMEOUT = "shutdown.drain.timeout"
 
 KRAKEN_REST_BASE_URL = "kraken.rest.base.url"
 KRAKEN_REST_USERNAME = "kraken.rest.username"
@@ -37,6 +39,7 @@ LOG_LEVEL = "log.level"
 LOG_FORMAT = "log.format"
 LOG_FILE = "log.file"
 RESTAPI_LOG_FILE = "restapi.log.file"
+RESTAPI_WORKERS = "restapi.workers"
 
 MQ_TRANSPORT_COUNT = "mq.transport.count"
 MQ_TRANSPORT_TYPE = "mq.transport.{0}.type"
@@ -48,9 +51,62 @@ MQ_TRANSPORT_CHANNEL = "mq.transport.{0}.channel"
 MQ_TRANSPORT_CLIENTID = "mq.transport.{0}.clientid"
 MQ_CLIENT_HEARTBEAT = "mq.transport.{0}.heartbeat"
 MQ_MY_EXCHANGE = "mq.transport.{0}.myexchange"
+MQ_TRANSPORT_PREFETCH = "mq.transport.{0}.prefetch"
+MQ_TRANSPORT_ACK_MODE = "mq.transport.{0}.ack.mode"
+MQ_TRANSPORT_QOS = "mq.transport.{0}.qos"
+MQ_TRANSPORT_MAX_INFLIGHT = "mq.transport.{0}.max.inflight"
+MQ_TRANSPORT_GROUP = "mq.transport.{0}.group"
 
 PRODUCTION_MODE = "production.mode"
 
+QUEUE_CONSUMER_COUNT = "queue.consumer.count"
+QUEUE_STATS_INTERVAL = "queue.stats.interval"
+QUEUE_PRIORITY_AGING = "queue.priority.aging"
+QUEUE_HIGH_WATERMARK = "queue.high.watermark"
+QUEUE_LOW_WATERMARK = "queue.low.watermark"
+QUEUE_SPOOL_ENABLED = "queue.spool.enabled"
+QUEUE_SPOOL_PATH = "queue.spool.path"
+QUEUE_SPOOL_SEGMENT_SIZE = "queue.spool.segment.size"
+QUEUE_SPOOL_FSYNC = "queue.spool.fsync"
+QUEUE_SPOOL_FSYNC_INTERVAL = "queue.spool.fsync.interval"
+
+EXECUTOR_WORKERS = "executor.workers"
+EXECUTOR_WORKERS_MIN = "executor.workers.min"
+EXECUTOR_WORKERS_MAX = "executor.workers.max"
+EXECUTOR_SCALE_WAIT = "executor.scale.wait"
+EXECUTOR_SCALE_IDLE = "executor.scale.idle"
+PROCESSOR_POOL_SIZE = "executor.processor.pool.size"
+PROCESSOR_POOL_IDLE = "executor.processor.pool.idle"
+EXECUTOR_STATS_INTERVAL = "executor.stats.interval"
+EXECUTOR_ASYNC_LIMIT = "executor.async.limit"
+EXECUTOR_TIMEOUT = "executor.timeout"
+EXECUTOR_WATCHDOG_INTERVAL = "executor.watchdog.interval"
+DEADLETTER_FILE = "deadletter.file"
+CONFIG_RELOAD_INTERVAL = "config.reload.interval"
+
+# ---- options read from MODULE section of modules.properties
+MODULE_MIN_WORKERS = "MIN_WORKERS"
+MODULE_MAX_WORKERS = "MAX_WORKERS"
+MODULE_EXECUTOR = "EXECUTOR"
+MODULE_PROCESS_WORKERS = "PROCESS_WORKERS"
+
+# ---- options read from MODULE@SUBMODULE section of modules.properties
+MODULE_PARTITION_KEY = "PARTITION_KEY"
+MODULE_PARTITION_LANES = "PARTITION_LANES"
+
+# ---- options read from MODULE@SUBMODULE section of modules.properties, could be prefixed with
+# ---- event or command name (e.g. HREMAS_UPDATE.JOIN) to apply on a single event or command
+MODULE_EVENT_JOIN = "JOIN"
+MODULE_EVENT_JOIN_TIMEOUT = "JOIN_TIMEOUT"
+MODULE_COALESCE_WINDOW = "COALESCE_WINDOW"
+MODULE_COALESCE_KEY = "COALESCE_KEY"
+MODULE_BATCH_SIZE = "BATCH_SIZE"
+MODULE_BATCH_WAIT = "BATCH_WAIT"
+MODULE_TIMEOUT = "TIMEOUT"
+MODULE_RETRY_COUNT = "RETRY_COUNT"
+MODULE_RETRY_DELAY = "RETRY_DELAY"
+MODULE_RETRY_MAX_DELAY = "RETRY_MAX_DELAY"
+
 LOG_LEVEL_INFO = "INFO"
 LOG_LEVEL_WARNING = "WARNING"
 LOG_LEVEL_ERROR = "WARNING"
@@ -71,20 +127,68 @@ DEFAULT_LOG_FORMAT = "%(asctime)s - %(message)s"
 DEFAULT_LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 DEFAULT_LOG_FILE = "{0}/log/ibridge.log".format(DEFAULT_SCRIPT_PATH)
 DEFAULT_RESTAPI_LOG_FILE = "{0}/log/irest.log".format(DEFAULT_SCRIPT_PATH)
+DEFAULT_RESTAPI_WORKERS = 4
 DEFAULT_LOG_LEVEL = log_level[LOG_LEVEL_INFO]
 
+DEFAULT_QUEUE_CONSUMER_COUNT = 1
+DEFAULT_QUEUE_STATS_INTERVAL = 60
+DEFAULT_QUEUE_PRIORITY_AGING = 5
+DEFAULT_QUEUE_HIGH_WATERMARK = 10000
+DEFAULT_QUEUE_SPOOL_PATH = "{0}/data/spool".format(DEFAULT_SCRIPT_PATH)
+DEFAULT_QUEUE_SPOOL_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_QUEUE_SPOOL_FSYNC = "sync"
+DEFAULT_QUEUE_SPOOL_FSYNC_INTERVAL = 1
+
+DEFAULT_EXECUTOR_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DEFAULT_EXECUTOR_WORKERS_MIN = min(4, DEFAULT_EXECUTOR_WORKERS)
+DEFAULT_EXECUTOR_SCALE_WAIT = 0.1
+DEFAULT_EXECUTOR_SCALE_IDLE = 60
+DEFAULT_PROCESSOR_POOL_SIZE = 4
+DEFAULT_PROCESSOR_POOL_IDLE = 300
+DEFAULT_EXECUTOR_STATS_INTERVAL = 60
+DEFAULT_EXECUTOR_ASYNC_LIMIT = 1000
+DEFAULT_EXECUTOR_TIMEOUT = 0
+DEFAULT_WATCHDOG_INTERVAL = 5
+DEFAULT_RETRY_COUNT = 0
+DEFAULT_RETRY_DELAY = 1
+DEFAULT_RETRY_MAX_DELAY = 60
+DEFAULT_DEADLETTER_FILE = "{0}/data/deadletter.jsonl".format(DEFAULT_SCRIPT_PATH)
+DEFAULT_DEADLETTER_RATE = 10
+DEFAULT_CONFIG_RELOAD_INTERVAL = 5
+DEFAULT_PARTITION_LANES = 8
+DEFAULT_PROCESS_WORKERS = os.cpu_count() or 1
+
+EXECUTOR_MODE_THREAD = "thread"
+EXECUTOR_MODE_PROCESS = "process"
+
 DEFAULT_SHUTDOWN_ADDR = "127.0.0.1"
 DEFAULT_SHUTDOWN_PORT = 9999
+DEFAULT_SHUTDOWN_DRAIN_TIMEOUT = 30
 
 MQ_TRANSPORT_STOMP = "stomp"
 MQ_TRANSPORT_MQTT = "mqtt"
 MQ_TRANSPORT_AMQP = "amqp"
 MQ_TRANSPORT_UNIX = "unix"
 MQ_TRANSPORT_LOCAL = "local"
+MQ_ACK_CUMULATIVE = "cumulative"
+MQ_ACK_INDIVIDUAL = "individual"
+DEFAULT_MQ_PREFETCH = 100
+DEFAULT_MQTT_QOS = 0
+DEFAULT_MQTT_MAX_INFLIGHT = 20
 
 UNIX_SOCKET_FILE = "/tmp/ibridge.sock"
 LOCAL_TRANSPORT_ADDR = "127.0.0.1"
 LOCAL_TRANSPORT_PORT = 8888
+LOCAL_TRANSPORT_WORKERS = "local.transport.workers"
+LOCAL_TRANSPORT_MAX_CONNECTIONS = "local.transport.max.connections"
+LOCAL_TRANSPORT_IDLE_TIMEOUT = "local.transport.idle.timeout"
+LOCAL_TRANSPORT_BUFFER_SIZE = "local.transport.buffer.size"
+DEFAULT_LOCAL_TRANSPORT_WORKERS = 4
+DEFAULT_LOCAL_TRANSPORT_MAX_CONNECTIONS = 4096
+DEFAULT_LOCAL_TRANSPORT_IDLE_TIMEOUT = 300
+DEFAULT_LOCAL_TRANSPORT_BUFFER_SIZE = 256 * 1024
+DEFAULT_BULK_WINDOW = 256
+DEFAULT_BULK_TIMEOUT = 60
 
 MODULE_CONFIG_FILE = "modules.properties"
 
@@ -31,3 +31,21 @@ def get_configuration():
 
     return module_config
 
+
+def reload_configuration():
+    """
+    Read configuration properties again, the cached configuration is kept when the file could not be parsed,
+    or could not be found while the cached configuration has sections
+    :return: newly read configuration
+    :raise configparser.Error: when the file could not be parsed
+    :raise FileNotFoundError: when the file could not be found
+    """
+    global module_config
+    config_file = "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.MODULE_CONFIG_FILE)
+    new_config = configparser.ConfigParser()
+    if (not new_config.read(config_file)) and module_config and module_config.sections():
+        raise FileNotFoundError("{0} could not be found".format(config_file))
+    module_config = new_config
+
+    return module_config
+
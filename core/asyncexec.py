@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import logging
+from concurrent.futures import Future
+from threading import Thread, Event
+from common import consts
+from core.msgstats import MessageStatistics
+from core.startable import Startable
+
+
+class AsyncLoopRunner(Startable):
+    """Run coroutine handlers on a dedicated event loop thread with a limit of concurrently running coroutines"""
+
+    def __init__(self, config=None):
+        super(AsyncLoopRunner, self).__init__(config=config)
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._limit = consts.DEFAULT_EXECUTOR_ASYNC_LIMIT
+        self._statistics = MessageStatistics(self.__class__.__name__)
+
+    def do_configure(self):
+        config = self.get_configuration()
+        limit = config[consts.EXECUTOR_ASYNC_LIMIT] if config and consts.EXECUTOR_ASYNC_LIMIT in config else None
+        self._limit = int(limit) if limit else consts.DEFAULT_EXECUTOR_ASYNC_LIMIT
+        self._limit = self._limit if self._limit > 0 else consts.DEFAULT_EXECUTOR_ASYNC_LIMIT
+
+    def do_start(self):
+        started = Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run_loop, args=(started,), daemon=True, name=self.__class__.__name__)
+        self._thread.start()
+        started.wait()
+
+    def do_stop(self):
+        loop = self._loop
+        if (not loop) or loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        self._thread.join(5)
+        self._statistics.log_statistics()
+
+    def get_loop(self):
+        return self._loop
+
+    def get_limit(self):
+        return self._limit
+
+    def get_statistics(self):
+        return self._statistics
+
+    def submit(self, coro_func, *args) -> Future:
+        """
+        Run coro_func(*args) on the event loop
+        @return: concurrent.futures.Future of the coroutine result
+        """
+        if (not self._loop) or (not self.is_running()):
+            raise RuntimeError("{0} is not running".format(self.__class__.__name__))
+        self._statistics.increment("submitted")
+        self._statistics.increment("pending")
+        return asyncio.run_coroutine_threadsafe(self._execute(coro_func, args), self._loop)
+
+    def get_pending_count(self):
+        """
+        @return: coroutines submitted and not done yet, including those waiting for the concurrency limit
+        """
+        return self._statistics.get_counter("pending")
+
+    def _run_loop(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self._limit)
+        self._loop.call_soon(started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _execute(self, coro_func, args):
+        try:
+            async with self._semaphore:
+                active = self._statistics.increment("active")
+                self._statistics.track_max("peak_active", active)
+                try:
+                    return await coro_func(*args)
+                finally:
+                    self._statistics.decrement("active")
+                    self._statistics.increment("completed")
+        finally:
+            self._statistics.decrement("pending")
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logging.debug("{0}: {1} running coroutines cancelled".format(self.__class__.__name__, len(tasks)))
+        self._loop.stop()
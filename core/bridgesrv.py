@@ -15,9 +15,13 @@
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
 import logging
+import time
+from common import consts
 from core.baseappsrv import BaseAppServer
 from core.shutdn import ShutdownHookMonitor
 from core.transfactory import TransportPreparer
+from core.transhandler import TransportHandler
+from core.translocal import ControlFailedError
 from core.msghandler import QueuePoolHandler, MessageNotifier
 from core. msgexec import MessageExecutionManager
 from utils import transhelper
@@ -41,12 +45,15 @@ class BridgeServer(BaseAppServer):
         message_listener = MessageNotifier()
         execution_manager = MessageExecutionManager(cfg)
         execution_manager.register_listener(message_listener)
+        local_transport.register_control("reload", execution_manager.reload_configuration)
         self.add_object(execution_manager)
 
         message_pool = QueuePoolHandler()
         message_pool.register_listener(transport_listener)
         message_pool.add_listener(message_listener)
         self.add_object(message_pool)
+        for transport in [obj for obj in self.get_objects() if isinstance(obj, TransportHandler)]:
+            transport.set_flow_controller(message_pool.get_flow_controller())
 
         if self.is_standalone():
             shutdown_hook = ShutdownHookMonitor.get_default_instance()
@@ -56,6 +63,52 @@ class BridgeServer(BaseAppServer):
 
         super(BridgeServer, self).do_configure()
 
+    def do_stop(self):
+        self.drain()
+        self._stop_transports()
+        # queue consumers stop ahead of the execution manager, which would leave the messages they still
+        # hand over unacknowledged
+        message_pool = self.get_object(QueuePoolHandler)
+        try:
+            message_pool.stop() if message_pool else None
+        except Exception as ex:
+            logging.error(ex)
+        super(BridgeServer, self).do_stop()
+
+    def _stop_transports(self):
+        for transport in [obj for obj in self.get_objects() if isinstance(obj, TransportHandler)]:
+            try:
+                transport.stop()
+            except Exception as ex:
+                logging.error(ex)
+
+    def drain(self):
+        """
+        Pause intake from every transport, let queued and running messages finish within the drain timeout,
+        then stop the transports. Transports stay connected meanwhile so messages completed during the drain
+        are still acknowledged to their broker.
+        """
+        config = self.get_configuration()
+        timeout = float(config[consts.SHUTDOWN_DRAIN_TIMEOUT]) if config and consts.SHUTDOWN_DRAIN_TIMEOUT in config \
+            else consts.DEFAULT_SHUTDOWN_DRAIN_TIMEOUT
+        message_pool = self.get_object(QueuePoolHandler)
+        execution_manager = self.get_object(MessageExecutionManager)
+        if (timeout <= 0) or (not message_pool) or (not execution_manager):
+            return
+        start_time = time.monotonic()
+        # released by the message pool once it is stopped
+        message_pool.get_flow_controller().hold()
+        dispatched, queued = message_pool.drain(timeout)
+        completed, running = execution_manager.drain(timeout - (time.monotonic() - start_time))
+        self._stop_transports()
+        report = "Bridge drained {0} queued messages and {1} handlers in {2:.1f}s, " \
+                 "{3} queued messages and {4} handlers left".format(dispatched, completed,
+                                                                   time.monotonic() - start_time, queued, running)
+        logging.info(report) if not (queued or running) else logging.warning(report)
+        shutdown_monitor = self.get_object(ShutdownHookMonitor)
+        shutdown_monitor = ShutdownHookMonitor.get_default_instance() if not shutdown_monitor else shutdown_monitor
+        shutdown_monitor.add_report(report)
+
     def handle_stop_event(self, obj):
         self.stop()
         logging.info("Shutting down bridge")
@@ -71,13 +124,38 @@ class BridgeServer(BaseAppServer):
             print("Unable to connect to server")
 
     def notify_server(self, message_obj):
+        """Send a message to the running bridge, raise when it could not be queued"""
+        config = self.get_configuration()
+        local_transport = transhelper.get_local_transport()
+        local_transport.set_configuration(config)
+        local_transport.notify_server(message_obj)
+
+    def connect_server(self, window):
+        """
+        Open a framed session to the local transport for bulk submission
+        @param window: messages sent but not yet acknowledged by the server at most
+        """
+        config = self.get_configuration()
+        local_transport = transhelper.get_local_transport()
+        local_transport.set_configuration(config)
+        return local_transport.connect(consts.DEFAULT_BULK_TIMEOUT, window)
+
+    def reload_signal(self):
+        """
+        Ask the running bridge to reload its configuration and wait for the outcome
+        @return: True when the bridge serves the reloaded configuration
+        """
         try:
             config = self.get_configuration()
             local_transport = transhelper.get_local_transport()
             local_transport.set_configuration(config)
-            local_transport.notify_server(message_obj)
+            local_transport.send_control("reload", wait=True)
+            return True
+        except ControlFailedError as ex:
+            print("Unable to reload configuration \n\nReason: {0}".format(ex))
         except Exception as ex:
             print("Unable to connect to server")
+        return False
 
     def alt_shutdown_signal(self):
         try:
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import os
+import traceback
+from threading import Event, Thread
+from common import consts
+from core.startable import Startable
+
+
+class ConfigurationWatcher(Startable):
+    """Poll modification time of configuration files and call back once any of them changed"""
+
+    def __init__(self, config=None, file_names=None, changed_func=None):
+        super(ConfigurationWatcher, self).__init__(config=config)
+        self._file_names = file_names if file_names else list()
+        self._changed = changed_func
+        self._interval = consts.DEFAULT_CONFIG_RELOAD_INTERVAL
+        self._snapshot = dict()
+        self._stop_event = Event()
+
+    def do_configure(self):
+        config = self.get_configuration()
+        self._interval = float(config[consts.CONFIG_RELOAD_INTERVAL]) \
+            if config and consts.CONFIG_RELOAD_INTERVAL in config else consts.DEFAULT_CONFIG_RELOAD_INTERVAL
+
+    def do_start(self):
+        if self._interval <= 0:
+            logging.info("{0} disabled, configuration is reloaded on request only".format(self.__class__.__name__))
+            return
+        self._snapshot = self._take_snapshot()
+        self._stop_event.clear()
+        Thread(target=self._watch, daemon=True, name=self.__class__.__name__).start()
+
+    def do_stop(self):
+        self._stop_event.set()
+
+    def _take_snapshot(self):
+        snapshot = dict()
+        for file_name in self._file_names:
+            try:
+                stat = os.stat(file_name)
+                snapshot[file_name] = (stat.st_mtime, stat.st_size)
+            except OSError:
+                snapshot[file_name] = None
+        return snapshot
+
+    def _watch(self):
+        while not self._stop_event.wait(self._interval):
+            snapshot = self._take_snapshot()
+            if snapshot == self._snapshot:
+                continue
+            changed = [file_name for file_name in self._file_names
+                       if snapshot.get(file_name, None) != self._snapshot.get(file_name, None)]
+            self._snapshot = snapshot
+            logging.info("{0} changed, reloading configuration".format(", ".join(changed)))
+            try:
+                self._changed() if self._changed else None
+            except Exception:
+                logging.error(traceback.format_exc())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import json
+import logging
+import os
+import os.path
+import time
+from datetime import datetime
+from threading import Lock
+from uuid import uuid4
+from common import consts
+
+
+class DeadLetterStore(object):
+    """Append only JSON lines file keeping messages whose handler failed every attempt"""
+
+    def __init__(self, file_name=None):
+        self._file_name = file_name if file_name else consts.DEFAULT_DEADLETTER_FILE
+        self._lock = Lock()
+
+    @classmethod
+    def from_configuration(cls, config):
+        return cls(config[consts.DEADLETTER_FILE] if config and consts.DEADLETTER_FILE in config else None)
+
+    def get_file_name(self):
+        return self._file_name
+
+    def append(self, message_obj, handler, exc, attempts):
+        """
+        Store a failed message
+        @param message_obj: AbstractMessage whose handler failed
+        @param handler: name of the failing handler
+        @param exc: exception raised by the last attempt
+        @param attempts: number of attempts made
+        """
+        record = {'id': str(uuid4()),
+                  'time': datetime.now().isoformat(),
+                  'module_id': message_obj.get_module_id(),
+                  'handler': handler,
+                  'attempts': attempts,
+                  'error': "{0}: {1}".format(exc.__class__.__name__, exc),
+                  'message': message_obj.to_dict()}
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self._file_name)), exist_ok=True)
+            with open(self._file_name, "a", encoding="utf-8") as file:
+                file.write(line)
+                file.flush()
+        logging.error("{0} dead lettered after {1} attempts: {2}".format(message_obj.get_module_id(), attempts,
+                                                                         record['error']))
+
+    def read(self, module_id=None):
+        """
+        Iterate stored records, oldest first
+        @param module_id: only records of this MODULE@SUBMODULE when given
+        """
+        if not os.path.exists(self._file_name):
+            return
+        with open(self._file_name, "r", encoding="utf-8") as file:
+            for line_no, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning("{0}:{1} is not a valid record".format(self._file_name, line_no))
+                    continue
+                if (module_id is None) or (record.get('module_id', None) == module_id):
+                    yield record
+
+    def archive(self):
+        """Move the stored records aside, the archived file name is returned"""
+        with self._lock:
+            if not os.path.exists(self._file_name):
+                return None
+            archive_name = "{0}.{1}".format(self._file_name, time.strftime("%Y%m%d%H%M%S"))
+            os.replace(self._file_name, archive_name)
+            return archive_name
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+from threading import Lock
+
+
+class MessageBatch(object):
+
+    __slots__ = ("messages", "task")
+
+    def __init__(self):
+        self.messages = list()
+        self.task = None
+
+
+class MessageBatcher(object):
+    """Collect messages of the same handler until the batch is full or its oldest message waited long enough"""
+
+    def __init__(self, scheduler, flush_func, statistics=None):
+        """
+        Initialize the batcher
+        @param scheduler: DelayScheduler flushing batches which waited long enough
+        @param flush_func: callback receiving the batch key and the list of collected messages
+        @param statistics: MessageStatistics receiving batch counters
+        """
+        self._scheduler = scheduler
+        self._flush_func = flush_func
+        self._statistics = statistics
+        self._batches = dict()
+        self._lock = Lock()
+
+    def add(self, key, message, max_size, max_wait):
+        """
+        Add a message to the batch of a handler
+        @param key: handler identity, messages sharing a key are delivered together
+        @param message: message to be collected
+        @param max_size: flush as soon as the batch holds this many messages
+        @param max_wait: flush after the first message of the batch waited this many seconds
+        """
+        full_batch = None
+        with self._lock:
+            batch = self._batches.get(key, None)
+            created = batch is None
+            if created:
+                batch = MessageBatch()
+                self._batches[key] = batch
+            batch.messages.append(message)
+            if len(batch.messages) >= max_size:
+                full_batch = self._batches.pop(key)
+            elif created:
+                batch.task = self._scheduler.schedule(max_wait, self._flush_batch, key, batch)
+        if full_batch:
+            full_batch.task.cancel() if full_batch.task else None
+            self._deliver(key, full_batch)
+
+    def flush(self):
+        """Deliver every collected batch right away"""
+        with self._lock:
+            batches = list(self._batches.items())
+            self._batches.clear()
+        for key, batch in batches:
+            batch.task.cancel() if batch.task else None
+            self._deliver(key, batch)
+
+    def get_pending_count(self):
+        with self._lock:
+            return sum([len(batch.messages) for batch in self._batches.values()])
+
+    def _flush_batch(self, key, batch):
+        with self._lock:
+            if self._batches.get(key, None) is not batch:
+                return
+            self._batches.pop(key)
+        self._deliver(key, batch)
+
+    def _deliver(self, key, batch):
+        if self._statistics:
+            self._statistics.increment("batches")
+            self._statistics.increment("batched_messages", len(batch.messages))
+            self._statistics.track_max("peak_batch_size", len(batch.messages))
+        self._flush_func(key, batch.messages)
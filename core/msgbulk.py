@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import csv
+import json
+import time
+from core.msgobject import MessageEvent
+
+BULK_FORMAT_NDJSON = "ndjson"
+BULK_FORMAT_CSV = "csv"
+BULK_FORMATS = [BULK_FORMAT_NDJSON, BULK_FORMAT_CSV]
+# keys of a record which are not passed to the handler as keyword parameters
+BULK_RESERVED_KEYS = ["command", "event", "args", "kwargs", "priority"]
+
+
+def guess_format(file_name):
+    return BULK_FORMAT_CSV if file_name and file_name.lower().endswith(".csv") else BULK_FORMAT_NDJSON
+
+
+def read_records(stream, fmt=BULK_FORMAT_NDJSON):
+    """
+    Read messages to submit, one per line
+    @param stream: text stream
+    @param fmt: ndjson, one JSON object per line, or csv with a header row
+    @return: iterator of (line number, dict or exception raised while reading the line)
+    """
+    if fmt == BULK_FORMAT_CSV:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if (not line) or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line)
+            yield line_number, record if isinstance(record, dict) else ValueError("Not a JSON object")
+        except ValueError as ex:
+            yield line_number, ex
+
+
+def build_message(record, message_klass, target=None, priority=None):
+    """
+    Create a message out of a record
+    @param record: dict with command or event in format MODULE@SUBMODULE:name, args, kwargs and priority,
+    any other key is a keyword parameter as well so CSV columns could be used as is
+    @param message_klass: MessageCommand or MessageEvent
+    @param target: MODULE@SUBMODULE:name used when the record has none
+    @param priority: priority used when the record has none
+    """
+    message_object = message_klass()
+    target = record.get("command", None) or record.get("event", None) or target
+    if not target:
+        raise ValueError("No command or event given")
+    data, name = target.split(":")
+    module, submodule = data.split("@")
+    args = record.get("args", None) or []
+    kwargs = dict(record.get("kwargs", None) or {})
+    kwargs.update({key: value for key, value in record.items() if key not in BULK_RESERVED_KEYS})
+    message_object.set_event(module, submodule, name) if isinstance(message_object, MessageEvent) \
+        else message_object.set_command(module, submodule, name)
+    message_object.set_parameters(*(args if isinstance(args, list) else [args]), **kwargs)
+    message_object.set_priority(record.get("priority", None) or priority)
+    return message_object
+
+
+class BulkSubmitter(object):
+    """Stream messages over one framed local transport session keeping at most window of them unacknowledged"""
+
+    def __init__(self, client, interval=0):
+        """
+        @param client: core.msgframe.FramedClient, its max_unacked is the in flight window
+        @param interval: seconds to wait between two messages, 0 sends as fast as the window allows
+        """
+        self._client = client
+        self._interval = interval
+        self._sent = 0
+        self._invalid = 0
+        self._rejected = 0
+        self._start_time = None
+
+    def submit(self, records, build_func, on_invalid=None):
+        """
+        Send every record
+        @param records: iterator of (line number, record) as returned by read_records
+        @param build_func: callable creating the message of a record
+        @param on_invalid: callable receiving line number and reason of records which were not sent
+        @return: summary dict of sent, rejected, invalid, elapsed seconds and rate per second
+        """
+        self._start_time = time.monotonic()
+        for line_number, record in records:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                payload = build_func(record).encode()
+            except Exception as ex:
+                self._invalid += 1
+                on_invalid(line_number, ex) if on_invalid else None
+                continue
+            self._client.send(payload, ack=True)
+            self._sent += 1
+            time.sleep(self._interval) if self._interval > 0 else None
+        self._rejected = len(self._client.wait_acks())
+        return self.get_summary()
+
+    def get_summary(self):
+        elapsed = time.monotonic() - self._start_time if self._start_time else 0
+        return {"sent": self._sent, "rejected": self._rejected, "invalid": self._invalid, "elapsed": elapsed,
+                "rate": (self._sent / elapsed) if elapsed > 0 else 0}
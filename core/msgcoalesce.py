@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+from threading import Lock
+from core import msgobject
+
+
+class EventCoalescer(object):
+    """
+    Collapse identical events seen within a time window into a single execution.
+
+    The first event of a key opens the window, identical events arriving before the window closes are absorbed
+    and only the latest one is emitted when the window closes.
+    """
+
+    def __init__(self, scheduler, emit_func, statistics=None):
+        """
+        Initialize the coalescer
+        @param scheduler: DelayScheduler closing the windows
+        @param emit_func: callback receiving the event to be executed
+        @param statistics: MessageStatistics receiving absorbed and emitted counters
+        """
+        self._scheduler = scheduler
+        self._emit_func = emit_func
+        self._statistics = statistics
+        self._pending = dict()
+        self._lock = Lock()
+
+    @staticmethod
+    def get_coalesce_key(event, key_names):
+        if key_names:
+            params = repr(msgobject.get_parameter_values(event.PARAMS, key_names))
+        else:
+            args, kwargs = event.PARAMS if event.PARAMS else ([], {})
+            params = repr((args, sorted(kwargs.items())))
+        return event.get_module_id(), event.EVENT, params
+
+    def offer(self, event, key_names, window):
+        """
+        Hold an event until its window closes
+        @param event: MessageEvent
+        @param key_names: parameter names identifying duplicates, every parameter when empty
+        @param window: window length in seconds
+        @return: event held before for the same key, it is dropped in favour of event, None when there was none
+        """
+        key = self.get_coalesce_key(event, key_names)
+        with self._lock:
+            absorbed = self._pending.get(key, None)
+            self._pending[key] = event
+        if absorbed is not None:
+            self._statistics.increment("coalesce_absorbed") if self._statistics else None
+            return absorbed
+        self._scheduler.schedule(window, self._emit, key)
+        return None
+
+    def flush(self):
+        """Emit every held event right away"""
+        with self._lock:
+            keys = list(self._pending.keys())
+        for key in keys:
+            self._emit(key)
+
+    def get_pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _emit(self, key):
+        with self._lock:
+            event = self._pending.pop(key, None)
+        if event is None:
+            return
+        self._statistics.increment("coalesce_emitted") if self._statistics else None
+        self._emit_func(event)
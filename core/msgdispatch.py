@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+from types import MappingProxyType
+from core import msgobject
+from core.objfactory import AbstractFactory
+from core.prochandler import CommandProcessor
+
+
+class EventHandler(object):
+    """Resolved subscriber of an event, a processor class and the name of its @mq_event method"""
+
+    __slots__ = ("klass", "func", "batch")
+
+    def __init__(self, klass, func):
+        self.klass = klass
+        self.func = func
+        self.batch = getattr(getattr(klass, func, None), 'mq_batch', False)
+
+    def __repr__(self):
+        return "{0}.{1}:{2}".format(self.klass.__module__, self.klass.__name__, self.func)
+
+
+class DispatchTable(object):
+    """Immutable lookup table of command processors and event subscribers"""
+
+    def __init__(self, commands=None, events=None):
+        """
+        Initialize the table
+        @param commands: dictionary of MODULE@SUBMODULE to processor class
+        @param events: dictionary of (MODULE@SUBMODULE, event name) to tuple of EventHandler
+        """
+        commands = dict(commands) if commands else dict()
+        events = dict(events) if events else dict()
+        self._commands = MappingProxyType(commands)
+        self._events = MappingProxyType(dict([((module_id, self.normalize_event(event)), tuple(handlers))
+                                              for (module_id, event), handlers in events.items()]))
+        self._event_modules = frozenset([module_id for module_id, __ in self._events.keys()])
+        self._modules = frozenset([module_id.split("@")[0] for module_id in commands.keys()] +
+                                  [module_id.split("@")[0] for module_id in self._event_modules])
+
+    @staticmethod
+    def normalize_event(event):
+        # events.properties is parsed by ConfigParser which matches option names case insensitively
+        return event.lower() if event else event
+
+    def get_command_processor(self, module_id):
+        return self._commands.get(module_id, None)
+
+    def has_command_module(self, module_id):
+        return module_id in self._commands
+
+    def get_event_handlers(self, module_id, event):
+        return self._events.get((module_id, self.normalize_event(event)), ())
+
+    def has_event_module(self, module_id):
+        return module_id in self._event_modules
+
+    def get_modules(self):
+        return self._modules
+
+    def get_commands(self):
+        return self._commands
+
+    def get_events(self):
+        return self._events
+
+
+class DispatchTableBuilder(object):
+    """Parse commands.properties and events.properties once, resolve and validate every handler"""
+
+    @classmethod
+    def build(cls, command_props=None, event_props=None, strict=True) -> DispatchTable:
+        """
+        Build the dispatch table
+        @param command_props: commands.properties content as dictionary of MODULE@SUBMODULE to class name
+        @param event_props: events.properties content as ConfigParser
+        @param strict: raise when any entry is invalid, otherwise log and leave out invalid entries only
+        @return: DispatchTable
+        @raise RuntimeError: when any class or event method could not be resolved in strict mode
+        """
+        errors = list()
+        klass_cache = dict()
+        commands = dict()
+        events = dict()
+        for module_id, class_name in (command_props.items() if command_props else []):
+            klass = cls._resolve_klass(class_name, klass_cache, errors)
+            if klass:
+                commands[module_id.strip()] = klass
+        for module_id in (event_props.sections() if event_props else []):
+            for event, str_handlers in event_props.items(module_id, raw=True):
+                if event in event_props.defaults():
+                    continue
+                handlers = cls._resolve_event_handlers(module_id, event, str_handlers, klass_cache, errors)
+                events[(module_id, event)] = handlers
+        if errors and strict:
+            raise RuntimeError("Invalid dispatch configuration:\n  {0}".format("\n  ".join(errors)))
+        for error in errors:
+            logging.error("Invalid dispatch configuration, entry left out: {0}".format(error))
+        logging.info("Dispatch table built with {0} command modules and {1} events".format(len(commands),
+                                                                                          len(events)))
+        return DispatchTable(commands, events)
+
+    @classmethod
+    def _resolve_event_handlers(cls, module_id, event, str_handlers, klass_cache, errors):
+        handlers = list()
+        for str_item in [item.strip() for item in str_handlers.split(",") if item.strip()]:
+            if ":" not in str_item:
+                errors.append("{0}.{1}: '{2}' is not in class:method format".format(module_id, event, str_item))
+                continue
+            class_name, func = [item.strip() for item in str_item.split(":", 1)]
+            klass = cls._resolve_klass(class_name, klass_cache, errors)
+            if not klass:
+                continue
+            if getattr(getattr(klass, func, None), 'mq_type', None) != msgobject.MODE_EVENT:
+                errors.append("{0}.{1}: {2}.{3} is not an @mq_event method".format(module_id, event,
+                                                                                    class_name, func))
+                continue
+            handlers.append(EventHandler(klass, func))
+        return handlers
+
+    @classmethod
+    def _resolve_klass(cls, class_name, klass_cache, errors):
+        class_name = class_name.strip()
+        if class_name in klass_cache:
+            return klass_cache[class_name]
+        klass = None
+        try:
+            klass = AbstractFactory.import_klass(class_name)
+            if not (isinstance(klass, type) and issubclass(klass, CommandProcessor)):
+                errors.append("{0} is not a CommandProcessor".format(class_name))
+                klass = None
+        except Exception as ex:
+            errors.append("{0} could not be imported: {1}".format(class_name, ex))
+        klass_cache[class_name] = klass
+        return klass
@@ -14,19 +14,37 @@
 # This module is part of Centric PLM Integration Bridge and is released under
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
+import asyncio
+import functools
+import inspect
 import logging
+import os
+import time
 import traceback
 from common import consts
 from common import modconfig
+from core import procexec
 from core.objfactory import AbstractFactory
 from core.startable import Startable, StartableManager
-from core.msgobject import MessageFactory, MessageEvent, MessageCommand
+from core.msgstats import MessageStatistics
+from core.msgobject import MessageFactory, AbstractMessage, MessageEvent, MessageCommand, MODE_COMMAND, MODE_EVENT
 from core.msghandler import MessageNotifier
-from core.prochandler import CommandProcessor
-from multiprocessing.pool import ThreadPool
+from core.procpool import ProcessorPool
+from core.msgdispatch import DispatchTableBuilder
+from core.msgcoalesce import EventCoalescer
+from core.msgbatch import MessageBatcher
+from core.msgreply import ReplyManager
+from core.msgretry import RetryPolicy, RetryingCall
+from core.deadletter import DeadLetterStore
+from core.cfgwatch import ConfigurationWatcher
+from core.scheduler import DelayScheduler
+from core.asyncexec import AsyncLoopRunner
+from core.workpool import WorkerPool, PartitionedLanes
+from concurrent import futures
 from configparser import ConfigParser
 from jproperties import Properties
-from threading import get_ident
+from threading import get_ident, RLock
+from uuid import uuid4
 
 
 class DummyClass(object):
@@ -35,35 +53,162 @@ class DummyClass(object):
 
 class BaseExecutor(Startable):
 
-    def __init__(self, config=None, module_config=None, module=None, workers=4):
+    def __init__(self, config=None, module_config=None, module=None):
         super(BaseExecutor, self).__init__(config=config)
         self._collection = dict()
-        self._max_processes = workers
-        self._pool = None
+        self._worker_pool = None
+        self._scheduler = None
+        self._async_runner = None
+        self._reply_manager = None
+        self._dead_letter_store = None
+        self._process_pool = None
+        self._process_options = None
         self._module = module
         self._module_config = module_config
-        self._props = None
+        self._dispatch_table = None
+        self._processor_pools = dict()
+        self._processor_pool_lock = RLock()
+        self._partitions = dict()
+        self._batcher = None
+        self._processor_pool_size = consts.DEFAULT_PROCESSOR_POOL_SIZE
+        self._processor_idle_timeout = consts.DEFAULT_PROCESSOR_POOL_IDLE
+        self._stats_interval = consts.DEFAULT_EXECUTOR_STATS_INTERVAL
+        self._default_timeout = consts.DEFAULT_EXECUTOR_TIMEOUT
+        self._statistics = MessageStatistics("{0}[{1}]".format(self.__class__.__name__, module))
 
     def do_configure(self):
-        self._max_processes = self._max_processes if self._max_processes > 0 else 4
+        config = self.get_configuration()
+        self._processor_pool_size = int(config[consts.PROCESSOR_POOL_SIZE]) \
+            if config and consts.PROCESSOR_POOL_SIZE in config else consts.DEFAULT_PROCESSOR_POOL_SIZE
+        self._processor_idle_timeout = float(config[consts.PROCESSOR_POOL_IDLE]) \
+            if config and consts.PROCESSOR_POOL_IDLE in config else consts.DEFAULT_PROCESSOR_POOL_IDLE
+        self._stats_interval = float(config[consts.EXECUTOR_STATS_INTERVAL]) \
+            if config and consts.EXECUTOR_STATS_INTERVAL in config else consts.DEFAULT_EXECUTOR_STATS_INTERVAL
+        self._default_timeout = float(config[consts.EXECUTOR_TIMEOUT]) \
+            if config and consts.EXECUTOR_TIMEOUT in config else consts.DEFAULT_EXECUTOR_TIMEOUT
 
     def do_start(self):
-        self._pool = ThreadPool(processes=self._max_processes)
+        if not self._worker_pool:
+            raise RuntimeError("{0} requires a worker pool".format(self.__class__.__name__))
+        self._batcher = MessageBatcher(self._scheduler, self._submit_batch, self._statistics)
+        self._apply_module_options()
+
+    def _apply_module_options(self):
+        """Apply worker quota and executor mode options of the MODULE section"""
+        min_workers = int(self.get_module_option(self._module, consts.MODULE_MIN_WORKERS, 0))
+        max_workers = int(self.get_module_option(self._module, consts.MODULE_MAX_WORKERS, 0))
+        self._worker_pool.set_module_quota(self._module, min_workers, max_workers)
+        executor_mode = str(self.get_module_option(self._module, consts.MODULE_EXECUTOR,
+                                                   consts.EXECUTOR_MODE_THREAD)).lower()
+        workers = int(self.get_module_option(self._module, consts.MODULE_PROCESS_WORKERS,
+                                             consts.DEFAULT_PROCESS_WORKERS))
+        errors = procexec.get_unsupported_options(self._module, self.get_dispatch_table(),
+                                                  self.get_module_configuration()) + \
+            self.get_unsupported_partition_options(self._module, self.get_dispatch_table(),
+                                                   self.get_module_configuration())
+        if errors:
+            raise ValueError("; ".join(errors))
+        # worker processes are handed the whole modules configuration, they are kept while it is the same
+        process_options = (workers, procexec.get_module_dict(self.get_module_configuration())) \
+            if executor_mode == consts.EXECUTOR_MODE_PROCESS else None
+        if process_options == self._process_options:
+            return
+        previous_pool, self._process_pool, self._process_options = self._process_pool, None, None
+        if process_options:
+            self._process_pool = procexec.create_process_pool(workers, self.get_configuration(),
+                                                              self.get_module_configuration())
+            self._process_options = process_options
+            logging.info("{0} runs {1} on {2} worker processes".format(self.__class__.__name__,
+                                                                      self._module, workers))
+        # work already submitted to the previous worker processes still completes
+        previous_pool.shutdown(wait=False) if previous_pool else None
+
+    def reload(self, dispatch_table, module_config):
+        """Swap in a reloaded configuration, processors created with the previous one are dropped"""
+        self._dispatch_table = dispatch_table
+        self._module_config = module_config
+        with self._processor_pool_lock:
+            # lanes keep the order of work already submitted, so they are kept unless their options changed
+            partitions = dict()
+            for module_id, lanes in self._partitions.items():
+                key_names, lane_count = self._get_partition_options(module_id)
+                if (lanes.get_key_names() if lanes else []) == key_names and \
+                        ((not lanes) or (lanes.get_lane_count() == lane_count)):
+                    partitions[module_id] = lanes
+                else:
+                    logging.warning("{0} partitioning changed, messages already submitted may run out of order "
+                                    "with the following ones".format(module_id))
+            self._partitions = partitions
+            for processor_pool in self._processor_pools.values():
+                processor_pool.clear()
+        self._apply_module_options() if self.is_running() else None
+
+    def flush(self):
+        """Hand batched messages over to the worker pool right away"""
+        self._batcher.flush() if self._batcher else None
+
+    def get_pending_count(self):
+        """Messages held back in batches plus messages running on worker processes"""
+        pending = self._batcher.get_pending_count() if self._batcher else 0
+        return pending + self._statistics.get_counter("process_active")
 
     def do_stop(self):
-        self._pool.terminate()
+        if self._process_pool:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+        self._process_options = None
+        self._statistics.log_statistics()
+        with self._processor_pool_lock:
+            for processor_pool in self._processor_pools.values():
+                processor_pool.clear()
 
     def get_module(self):
         return self._module
 
+    def get_message_mode(self):
+        return None
+
+    def get_routing_key(self):
+        return self._module, self.get_message_mode()
+
     def is_valid_module(self, message_obj):
         return message_obj.MODULE == self._module
 
-    def get_properties(self):
-        return self._props
+    def get_dispatch_table(self):
+        return self._dispatch_table
+
+    def get_worker_pool(self):
+        return self._worker_pool
+
+    def get_scheduler(self):
+        return self._scheduler
+
+    def get_async_runner(self):
+        return self._async_runner
+
+    def get_reply_manager(self):
+        return self._reply_manager
+
+    def set_reply_manager(self, reply_manager):
+        self._reply_manager = reply_manager
+
+    def get_dead_letter_store(self):
+        return self._dead_letter_store
 
-    def set_properties(self, props):
-        self._props = props
+    def set_dead_letter_store(self, dead_letter_store):
+        self._dead_letter_store = dead_letter_store
+
+    def set_async_runner(self, async_runner):
+        self._async_runner = async_runner
+
+    def set_scheduler(self, scheduler):
+        self._scheduler = scheduler
+
+    def set_worker_pool(self, worker_pool):
+        self._worker_pool = worker_pool
+
+    def set_dispatch_table(self, dispatch_table):
+        self._dispatch_table = dispatch_table
 
     def execute_module(self, message_obj):
         pass
@@ -74,32 +219,42 @@ class BaseExecutor(Startable):
     def get_module_configuration(self):
         return self._module_config
 
-    def _get_klass_from_cache(self, class_name):
-        return None
-
-    def _register_klass_to_cache(self, class_name, mod):
-        return None
-
-    def _get_klass_module(self, msg_obj):
-        class_name = msg_obj if isinstance(msg_obj, str) \
-            else self._props.properties[msg_obj.get_module_id()]
-        components = class_name.split(".")
-        return components, ".".join(components[:-1]), class_name
-
-    def _get_klass(self, msg_obj):
-        components, import_modules, class_name = self._get_klass_module(msg_obj)
-        logging.debug("BaseExecutor.get_klass: {0} output {1} - {2}".format(msg_obj, components, import_modules))
-        mod = self._get_klass_from_cache(class_name)
-        if not mod:
-            try:
-                mod = __import__(import_modules)
-                for cmp in components[1:]:
-                    mod = getattr(mod, cmp)
-                mod = mod if issubclass(mod, CommandProcessor) else None
-                self._register_klass_to_cache(class_name, mod) if mod else None
-            except Exception as ex:
-                logging.error(ex)
-        return mod
+    def get_module_option(self, module_id, option, default=None, name=None):
+        """
+        Read an option of MODULE@SUBMODULE section in modules.properties
+        @param module_id: section name in MODULE@SUBMODULE format
+        @param option: option name
+        @param default: value returned when the option is not defined
+        @param name: event or command name, NAME.option takes precedence over option when defined
+        @return: option value
+        """
+        module_config = self.get_module_configuration()
+        if (not module_config) or (module_id not in module_config):
+            return default
+        section = module_config[module_id]
+        option_key = "{0}.{1}".format(name, option) if name else None
+        if option_key and (option_key in section):
+            return section[option_key]
+        return section[option] if option in section else default
+
+    def get_module_option_list(self, module_id, option, name=None):
+        value = self.get_module_option(module_id, option, None, name)
+        return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+    def get_handler_timeout(self, module_id, name=None):
+        """Seconds a command or event handler may run, 0 when it may run forever"""
+        return float(self.get_module_option(module_id, consts.MODULE_TIMEOUT, self._default_timeout, name))
+
+    def get_retry_policy(self, module_id, name=None):
+        return RetryPolicy(int(self.get_module_option(module_id, consts.MODULE_RETRY_COUNT,
+                                                      consts.DEFAULT_RETRY_COUNT, name)),
+                           float(self.get_module_option(module_id, consts.MODULE_RETRY_DELAY,
+                                                        consts.DEFAULT_RETRY_DELAY, name)),
+                           float(self.get_module_option(module_id, consts.MODULE_RETRY_MAX_DELAY,
+                                                        consts.DEFAULT_RETRY_MAX_DELAY, name)))
+
+    def get_statistics(self):
+        return self._statistics
 
     def _create_object(self, klass):
         if not klass:
@@ -116,17 +271,215 @@ class BaseExecutor(Startable):
         logging.debug("BaseExecutor.create_object: {0} output {1}".format(klass, module))
         return module
 
+    def _get_partitioned_lanes(self, module_id):
+        if module_id in self._partitions:
+            return self._partitions[module_id]
+        with self._processor_pool_lock:
+            if module_id not in self._partitions:
+                key_names, lane_count = self._get_partition_options(module_id)
+                self._partitions[module_id] = PartitionedLanes(self._worker_pool, self._module, key_names,
+                                                               lane_count) if key_names else None
+            return self._partitions[module_id]
+
+    def _get_partition_options(self, module_id):
+        key_names = self.get_module_option_list(module_id, consts.MODULE_PARTITION_KEY)
+        lane_count = int(self.get_module_option(module_id, consts.MODULE_PARTITION_LANES,
+                                                consts.DEFAULT_PARTITION_LANES))
+        return key_names, max(1, lane_count)
+
+    def _submit_work(self, message_obj, timeout, func, *args):
+        """Submit work of a message to the worker pool, or to its lane when the submodule is partitioned"""
+        lanes = self._get_partitioned_lanes(message_obj.get_module_id())
+        if lanes:
+            return lanes.submit_timed(message_obj.PARAMS, timeout, func, *args)
+        return self._worker_pool.submit_timed(self._module, timeout, func, *args)
+
+    def _add_to_batch(self, klass, func, message_obj):
+        """Collect a message for an @mq_batch method, batch size and wait time could be overridden per module"""
+        method = getattr(klass, func)
+        module_id = message_obj.get_module_id()
+        max_size = int(self.get_module_option(module_id, consts.MODULE_BATCH_SIZE, method.mq_batch_size, func))
+        max_wait = float(self.get_module_option(module_id, consts.MODULE_BATCH_WAIT, method.mq_batch_wait, func))
+        # released once the batch is submitted, the message is not complete while it waits for its batch
+        message_obj.hold_completion()
+        self._batcher.add((klass, func), message_obj, max_size, max_wait)
+
+    def _submit_batch(self, key, messages):
+        klass, func = key
+        try:
+            future = self._submit_with_retry(messages, func, "{0}.{1}".format(klass.__name__, func),
+                                             lambda: self._submit_batch_attempt(klass, func, messages))
+            # every command of the batch is answered with the result of the whole batch
+            for message in [message for message in messages if message.is_reply_expected()]:
+                self._add_reply_callback(message, future)
+            for message in messages:
+                message.track_completion(future)
+        finally:
+            for message in messages:
+                message.release_completion()
+
+    def _submit_batch_attempt(self, klass, func, messages):
+        if self._process_pool:
+            return self._submit_process(procexec.execute_batch, procexec.get_class_name(klass), func,
+                                        self.get_message_mode(), [message.to_dict() for message in messages])
+        timeout = self.get_handler_timeout(messages[0].get_module_id(), func)
+        if self.is_coroutine_handler(klass, func):
+            return self._async_runner.submit(self.do_execute_async, klass,
+                                             lambda module: module.perform_batch(func, messages,
+                                                                                 self.get_message_mode()),
+                                             timeout)
+        return self._worker_pool.submit_timed(self._module, timeout, self.do_execute_batch, klass, func, messages)
+
+    def _submit_with_retry(self, messages, name, handler, submit):
+        """
+        Submit a handler run, retrying it by the RETRY options of the module and dead lettering its messages
+        once every attempt failed
+        @param messages: messages processed by the handler run
+        @param name: command, event or batch method name the RETRY options could be prefixed with
+        @param handler: handler description kept with dead lettered messages
+        @param submit: callable submitting one attempt and returning its Future
+        @return: Future of the outcome of the last attempt
+        """
+        policy = self.get_retry_policy(messages[0].get_module_id(), name)
+        return RetryingCall(submit, policy, self._scheduler, functools.partial(self._dead_letter, messages, handler),
+                            self._statistics).start()
+
+    def _dead_letter(self, messages, handler, exc, attempts):
+        if not self._dead_letter_store:
+            logging.error("{0} failed after {1} attempts, {2} messages lost: {3}".format(handler, attempts,
+                                                                                       len(messages), exc))
+            return
+        for message in messages:
+            self._dead_letter_store.append(message, handler, exc, attempts)
+        self._statistics.increment("dead_letters", len(messages))
+
+    def do_execute_batch(self, klass, func, messages):
+        module = None
+        try:
+            logging.debug("Processing batch of {0} messages on {1}.{2} thread {3}".format(
+                len(messages), klass.__name__, func, get_ident()))
+            module = self._borrow_object(klass)
+            result = module.perform_batch(func, messages, self.get_message_mode())
+            self._release_object(module)
+            return result
+        except Exception:
+            self._discard_object(module)
+            logging.error(traceback.format_exc())
+            raise
+
+    def _add_reply_callback(self, message_obj, future):
+        """Answer message_obj with the outcome of future once it is done"""
+        if self._reply_manager:
+            future.add_done_callback(functools.partial(self._reply_manager.complete, message_obj))
 
-class ModuleExecutor(BaseExecutor):
-    def __init__(self, config=None, module=None, workers=4):
-        super(ModuleExecutor, self).__init__(config=config, module=module, workers=workers)
-        self._module_dict = dict()
+    def _submit_process(self, func, *args):
+        future = self._process_pool.submit(func, *args)
+        self._statistics.increment("process_active")
+        future.add_done_callback(lambda __: self._statistics.decrement("process_active"))
+        future.add_done_callback(self._log_process_failure)
+        return future
+
+    @staticmethod
+    def _log_process_failure(future):
+        exc = future.exception() if not future.cancelled() else None
+        if exc:
+            logging.error("Worker process failed: {0}".format(
+                "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))))
+
+    @staticmethod
+    def is_coroutine_handler(klass, func):
+        return inspect.iscoroutinefunction(getattr(klass, func or "", None))
+
+    @staticmethod
+    def get_unsupported_partition_options(module, dispatch_table, module_config):
+        """
+        Handlers of the partitioned submodules of a module which lanes could not keep in order
+        @param module: module name, PARTITION_KEY option of its MODULE@SUBMODULE sections selects lanes
+        @param dispatch_table: DispatchTable the module is served from
+        @param module_config: modules.properties content
+        @return: list of error messages, empty when every handler of a partitioned submodule runs on its lanes
+        """
+        prefix = "{0}@".format(module)
+        module_ids = [name for name in module_config.sections() if name.startswith(prefix) and
+                      module_config.get(name, consts.MODULE_PARTITION_KEY, fallback=None)] if module_config else []
+        errors = []
+        # batches and coroutines are not submitted to the lanes, their messages would overtake each other
+        commands = dispatch_table.get_commands() if dispatch_table else dict()
+        for module_id in [module_id for module_id in module_ids if module_id in commands]:
+            errors += ["{0} command {1}.{2} is @mq_batch or async def, which PARTITION_KEY could not keep in "
+                       "order".format(module_id, commands[module_id].__name__, name)
+                       for name, method in inspect.getmembers(commands[module_id])
+                       if getattr(method, 'mq_batch', False) or inspect.iscoroutinefunction(method)]
+        events = dispatch_table.get_events() if dispatch_table else dict()
+        for (module_id, event), handlers in [item for item in events.items() if item[0][0] in module_ids]:
+            errors += ["{0} handler {1} of {2} is @mq_batch or async def, which PARTITION_KEY could not keep in "
+                       "order".format(module_id, handler, event) for handler in handlers
+                       if handler.batch or inspect.iscoroutinefunction(getattr(handler.klass, handler.func, None))]
+        return errors
+
+    async def do_execute_async(self, klass, invoke, timeout=0):
+        """
+        Run a coroutine handler on the event loop of the async runner
+        @param klass: processor class
+        @param invoke: callable receiving the borrowed processor and returning the handler coroutine
+        @param timeout: seconds the handler coroutine may run before it is cancelled, 0 for no limit
+        """
+        module = None
+        try:
+            # creating a processor may block on its configure, keep that away from the event loop
+            module = await asyncio.get_running_loop().run_in_executor(None, self._borrow_object, klass)
+            result = invoke(module)
+            if inspect.isawaitable(result):
+                result = await (asyncio.wait_for(result, timeout) if timeout > 0 else result)
+            self._release_object(module)
+            return result
+        except asyncio.TimeoutError:
+            self._discard_object(module)
+            self._statistics.increment("timeouts")
+            logging.error("{0} handler cancelled after {1}s timeout".format(klass.__name__, timeout))
+            raise TimeoutError("{0} handler exceeded {1}s".format(klass.__name__, timeout))
+        except asyncio.CancelledError:
+            self._discard_object(module)
+            raise
+        except Exception:
+            self._discard_object(module)
+            logging.error(traceback.format_exc())
+            raise
+
+    def _get_processor_pool(self, klass):
+        processor_pool = self._processor_pools.get(klass, None)
+        if processor_pool:
+            return processor_pool
+        with self._processor_pool_lock:
+            if klass not in self._processor_pools:
+                self._processor_pools[klass] = ProcessorPool(klass, self._create_object,
+                                                             max_size=self._processor_pool_size,
+                                                             idle_timeout=self._processor_idle_timeout)
+            return self._processor_pools[klass]
+
+    def _borrow_object(self, klass):
+        if not klass:
+            return None
+        return self._get_processor_pool(klass).borrow()
+
+    def _release_object(self, module):
+        if module is None:
+            return
+        if module.get_module_configuration() is not self.get_module_configuration():
+            # created before a configuration reload
+            self._discard_object(module)
+            return
+        self._get_processor_pool(module.__class__).release(module)
 
-    def _get_klass_from_cache(self, class_name):
-        return self._module_dict[class_name] if class_name in self._module_dict else None
+    def _discard_object(self, module):
+        if module is None:
+            return
+        self._get_processor_pool(module.__class__).discard(module)
 
-    def _register_klass_to_cache(self, class_name, mod):
-        self._module_dict[class_name] = mod
+
+class ModuleExecutor(BaseExecutor):
+    def __init__(self, config=None, module=None):
+        super(ModuleExecutor, self).__init__(config=config, module=module)
 
     def has_service(self, message_obj):
         return None
@@ -134,85 +487,194 @@ class ModuleExecutor(BaseExecutor):
 
 class EventExecutor(ModuleExecutor):
 
-    def __init__(self, config=None, module=None, workers=4):
-        super(EventExecutor, self).__init__(config=config, module=module, workers=workers)
+    def __init__(self, config=None, module=None):
+        super(EventExecutor, self).__init__(config=config, module=module)
+        self._coalescer = None
+
+    def get_message_mode(self):
+        return MODE_EVENT
 
     def is_valid_module(self, message_obj):
         return super(EventExecutor, self).is_valid_module(message_obj) and isinstance(message_obj, MessageEvent)
 
     def has_service(self, message_obj):
-        props = self.get_properties()
-        return props.has_section(message_obj.get_module_id())
+        return self.get_dispatch_table().has_event_module(message_obj.get_module_id())
+
+    def do_start(self):
+        super(EventExecutor, self).do_start()
+        self._coalescer = EventCoalescer(self._scheduler, self._emit_coalesced_event, self._statistics)
+
+    def flush(self):
+        # coalesced events may end up in a batch, so they go first
+        self._coalescer.flush() if self._coalescer else None
+        super(EventExecutor, self).flush()
+
+    def get_pending_count(self):
+        pending = self._coalescer.get_pending_count() if self._coalescer else 0
+        return pending + super(EventExecutor, self).get_pending_count()
 
     def execute_module(self, message_obj):
         if self.has_service(message_obj):
             try:
-                props = self.get_properties()
-                section_props = props[message_obj.get_module_id()]
-                str_mod = None if message_obj.EVENT not in section_props else section_props[message_obj.EVENT]
-                list_mod = [str_item.split(":") for str_item in (str_mod.split(",") if str_mod else [])]
-                for str_mod, str_func in list_mod:
-                    klass = self._get_klass(str_mod)
-                    module = self._create_object(klass)
-                    logging.debug("EventExecutor.execute_module: klass and module {0} - {1}".format(klass, module))
-                    self.assign_event(module, str_func, message_obj)
+                module_id = message_obj.get_module_id()
+                window = float(self.get_module_option(module_id, consts.MODULE_COALESCE_WINDOW, 0,
+                                                      message_obj.EVENT))
+                if window > 0:
+                    key_names = self.get_module_option_list(module_id, consts.MODULE_COALESCE_KEY,
+                                                            message_obj.EVENT)
+                    # an absorbed event is complete, the one held is complete once emitted and handled
+                    message_obj.hold_completion()
+                    absorbed = self._coalescer.offer(message_obj, key_names, window)
+                    absorbed.release_completion() if absorbed else None
+                else:
+                    self.dispatch_event(message_obj)
             except Exception as ex:
                 logging.error(ex)
         else:
             logging.error("Could not parse message correctly")
+        self._statistics.log_statistics_every(self._stats_interval)
+
+    def dispatch_event(self, message_obj, join=True):
+        handlers = self.get_dispatch_table().get_event_handlers(message_obj.get_module_id(), message_obj.EVENT)
+        logging.debug("EventExecutor.dispatch_event: handlers {0}".format(handlers))
+        results = [self.assign_event(handler.klass, handler.func, message_obj) for handler in handlers
+                   if not handler.batch]
+        for future in results:
+            message_obj.track_completion(future)
+        for handler in [handler for handler in handlers if handler.batch]:
+            self._add_to_batch(handler.klass, handler.func, message_obj)
+        self._statistics.increment("events")
+        self._statistics.increment("fanout_handlers", len(handlers))
+        self._statistics.track_max("peak_fanout", len(handlers))
+        self.join_event(message_obj, results) if join else None
+        return results
+
+    def _emit_coalesced_event(self, message_obj):
+        # runs on the scheduler thread, joining here would hold back every other scheduled task
+        try:
+            self.dispatch_event(message_obj, join=False)
+        except Exception as ex:
+            logging.error(ex)
+        finally:
+            message_obj.release_completion()
 
-    def assign_event(self, module, func, event):
+    def assign_event(self, klass, func, event):
         logging.debug("Submitting event {0}.{1}:{2} params: {3}".format(event.MODULE, event.SUBMODULE,
                                                                         event.EVENT, event.PARAMS))
-        self._pool.apply_async(self.do_execute_event(module, func, event))
-
-    @staticmethod
-    def do_execute_event(module, func, event):
+        return self._submit_with_retry([event], event.EVENT, "{0}.{1}".format(klass.__name__, func),
+                                       lambda: self._submit_event(klass, func, event))
+
+    def _submit_event(self, klass, func, event):
+        if self._process_pool:
+            return self._submit_process(procexec.execute_message, procexec.get_class_name(klass), func,
+                                        event.to_dict())
+        timeout = self.get_handler_timeout(event.get_module_id(), event.EVENT)
+        if self.is_coroutine_handler(klass, func):
+            return self._async_runner.submit(self.do_execute_async, klass,
+                                             lambda module: module.perform_notify(func, event), timeout)
+        return self._submit_work(event, timeout, self.do_execute_event, klass, func, event)
+
+    def join_event(self, event, results):
+        """Wait for all subscribers of the event to finish when JOIN option is enabled for the event"""
+        module_id = event.get_module_id()
+        join = self.get_module_option(module_id, consts.MODULE_EVENT_JOIN, "false", event.EVENT)
+        if (not results) or (str(join).lower() != "true"):
+            return
+        timeout = float(self.get_module_option(module_id, consts.MODULE_EVENT_JOIN_TIMEOUT, 0, event.EVENT))
+        start_time = time.monotonic()
+        __, not_done = futures.wait(results, timeout=timeout if timeout > 0 else None)
+        self._statistics.record_timing("join_wait", time.monotonic() - start_time)
+        pending = len(not_done)
+        if pending > 0:
+            self._statistics.increment("join_timeouts")
+            logging.warning("{0} of {1} subscribers of {2}:{3} still running after {4}s".format(
+                pending, len(results), module_id, event.EVENT, timeout))
+
+    def do_execute_event(self, klass, func, event):
+        module = None
+        active_handlers = self._statistics.increment("active_handlers")
+        self._statistics.track_max("peak_active_handlers", active_handlers)
         try:
             logging.debug("Processing {0} event on thread {1}".format(event.get_module_id(), get_ident()))
+            module = self._borrow_object(klass)
             module.perform_notify(func, event)
+            self._release_object(module)
         except Exception:
+            self._discard_object(module)
             logging.error(traceback.format_exc())
+            raise
         finally:
+            self._statistics.decrement("active_handlers")
             logging.debug("End processing {0} event on thread {1}".format(event.get_module_id(), get_ident()))
 
 
 class CommandExecutor(ModuleExecutor):
 
-    def __init__(self, config=None, module=None, workers=4):
-        super(CommandExecutor, self).__init__(config=config, module=module, workers=workers)
+    def __init__(self, config=None, module=None):
+        super(CommandExecutor, self).__init__(config=config, module=module)
+
+    def get_message_mode(self):
+        return MODE_COMMAND
 
     def is_valid_module(self, message_obj):
         return super(CommandExecutor, self).is_valid_module(message_obj) and isinstance(message_obj, MessageCommand)
 
     def has_service(self, message_obj):
-        props = self.get_properties()
-        return message_obj.get_module_id() in props.keys()
+        return self.get_dispatch_table().has_command_module(message_obj.get_module_id())
 
     def execute_module(self, message_obj):
         if self.has_service(message_obj):
             try:
-                klass = self._get_klass(message_obj)
-                module = self._create_object(klass)
-                logging.debug("CommandExecutor.execute_module: klass and module {0} - {1}".format(klass, module))
-                self.assign_task(module, message_obj)
+                klass = self.get_dispatch_table().get_command_processor(message_obj.get_module_id())
+                logging.debug("CommandExecutor.execute_module: klass {0}".format(klass))
+                if getattr(getattr(klass, message_obj.COMMAND or "", None), 'mq_batch', False):
+                    self._add_to_batch(klass, message_obj.COMMAND, message_obj)
+                else:
+                    future = self.assign_task(klass, message_obj)
+                    self._add_reply_callback(message_obj, future) if message_obj.is_reply_expected() else None
+                    message_obj.track_completion(future)
             except Exception as ex:
                 logging.error(ex)
+                self._reply_error(message_obj, ex)
         else:
             logging.error("Could not find service for {0}.{1}".format(message_obj.MODULE, message_obj.SUBMODULE))
+            self._reply_error(message_obj, LookupError("Could not find service for {0}.{1}".format(
+                message_obj.MODULE, message_obj.SUBMODULE)))
 
-    def assign_task(self, module, command):
+    def _reply_error(self, message_obj, exc):
+        if message_obj.is_reply_expected():
+            future = futures.Future()
+            future.set_exception(exc)
+            self._add_reply_callback(message_obj, future)
+
+    def assign_task(self, klass, command):
         logging.debug("Submitting command {0}.{1}:{2} params: {3}".format(command.MODULE, command.SUBMODULE,
                                                                           command.COMMAND, command.PARAMS))
-        self._pool.apply_async(self.do_execute, (module, command))
-
-    @staticmethod
-    def do_execute(module, command):
+        return self._submit_with_retry([command], command.COMMAND, "{0}.{1}".format(klass.__name__, command.COMMAND),
+                                       lambda: self._submit_task(klass, command))
+
+    def _submit_task(self, klass, command):
+        if self._process_pool:
+            return self._submit_process(procexec.execute_message, procexec.get_class_name(klass), None,
+                                        command.to_dict())
+        timeout = self.get_handler_timeout(command.get_module_id(), command.COMMAND)
+        if self.is_coroutine_handler(klass, command.COMMAND):
+            return self._async_runner.submit(self.do_execute_async, klass,
+                                             lambda module: module.perform_exec(command), timeout)
+        return self._submit_work(command, timeout, self.do_execute, klass, command)
+
+    def do_execute(self, klass, command):
+        module = None
         try:
             logging.debug("Processing {0} command on thread {1}".format(command.get_module_id(), get_ident()))
-            module.perform_exec(command)
+            module = self._borrow_object(klass)
+            result = module.perform_exec(command)
+            self._release_object(module)
+            return result
         except Exception:
+            self._discard_object(module)
             logging.error(traceback.format_exc())
+            raise
         finally:
             logging.debug("End processing {0} command on thread {1}".format(command.get_module_id(), get_ident()))
 
@@ -223,28 +685,62 @@ class ExecutorFactory(AbstractFactory):
         super(ExecutorFactory, self).__init__(config=config)
         self._command_props = None
         self._event_props = None
-        self._event_props = None
+        self._dispatch_table = None
         self._configured = False
 
     def do_configure(self):
+        # an invalid entry only disables itself at boot, the other modules are served
+        self._dispatch_table = self.load_dispatch_table(strict=False)
+        self._configured = True
+
+    def load_dispatch_table(self, strict=True):
+        """
+        Read commands and events properties and compile them into a new DispatchTable
+        @param strict: raise on any invalid entry instead of leaving it out, and when a file the current table
+        serves entries of is missing or the new table is empty while the current one is not, as a file caught
+        in the middle of being written would be
+        """
+        current_table = self._dispatch_table
+        command_props = Properties()
         config_file = "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.DEFAULT_COMMAND_FILE)
-        self._command_props = Properties()
-        with open(config_file, "rb") as file_prop:
-            self._command_props.load(file_prop, "utf-8")
+        if os.path.exists(config_file):
+            with open(config_file, "rb") as file_prop:
+                command_props.load(file_prop, "utf-8")
+        elif strict and current_table and current_table.get_commands():
+            raise FileNotFoundError("{0} could not be found".format(config_file))
+        else:
+            logging.warning("{0} could not be found, no command will be served".format(config_file))
         config_file = "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.DEFAULT_EVENT_FILE)
-        self._event_props = ConfigParser()
-        self._event_props.read(config_file)
-        self._configured = True
+        event_props = ConfigParser()
+        events_read = event_props.read(config_file)
+        if (not events_read) and strict and current_table and current_table.get_events():
+            raise FileNotFoundError("{0} could not be found".format(config_file))
+        elif not events_read:
+            logging.warning("{0} could not be found, no event will be served".format(config_file))
+        dispatch_table = DispatchTableBuilder.build(command_props.properties, event_props, strict)
+        if strict and current_table and current_table.get_modules() and (not dispatch_table.get_modules()):
+            raise ValueError("{0} and {1} hold no valid entry".format(consts.DEFAULT_COMMAND_FILE,
+                                                                     consts.DEFAULT_EVENT_FILE))
+        self._command_props, self._event_props = command_props, event_props
+        return dispatch_table
+
+    def is_configured(self):
+        return self._configured
+
+    def get_dispatch_table(self):
+        return self._dispatch_table
+
+    def set_dispatch_table(self, dispatch_table):
+        self._dispatch_table = dispatch_table
 
     def generate(self, config, message_obj):
         module_obj = None
         self.do_configure() if not self._configured else None
         if isinstance(message_obj, MessageEvent):
             module_obj = EventExecutor(config=config, module=message_obj.MODULE)
-            module_obj.set_properties(self._event_props)
         elif isinstance(message_obj, MessageCommand):
             module_obj = CommandExecutor(config=config, module=message_obj.MODULE)
-            module_obj.set_properties(self._command_props)
+        module_obj.set_dispatch_table(self._dispatch_table) if module_obj else None
         return module_obj
 
 
@@ -253,23 +749,143 @@ class BaseExecutionManager(StartableManager):
     def __init__(self, config):
         super(BaseExecutionManager, self).__init__(config=config)
         self._executor_factory = ExecutorFactory(config=config)
+        self._scheduler = DelayScheduler(config=config)
+        self._worker_pool = WorkerPool(config=config)
+        self._async_runner = AsyncLoopRunner(config=config)
+        self._reply_manager = ReplyManager()
+        self._dead_letter_store = DeadLetterStore.from_configuration(config)
+        self._config_watcher = ConfigurationWatcher(config=config, file_names=[
+            "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.DEFAULT_COMMAND_FILE),
+            "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.DEFAULT_EVENT_FILE),
+            "{0}/{1}".format(consts.DEFAULT_SCRIPT_PATH, consts.MODULE_CONFIG_FILE)],
+            changed_func=self.reload_configuration)
         self._module_config = None
+        self.add_object(self._scheduler)
+        self.add_object(self._worker_pool)
+        self.add_object(self._async_runner)
+        self.add_object(self._config_watcher)
+        self._register_lock = RLock()
+        self._reload_lock = RLock()
+        self._routing_index = dict()
+
+    def do_configure(self):
+        # resolve every handler up front so invalid entries are reported at boot instead of first message
+        self._executor_factory.do_configure()
+        self._module_config = modconfig.get_configuration()
+        for error in self._get_unsupported_options(self._executor_factory.get_dispatch_table(), self._module_config):
+            logging.error("{0}, messages of the module are refused".format(error))
+        super(BaseExecutionManager, self).do_configure()
+
+    def do_start(self):
+        if not self._executor_factory.is_configured():
+            raise RuntimeError("{0} could not be started without a valid dispatch table".format(
+                self.__class__.__name__))
+        super(BaseExecutionManager, self).do_start()
+
+    def add_object(self, obj):
+        super(BaseExecutionManager, self).add_object(obj)
+        if isinstance(obj, BaseExecutor) and (obj in self.get_objects()):
+            self._routing_index[obj.get_routing_key()] = obj
+
+    def remove_object(self, obj):
+        super(BaseExecutionManager, self).remove_object(obj)
+        if isinstance(obj, BaseExecutor) and (self._routing_index.get(obj.get_routing_key(), None) is obj):
+            self._routing_index.pop(obj.get_routing_key())
+
+    def reload_configuration(self):
+        """
+        Compile commands, events and modules configuration again and swap it into every executor,
+        messages keep being dispatched with the current configuration until the new one is ready
+        @return: True when the new configuration is in use, False when the current one is kept
+        """
+        with self._reload_lock:
+            try:
+                dispatch_table = self._executor_factory.load_dispatch_table()
+                module_config = modconfig.reload_configuration()
+                errors = self._get_unsupported_options(dispatch_table, module_config)
+                if errors:
+                    raise ValueError("; ".join(errors))
+            except Exception as ex:
+                logging.error("Could not reload configuration, keeping current one: {0}".format(ex))
+                return False
+            with self._register_lock:
+                self._executor_factory.set_dispatch_table(dispatch_table)
+                self._module_config = module_config
+                executors = list(self._routing_index.values())
+            for executor in executors:
+                try:
+                    executor.reload(dispatch_table, module_config)
+                except Exception as ex:
+                    logging.error("Could not reload {0}: {1}".format(executor.get_module(), ex))
+            logging.info("Configuration reloaded, serving {0} modules".format(len(dispatch_table.get_modules())))
+            return True
+
+    @staticmethod
+    def _get_unsupported_options(dispatch_table, module_config):
+        errors = []
+        for module in sorted(dispatch_table.get_modules()) if dispatch_table else []:
+            errors += procexec.get_unsupported_options(module, dispatch_table, module_config)
+            errors += BaseExecutor.get_unsupported_partition_options(module, dispatch_table, module_config)
+        return errors
+
+    def drain(self, timeout):
+        """
+        Flush batched and coalesced messages and wait for every submitted handler to finish
+        @param timeout: seconds to wait at most
+        @return: tuple of handlers completed meanwhile and handlers or held messages left over
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        completed = self._get_completed_count()
+        left = self._get_outstanding_count()
+        while left and (time.monotonic() < deadline):
+            for executor in list(self._routing_index.values()):
+                executor.flush()
+            # retries waiting for their backoff are attempted right away
+            self._scheduler.run_pending()
+            time.sleep(0.05)
+            left = self._get_outstanding_count()
+        return self._get_completed_count() - completed, left
+
+    def _get_completed_count(self):
+        return self._worker_pool.get_statistics().get_counter("completed") + \
+            self._async_runner.get_statistics().get_counter("completed")
+
+    def _get_outstanding_count(self):
+        executors = list(self._routing_index.values())
+        return self._worker_pool.get_pending_count() + self._worker_pool.get_running_count() + \
+            self._scheduler.get_pending_count() + self._async_runner.get_pending_count() + \
+            sum([executor.get_pending_count() for executor in executors])
 
     def get_valid_module(self, message_obj):
-        object_list = [obj for obj in self.get_objects() if isinstance(obj, BaseExecutor)]
-        for module_obj in object_list:
-            if module_obj.is_valid_module(message_obj):
-                return module_obj
-        return None
+        return self._routing_index.get((message_obj.MODULE, message_obj.message_mode), None)
 
     def _register_module_object(self, message_obj):
-        if not self._module_config:
-            self._module_config = modconfig.get_configuration()
-        module_object = self._executor_factory.generate(self.get_configuration(), message_obj)
-        module_object.set_configuration(self.get_configuration())
-        module_object.set_module_configuration(self._module_config)
-        self.add_object(module_object if module_object else None)
-        return module_object
+        with self._register_lock:
+            module_object = self.get_valid_module(message_obj)
+            if module_object:
+                return module_object
+            if not self._module_config:
+                self._module_config = modconfig.get_configuration()
+            module_object = self._executor_factory.generate(self.get_configuration(), message_obj)
+            if not module_object:
+                # replies arriving on a consumed channel are not executed
+                logging.debug("No executor serves {0} message of {1}".format(message_obj.message_mode,
+                                                                           message_obj.MODULE))
+                return None
+            module_object.set_configuration(self.get_configuration())
+            module_object.set_module_configuration(self._module_config)
+            module_object.set_worker_pool(self._worker_pool)
+            module_object.set_scheduler(self._scheduler)
+            module_object.set_async_runner(self._async_runner)
+            module_object.set_reply_manager(self._reply_manager)
+            module_object.set_dead_letter_store(self._dead_letter_store)
+            try:
+                self.add_object(module_object)
+            except Exception:
+                # generated again by the next message, which fails the same way until the configuration is fixed
+                self.remove_object(module_object)
+                raise
+            return module_object
 
 
 class MessageExecutionManager(BaseExecutionManager):
@@ -282,12 +898,47 @@ class MessageExecutionManager(BaseExecutionManager):
 
     def on_handle_message(self, obj, message):
         try:
-            message_object = MessageFactory.generate(message) if message else None
-            if (not message_object) or (not self.is_running()):
+            message_object = message if isinstance(message, AbstractMessage) else \
+                MessageFactory.generate(message) if message else None
+            if not message_object:
                 logging.error("Could not parse message correctly: {0}".format(message))
                 return
-            module_object = self.get_valid_module(message_object)
-            module_object = module_object if module_object else self._register_module_object(message_object)
-            module_object.execute_module(message_object) if module_object else None
+            if not self.is_running():
+                # left incomplete, so it is neither acknowledged to its broker nor marked done in the spool and
+                # is delivered again once the bridge runs
+                logging.warning("{0} is not running, {1} is left unacknowledged".format(
+                    self.__class__.__name__, message_object.get_module_id()))
+                return
+            # replies are published back through the transport the command arrived on
+            message_object.origin = obj
+            try:
+                self.execute_message(message_object)
+            finally:
+                # handlers submitted meanwhile hold the completion until they are done
+                message_object.release_completion()
         except Exception as ex:
             logging.exception(ex)
+
+    def execute_message(self, message_object):
+        module_object = self.get_valid_module(message_object)
+        module_object = module_object if module_object else self._register_module_object(message_object)
+        module_object.execute_module(message_object) if module_object else None
+
+    def submit(self, message_object) -> futures.Future:
+        """
+        Execute a command in process and wait for its result
+        @param message_object: MessageCommand, a correlation id is assigned when it has none
+        @return: Future resolved with the value returned by the command handler or its exception
+        """
+        if not isinstance(message_object, MessageCommand):
+            raise ValueError("Only command result could be awaited")
+        if not self.is_running():
+            raise RuntimeError("{0} is not running".format(self.__class__.__name__))
+        message_object.set_reply_to(message_object.CORRELATION_ID or str(uuid4()), message_object.REPLY_TO)
+        future = self._reply_manager.register(message_object.CORRELATION_ID)
+        try:
+            self.execute_message(message_object)
+        except Exception:
+            self._reply_manager.unregister(message_object.CORRELATION_ID)
+            raise
+        return future
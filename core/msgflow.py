@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+from threading import Condition
+
+
+class FlowController(object):
+    """
+    High and low water marks of a queue.
+
+    Intake is paused once the queue reaches the high water mark and resumed once it drains down to the low
+    water mark, producers call wait_resumed before handing over a message so the backlog stays at the broker.
+    """
+
+    def __init__(self, high_watermark=0, low_watermark=0, name=None):
+        """
+        Initialize the controller
+        @param high_watermark: queue size pausing intake, 0 never pauses
+        @param low_watermark: queue size resuming intake
+        @param name: name used in log messages
+        """
+        self._high = 0
+        self._low = 0
+        self._name = name if name else self.__class__.__name__
+        self._condition = Condition()
+        self._paused = False
+        self._held = False
+        self._pause_count = 0
+        self.set_watermarks(high_watermark, low_watermark)
+
+    def set_watermarks(self, high_watermark, low_watermark):
+        with self._condition:
+            self._high = max(0, high_watermark)
+            self._low = min(max(0, low_watermark), self._high)
+
+    def get_high_watermark(self):
+        return self._high
+
+    def get_low_watermark(self):
+        return self._low
+
+    def is_paused(self):
+        return self._paused
+
+    def get_pause_count(self):
+        return self._pause_count
+
+    def update(self, size):
+        """Report the current queue size"""
+        if self._high <= 0:
+            return
+        with self._condition:
+            if (not self._paused) and (size >= self._high):
+                self._paused = True
+                self._pause_count += 1
+                logging.warning("{0} reached {1} queued messages, pausing intake".format(self._name, size))
+            elif self._paused and (not self._held) and (size <= self._low):
+                self._paused = False
+                logging.info("{0} drained to {1} queued messages, resuming intake".format(self._name, size))
+                self._condition.notify_all()
+
+    def hold(self):
+        """Pause intake regardless of the queue size until resume is called"""
+        with self._condition:
+            self._pause_count += 0 if self._paused else 1
+            self._paused = self._held = True
+
+    def resume(self):
+        """Resume intake regardless of the queue size"""
+        with self._condition:
+            self._paused = self._held = False
+            self._condition.notify_all()
+
+    def wait_resumed(self, timeout=None):
+        """
+        Block while intake is paused
+        @param timeout: seconds to wait, None waits until resumed
+        @return: True when intake is open
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._paused, timeout)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import socket
+import struct
+from collections import deque
+
+# sent once by a client right after connecting, connections starting otherwise are read line by line
+FRAME_MAGIC = b"\x00IBF"
+# flags, frame id, payload length
+FRAME_HEADER = struct.Struct(">BII")
+FLAG_ACK_REQUESTED = 0x01
+FLAG_CONTROL = 0x02
+FLAG_ACK = 0x04
+FLAG_ERROR = 0x08
+DEFAULT_MAX_FRAME_SIZE = 16 * 1024 * 1024
+DEFAULT_MAX_LINE_SIZE = 1024 * 1024
+
+
+class FrameError(ValueError):
+    pass
+
+
+class Frame(object):
+
+    __slots__ = ("flags", "frame_id", "payload")
+
+    def __init__(self, flags, frame_id, payload):
+        self.flags = flags
+        self.frame_id = frame_id
+        self.payload = payload
+
+    def is_ack_requested(self):
+        return bool(self.flags & FLAG_ACK_REQUESTED)
+
+    def is_control(self):
+        return bool(self.flags & FLAG_CONTROL)
+
+    def is_error(self):
+        return bool(self.flags & FLAG_ERROR)
+
+
+def encode_frame(flags, frame_id, payload=b""):
+    return FRAME_HEADER.pack(flags, frame_id, len(payload)) + payload
+
+
+def encode_ack(frame_id, error=None):
+    return encode_frame(FLAG_ACK | (FLAG_ERROR if error else 0), frame_id, error.encode("utf-8") if error else b"")
+
+
+class FrameDecoder(object):
+    """
+    Incremental decoder of a local transport connection, fed with whatever the socket returned.
+
+    The first bytes decide the mode of the whole connection, FRAME_MAGIC switches to length prefixed frames,
+    anything else keeps the single line mode of older clients where every line is a message.
+    """
+
+    STATE_DETECT, STATE_LINE, STATE_HEADER, STATE_PAYLOAD = 0, 1, 2, 3
+
+    def __init__(self, max_frame_size=DEFAULT_MAX_FRAME_SIZE, max_line_size=DEFAULT_MAX_LINE_SIZE):
+        self._buffer = bytearray()
+        self._state = FrameDecoder.STATE_DETECT
+        self._header = None
+        self._max_frame_size = max_frame_size
+        self._max_line_size = max_line_size
+
+    def is_framed(self):
+        return self._state in (FrameDecoder.STATE_HEADER, FrameDecoder.STATE_PAYLOAD)
+
+    def get_buffered_size(self):
+        return len(self._buffer)
+
+    def feed(self, data):
+        """
+        Consume received bytes
+        @return: list of Frame in framed mode or list of str lines in line mode, possibly empty
+        @raise FrameError: on a frame or line exceeding the configured size
+        """
+        self._buffer.extend(data)
+        items = list()
+        while True:
+            item = self._next_item()
+            if item is None:
+                return items
+            items.append(item)
+
+    def finish(self):
+        """
+        End of stream reached
+        @return: last line not terminated by a new line in line mode, None otherwise
+        """
+        if self._state in (FrameDecoder.STATE_DETECT, FrameDecoder.STATE_LINE) and self._buffer:
+            line, self._buffer = bytes(self._buffer), bytearray()
+            return line.decode("utf-8", errors="replace")
+        return None
+
+    def _next_item(self):
+        if self._state == FrameDecoder.STATE_DETECT:
+            if (len(self._buffer) < len(FRAME_MAGIC)) and FRAME_MAGIC.startswith(bytes(self._buffer)):
+                return None
+            if self._buffer.startswith(FRAME_MAGIC):
+                del self._buffer[:len(FRAME_MAGIC)]
+                self._state = FrameDecoder.STATE_HEADER
+            else:
+                self._state = FrameDecoder.STATE_LINE
+        if self._state == FrameDecoder.STATE_LINE:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                if len(self._buffer) > self._max_line_size:
+                    raise FrameError("Line exceeds {0} bytes".format(self._max_line_size))
+                return None
+            line = bytes(self._buffer[:end + 1])
+            del self._buffer[:end + 1]
+            return line.decode("utf-8", errors="replace")
+        if self._state == FrameDecoder.STATE_HEADER:
+            if len(self._buffer) < FRAME_HEADER.size:
+                return None
+            self._header = FRAME_HEADER.unpack_from(self._buffer)
+            del self._buffer[:FRAME_HEADER.size]
+            if self._header[2] > self._max_frame_size:
+                raise FrameError("Frame {0} of {1} bytes exceeds {2} bytes".format(self._header[1], self._header[2],
+                                                                                  self._max_frame_size))
+            self._state = FrameDecoder.STATE_PAYLOAD
+        flags, frame_id, length = self._header
+        if len(self._buffer) < length:
+            return None
+        payload = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        self._state = FrameDecoder.STATE_HEADER
+        return Frame(flags, frame_id, payload)
+
+
+class FramedClient(object):
+    """
+    Persistent framed session to a local transport. Frames are pipelined, acknowledgements requested by send
+    are collected once max_unacked of them are outstanding and could be awaited with wait_acks.
+    """
+
+    def __init__(self, family, address, timeout=None, max_unacked=64):
+        """
+        Connect a session
+        @param family: socket.AF_UNIX or socket.AF_INET
+        @param address: socket file name or (host, port)
+        @param timeout: seconds a blocking send or receive may take, None blocks forever
+        @param max_unacked: acknowledgements outstanding before send waits, the server blocks once its
+        unread acknowledgements fill the socket buffer
+        """
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address)
+        self._socket.sendall(FRAME_MAGIC)
+        self._decoder = FrameDecoder()
+        self._decoder.feed(FRAME_MAGIC)
+        self._next_id = 0
+        self._unacked = deque()
+        self._max_unacked = max(1, max_unacked)
+        self._failures = list()
+        self._closed = False
+
+    def send(self, payload, ack=False, control=False):
+        """
+        Send a message
+        @param payload: encoded message, bytes or str
+        @param ack: ask the server to acknowledge once the message is queued
+        @param control: payload is a control word such as shut or reload
+        @return: frame id
+        """
+        payload = payload.encode("utf-8") if isinstance(payload, str) else payload
+        if len(self._unacked) >= self._max_unacked:
+            self._collect_acks(len(self._unacked) - self._max_unacked + 1)
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        flags = (FLAG_ACK_REQUESTED if ack else 0) | (FLAG_CONTROL if control else 0)
+        self._socket.sendall(encode_frame(flags, self._next_id, payload))
+        self._unacked.append(self._next_id) if ack else None
+        return self._next_id
+
+    def get_unacked_count(self):
+        return len(self._unacked)
+
+    def wait_acks(self):
+        """
+        Wait until every requested acknowledgement arrived
+        @return: list of (frame id, error message) of the frames the server failed to queue since the last call
+        """
+        self._collect_acks(len(self._unacked))
+        failures, self._failures = self._failures, list()
+        return failures
+
+    def _collect_acks(self, minimum):
+        received = 0
+        while (received < minimum) and self._unacked:
+            data = self._socket.recv(65536)
+            if not data:
+                raise ConnectionError("Connection closed with {0} frames unacknowledged".format(len(self._unacked)))
+            for frame in self._decoder.feed(data):
+                if not (frame.flags & FLAG_ACK):
+                    continue
+                self._unacked.remove(frame.frame_id) if frame.frame_id in self._unacked else None
+                self._failures.append((frame.frame_id, frame.payload.decode("utf-8"))) if frame.is_error() else None
+                received += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._socket.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self._socket.close()
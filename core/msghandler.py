@@ -14,9 +14,16 @@
 # This module is part of Centric PLM Integration Bridge and is released under
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
-import queue
+import functools
+import logging
 import time
 import threading
+from common import consts
+from core import msgobject
+from core.msgqueue import PriorityLaneQueue
+from core.msgflow import FlowController
+from core.msgspool import MessageSpool
+from core.msgstats import MessageStatistics
 from core.startable import Startable, StartableListener
 
 
@@ -42,38 +49,176 @@ class MessageNotifier(StartableListener):
 
 class MessageHandler(Startable):
 
-    def handle_message(self, message):
+    def handle_message(self, message, origin=None):
         valid_listeners = [listener for listener in self.get_listeners() if
                            isinstance(listener, MessageNotifier)]
         for listener in valid_listeners:
-            listener.on_message_received(self, message)
+            listener.on_message_received(origin if origin else self, message)
 
 
 class QueuePoolHandler(MessageHandler):
 
-    def __init__(self):
-        super(QueuePoolHandler, self).__init__()
+    def __init__(self, config=None):
+        super(QueuePoolHandler, self).__init__(config=config)
         self._handler = None
-        self._queue = queue.Queue()
-        self._eval_thread = threading.Thread(target=self._eval_message, daemon=True)
+        self._queue = PriorityLaneQueue(consts.DEFAULT_QUEUE_PRIORITY_AGING)
+        self._flow_controller = FlowController(name=self.__class__.__name__)
+        self._consumer_count = consts.DEFAULT_QUEUE_CONSUMER_COUNT
+        self._consumer_threads = list()
+        self._consumer_generation = 0
+        self._stats_interval = consts.DEFAULT_QUEUE_STATS_INTERVAL
+        self._statistics = MessageStatistics(self.__class__.__name__)
+        self._spool = None
+        self._outstanding = 0
+        self._outstanding_condition = threading.Condition()
 
     def register_listener(self, listener):
         listener.set_on_message_received(self.on_handle_message) if isinstance(listener, MessageNotifier) else None
 
     def on_handle_message(self, obj, message):
-        self._queue.put(message, block=True)
+        # decoded here to learn the priority, undecodable messages are passed on for the listeners to report
+        message_obj = self._decode_message(message)
+        priority = message_obj.get_priority() if message_obj else msgobject.PRIORITY_NORMAL
+        # returns once spooled so the transport acknowledges the broker only for messages surviving a crash,
+        # a spooled message is complete as far as its transport is concerned
+        sequence = self._spool.append(message_obj.encode()) if self._spool and message_obj else None
+        if sequence:
+            message_obj.finish_completion()
+            self._set_spool_completion(message_obj, sequence)
+        self._add_outstanding(1)
+        self._queue.put((time.monotonic(), obj, message_obj if message_obj else message), priority)
+        self._flow_controller.update(self._queue.qsize())
+        self._statistics.increment("enqueued")
+
+    def do_configure(self):
+        self._consumer_count = int(self._get_config_value(consts.QUEUE_CONSUMER_COUNT,
+                                                          consts.DEFAULT_QUEUE_CONSUMER_COUNT))
+        self._consumer_count = self._consumer_count if self._consumer_count > 0 \
+            else consts.DEFAULT_QUEUE_CONSUMER_COUNT
+        self._stats_interval = float(self._get_config_value(consts.QUEUE_STATS_INTERVAL,
+                                                            consts.DEFAULT_QUEUE_STATS_INTERVAL))
+        self._queue = PriorityLaneQueue(float(self._get_config_value(consts.QUEUE_PRIORITY_AGING,
+                                                                     consts.DEFAULT_QUEUE_PRIORITY_AGING)))
+        high_watermark = int(self._get_config_value(consts.QUEUE_HIGH_WATERMARK,
+                                                    consts.DEFAULT_QUEUE_HIGH_WATERMARK))
+        low_watermark = int(self._get_config_value(consts.QUEUE_LOW_WATERMARK, high_watermark // 2))
+        self._flow_controller.set_watermarks(high_watermark, low_watermark)
+        spool_enabled = str(self._get_config_value(consts.QUEUE_SPOOL_ENABLED, "false")).lower() == "true"
+        self._spool.close() if self._spool else None
+        self._spool = MessageSpool(
+            self._get_config_value(consts.QUEUE_SPOOL_PATH, consts.DEFAULT_QUEUE_SPOOL_PATH),
+            int(self._get_config_value(consts.QUEUE_SPOOL_SEGMENT_SIZE, consts.DEFAULT_QUEUE_SPOOL_SEGMENT_SIZE)),
+            str(self._get_config_value(consts.QUEUE_SPOOL_FSYNC, consts.DEFAULT_QUEUE_SPOOL_FSYNC)).lower(),
+            float(self._get_config_value(consts.QUEUE_SPOOL_FSYNC_INTERVAL,
+                                         consts.DEFAULT_QUEUE_SPOOL_FSYNC_INTERVAL))) if spool_enabled else None
+        # transports are started ahead of this pool, the spool has to be open by the time they deliver
+        self._replay_spool() if self._spool else None
 
     def do_start(self):
-        self._eval_thread.start()
+        # reopened when started again after a stop
+        self._replay_spool() if self._spool and (not self._spool.is_open()) else None
+        # consumers busy with a message at the previous stop never took their stop sentinel, and they leave
+        # once done with that message
+        self._queue.discard(None)
+        self._consumer_generation += 1
+        self._consumer_threads = [threading.Thread(target=self._eval_message, args=(self._consumer_generation,),
+                                                   daemon=True, name="QueueConsumer-{0}".format(index))
+                                  for index in range(self._consumer_count)]
+        for consumer_thread in self._consumer_threads:
+            consumer_thread.start()
+
+    def drain(self, timeout):
+        """
+        Wait for queued messages to be dispatched, the transports feeding the queue should be stopped first
+        @param timeout: seconds to wait at most
+        @return: tuple of messages dispatched meanwhile and messages left over
+        """
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._outstanding_condition:
+            queued = self._outstanding
+            while self._outstanding and (time.monotonic() < deadline):
+                self._outstanding_condition.wait(deadline - time.monotonic())
+            return max(0, queued - self._outstanding), self._outstanding
 
     def do_stop(self):
-        with self._queue.mutex:
-            self._queue.queue.clear()
-
-    def _eval_message(self):
-        while self.is_running():
-            if self._queue.empty():
-                time.sleep(1)
-            else:
-                message = self._queue.get(block=True)
-                self.handle_message(message)
+        self._queue.clear()
+        with self._outstanding_condition:
+            self._outstanding = 0
+        self._flow_controller.resume()
+        for _ in self._consumer_threads:
+            self._queue.put(None, msgobject.PRIORITY_HIGH)
+        self._consumer_threads = list()
+        # messages dropped from the queue were never completed, so they are still in the spool and replayed on
+        # the next start
+        self._spool.close() if self._spool else None
+
+    def get_statistics(self):
+        return self._statistics
+
+    def get_queue_size(self):
+        return self._queue.qsize()
+
+    def get_flow_controller(self):
+        return self._flow_controller
+
+    @staticmethod
+    def _decode_message(message):
+        if isinstance(message, msgobject.AbstractMessage):
+            return message
+        try:
+            return msgobject.MessageFactory.generate(message) if message else None
+        except Exception:
+            return None
+
+    def _replay_spool(self):
+        replayed = 0
+        for sequence, payload in self._spool.open():
+            message_obj = self._decode_message(payload)
+            if not message_obj:
+                self._spool.mark_done(sequence)
+                continue
+            self._set_spool_completion(message_obj, sequence)
+            self._add_outstanding(1)
+            self._queue.put((time.monotonic(), None, message_obj), message_obj.get_priority())
+            replayed += 1
+        self._flow_controller.update(self._queue.qsize())
+        self._statistics.increment("replayed", replayed)
+        logging.info("{0}: {1} spooled messages replayed".format(self.__class__.__name__, replayed)) \
+            if replayed else None
+
+    def _set_spool_completion(self, message_obj, sequence):
+        # marked done once every handler of the message finished, a crash meanwhile replays it
+        message_obj.set_completion(functools.partial(self._spool.mark_done, sequence))
+
+    def _add_outstanding(self, count):
+        with self._outstanding_condition:
+            # consumers still dispatching when the queue was cleared by do_stop may count below zero
+            self._outstanding = max(0, self._outstanding + count)
+            self._outstanding_condition.notify_all() if self._outstanding <= 0 else None
+
+    def _get_config_value(self, key, def_value):
+        config = self.get_configuration()
+        return config[key] if config and (key in config) and config[key] else def_value
+
+    def _eval_message(self, generation):
+        while self.is_running() and (generation == self._consumer_generation):
+            priority, item = self._queue.get()
+            if item is None:
+                break
+            self._flow_controller.update(self._queue.qsize())
+            enqueued, origin, message = item
+            latency = time.monotonic() - enqueued
+            self._statistics.record_timing("dispatch_latency", latency)
+            self._statistics.record_timing("dispatch_latency_p{0}".format(priority), latency)
+            try:
+                self.handle_message(message, origin)
+            except Exception as ex:
+                logging.error(ex)
+            finally:
+                # outstanding messages were reset by a stop meanwhile
+                self._add_outstanding(-1) if generation == self._consumer_generation else None
+                self._statistics.increment("dispatched")
+            self._statistics.set_gauge("queue_size", self._queue.qsize())
+            self._statistics.set_gauge("aged", self._queue.get_aged_count())
+            self._statistics.set_gauge("flow_pauses", self._flow_controller.get_pause_count())
+            self._statistics.log_statistics_every(self._stats_interval)
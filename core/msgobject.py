@@ -16,9 +16,16 @@
 
 import base64
 import json
+from threading import Lock
 
 MODE_COMMAND = 0
 MODE_EVENT = 1
+MODE_REPLY = 2
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
 
 
 def mq_command(f):
@@ -31,10 +38,80 @@ def mq_event(f):
     return f
 
 
+def mq_batch(f=None, max_size=100, max_wait=0.5):
+    """
+    Deliver messages of an @mq_command or @mq_event method in batches, the method receives a single list of
+    (args, kwargs) parameter sets. Could be used as @mq_batch or @mq_batch(max_size=..., max_wait=...)
+    @param f: decorated method
+    @param max_size: number of messages delivered at most in one batch
+    @param max_wait: seconds the first message of a batch waits for more messages
+    """
+    def decorate(func):
+        func.mq_batch = True
+        func.mq_batch_size = max_size
+        func.mq_batch_wait = max_wait
+        return func
+    return decorate(f) if f else decorate
+
+
 def get_module_id(mod, submod):
     return "{0}@{1}".format(mod, submod)
 
 
+def parse_priority(value):
+    """
+    Convert a priority name (high, normal, low) or number into a priority level
+    @return: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW, None when value is None
+    """
+    if value is None:
+        return None
+    level = PRIORITY_NAMES[value.lower()] if isinstance(value, str) and value.lower() in PRIORITY_NAMES \
+        else int(value)
+    return min(max(level, PRIORITY_HIGH), PRIORITY_LOW)
+
+
+def get_parameter_values(params, names):
+    """
+    Pick parameter values out of message PARAMS
+    @param params: message PARAMS in [args, kwargs] format
+    @param names: list of keyword names, a number refers to positional argument
+    @return: list of values, None for missing parameters
+    """
+    args, kwargs = params if params else ([], {})
+    return [(args[int(name)] if int(name) < len(args) else None) if name.isdigit()
+            else kwargs.get(name, None) for name in names]
+
+
+class MessageCompletion(object):
+    """
+    Count the work a message waits for and run a callback once, when all of it is done. The message itself
+    holds one count while it is dispatched.
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+        self._pending = 1
+        self._lock = Lock()
+
+    def hold(self):
+        with self._lock:
+            self._pending += 1
+
+    def release(self, *args):
+        """Release one count, could be used as Future done callback"""
+        with self._lock:
+            self._pending -= 1
+            if self._pending != 0:
+                return
+        self.finish()
+
+    def finish(self):
+        """Run the callback right away regardless of the work still pending"""
+        with self._lock:
+            callback, self._callback = self._callback, None
+        callback() if callback else None
+
+
 class BaseMessage(object):
 
     def __init__(self, msg_type=None):
@@ -53,6 +130,11 @@ class AbstractMessage(BaseMessage):
         self.MODULE = None
         self.SUBMODULE = None
         self.PARAMS = None
+        self.CORRELATION_ID = None
+        self.REPLY_TO = None
+        self.PRIORITY = None
+        self.origin = None
+        self.completion = None
         self.process_message(message)
 
     def process_message(self, message):
@@ -65,18 +147,76 @@ class AbstractMessage(BaseMessage):
         self.MODULE = message['module']
         self.SUBMODULE = message['submodule']
         self.PARAMS = message['data']
+        self.CORRELATION_ID = message.get('correlation_id', None)
+        self.REPLY_TO = message.get('reply_to', None)
+        self.PRIORITY = parse_priority(message.get('priority', None))
 
     def setup(self, message):
         self.MODULE = message['module']
         self.SUBMODULE = message['submodule']
         self.PARAMS = message['data']
+        self.CORRELATION_ID = message.get('correlation_id', None)
+        self.REPLY_TO = message.get('reply_to', None)
+        self.PRIORITY = parse_priority(message.get('priority', None))
 
     def set_parameters(self, *args, **kwargs):
         self.PARAMS = [args, kwargs]
 
+    def set_reply_to(self, correlation_id, reply_to=None):
+        """
+        Ask for the result of this message
+        @param correlation_id: identifier copied to the reply
+        @param reply_to: destination the reply is published to, None when only awaited in process
+        """
+        self.CORRELATION_ID = correlation_id
+        self.REPLY_TO = reply_to
+
+    def is_reply_expected(self):
+        return self.CORRELATION_ID is not None
+
+    def set_priority(self, priority):
+        self.PRIORITY = parse_priority(priority)
+
+    def get_priority(self):
+        return PRIORITY_NORMAL if self.PRIORITY is None else self.PRIORITY
+
     def get_module_id(self):
         return get_module_id(self.MODULE, self.SUBMODULE)
 
+    def set_completion(self, callback):
+        """
+        Run callback once every handler of this message finished, used by transports to acknowledge the broker
+        @param callback: callable without argument
+        """
+        self.completion = MessageCompletion(callback) if callback else None
+
+    def hold_completion(self):
+        self.completion.hold() if self.completion else None
+
+    def release_completion(self, *args):
+        self.completion.release() if self.completion else None
+
+    def track_completion(self, future):
+        """Wait for future before running the completion callback"""
+        if self.completion:
+            self.completion.hold()
+            future.add_done_callback(self.completion.release)
+
+    def finish_completion(self):
+        self.completion.finish() if self.completion else None
+
+    def to_dict(self):
+        adict = {'msgtype': self.message_mode,
+                 'module': self.MODULE,
+                 'submodule': self.SUBMODULE,
+                 'data': self.PARAMS}
+        if self.CORRELATION_ID is not None:
+            adict['correlation_id'] = self.CORRELATION_ID
+            adict['reply_to'] = self.REPLY_TO
+        if self.PRIORITY is not None:
+            adict['priority'] = self.PRIORITY
+        return adict
+
     def encode(self):
         return None
 
@@ -107,13 +247,13 @@ class MessageCommand(AbstractMessage):
         self.SUBMODULE = submodule
         self.COMMAND = command
 
+    def to_dict(self):
+        adict = super(MessageCommand, self).to_dict()
+        adict['command'] = self.COMMAND
+        return adict
+
     def encode_command(self):
-        adict = {'msgtype': self.message_mode,
-                 'module': self.MODULE,
-                 'submodule': self.SUBMODULE,
-                 'command': self.COMMAND,
-                 'data': self.PARAMS}
-        command_str = json.dumps(adict)
+        command_str = json.dumps(self.to_dict())
         return base64.b64encode(command_str.encode("utf-8"))
 
     def encode(self):
@@ -149,13 +289,59 @@ class MessageEvent(AbstractMessage):
         self.SUBMODULE = submodule
         self.EVENT = event
 
+    def to_dict(self):
+        adict = super(MessageEvent, self).to_dict()
+        adict['event'] = self.EVENT
+        return adict
+
     def encode_command(self):
-        adict = {'msgtype': self.message_mode,
-                 'module': self.MODULE,
-                 'submodule': self.SUBMODULE,
-                 'event': self.EVENT,
-                 'data': self.PARAMS}
-        command_str = json.dumps(adict)
+        command_str = json.dumps(self.to_dict())
+        return base64.b64encode(command_str.encode("utf-8"))
+
+    def encode(self):
+        return self.encode_command()
+
+
+class MessageReply(AbstractMessage):
+
+    def __init__(self, message=None):
+        super(MessageReply, self).__init__(msg_type=MODE_REPLY)
+        self.RESULT = None
+        self.ERROR = None
+        self.process_message(message)
+
+    def process_message(self, message):
+        if isinstance(message, bytes):
+            self.do_process(self.extract_message(message))
+        elif isinstance(message, dict):
+            self.do_process(message)
+
+    def do_process(self, message):
+        super(MessageReply, self).do_process(message)
+        self.RESULT = message.get('result', None)
+        self.ERROR = message.get('error', None)
+
+    def setup(self, message):
+        super(MessageReply, self).setup(message)
+        self.RESULT = message.get('result', None)
+        self.ERROR = message.get('error', None)
+
+    def set_reply(self, message_obj, result=None, error=None):
+        self.MODULE = message_obj.MODULE
+        self.SUBMODULE = message_obj.SUBMODULE
+        self.CORRELATION_ID = message_obj.CORRELATION_ID
+        self.RESULT = result
+        self.ERROR = error
+
+    def to_dict(self):
+        adict = super(MessageReply, self).to_dict()
+        adict['reply_to'] = None
+        adict['result'] = self.RESULT
+        adict['error'] = self.ERROR
+        return adict
+
+    def encode_command(self):
+        command_str = json.dumps(self.to_dict(), default=str)
         return base64.b64encode(command_str.encode("utf-8"))
 
     def encode(self):
@@ -166,7 +352,7 @@ class MessageFactory(BaseMessage):
 
     @classmethod
     def get_class(cls, msg_type):
-        klass_list = [MessageCommand, MessageEvent]
+        klass_list = [MessageCommand, MessageEvent, MessageReply]
         return klass_list[msg_type] if msg_type < len(klass_list) else None
 
     @classmethod
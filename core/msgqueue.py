@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import time
+from collections import deque
+from threading import Condition
+from core import msgobject
+
+
+class PriorityLaneQueue(object):
+    """
+    Unbounded queue with one FIFO lane per message priority.
+
+    The most urgent lane is served first, a waiting item gains one priority level for every aging interval
+    it spent in its lane, so low priority lanes keep moving under a constant flow of urgent messages.
+    """
+
+    def __init__(self, aging=5.0, lanes=msgobject.PRIORITY_LOW + 1):
+        """
+        Initialize the queue
+        @param aging: seconds a waiting item needs to gain one priority level, 0 for strict priority
+        @param lanes: number of priority levels, level 0 is the most urgent one
+        """
+        self._aging = aging
+        self._lanes = [deque() for _ in range(lanes)]
+        self._condition = Condition()
+        self._size = 0
+        self._aged = 0
+
+    def put(self, item, priority=msgobject.PRIORITY_NORMAL):
+        lane = min(max(int(priority), 0), len(self._lanes) - 1)
+        with self._condition:
+            self._lanes[lane].append((time.monotonic(), item))
+            self._size += 1
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Take the next item, waiting for one when the queue is empty
+        @param timeout: seconds to wait, None waits forever
+        @return: (priority, item) or None when timed out
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._size > 0, timeout):
+                return None
+            lane = self._select_lane(time.monotonic())
+            __, item = self._lanes[lane].popleft()
+            self._size -= 1
+            return lane, item
+
+    def qsize(self):
+        with self._condition:
+            return self._size
+
+    def get_lane_sizes(self):
+        with self._condition:
+            return [len(lane) for lane in self._lanes]
+
+    def get_aged_count(self):
+        """Number of items served ahead of a more urgent lane because of aging"""
+        with self._condition:
+            return self._aged
+
+    def clear(self):
+        with self._condition:
+            for lane in self._lanes:
+                lane.clear()
+            self._size = 0
+
+    def discard(self, item):
+        """
+        Remove every occurrence of an item, compared by identity
+        @return: number of items removed
+        """
+        with self._condition:
+            removed = 0
+            for index, lane in enumerate(self._lanes):
+                kept = deque([entry for entry in lane if entry[1] is not item])
+                removed += len(lane) - len(kept)
+                self._lanes[index] = kept
+            self._size -= removed
+            return removed
+
+    def _select_lane(self, now):
+        """Pick the lane whose head has the most urgent aged priority, must be called while holding the condition"""
+        selected, selected_level = None, None
+        for index, lane in enumerate(self._lanes):
+            if not lane:
+                continue
+            level = index - (int((now - lane[0][0]) / self._aging) if self._aging > 0 else 0)
+            if (selected is None) or (level < selected_level):
+                selected, selected_level = index, level
+        first = next(index for index, lane in enumerate(self._lanes) if lane)
+        self._aged += 1 if selected != first else 0
+        return selected
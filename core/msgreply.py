@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import os
+import os.path
+import socket
+import tempfile
+from concurrent.futures import Future
+from threading import Lock
+from uuid import uuid4
+from core.msgobject import MessageReply, MessageFactory
+from utils import oshelper
+
+REPLY_SCHEME_UNIX = "unix:"
+REPLY_SCHEME_TCP = "tcp:"
+
+
+def is_local_address(destination):
+    return isinstance(destination, str) and \
+        (destination.startswith(REPLY_SCHEME_UNIX) or destination.startswith(REPLY_SCHEME_TCP))
+
+
+def send_local_message(destination, payload):
+    """
+    Write a single line message to a local reply address
+    @param destination: unix:/path/to/socket or tcp:host:port
+    @param payload: encoded message
+    """
+    if destination.startswith(REPLY_SCHEME_UNIX):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = destination[len(REPLY_SCHEME_UNIX):]
+    else:
+        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        host, port = destination[len(REPLY_SCHEME_TCP):].rsplit(":", 1)
+        address = (host, int(port))
+    try:
+        client.connect(address)
+        client.sendall(payload + b"\n")
+    finally:
+        client.close()
+
+
+class ReplyManager(object):
+    """Deliver handler results of commands carrying a correlation id to in process waiters and reply destinations"""
+
+    def __init__(self):
+        self._waiters = dict()
+        self._lock = Lock()
+
+    def register(self, correlation_id) -> Future:
+        """
+        Wait in process for the result of a command
+        @param correlation_id: correlation id of the command
+        @return: Future resolved with the handler result or its exception
+        """
+        future = Future()
+        with self._lock:
+            self._waiters[correlation_id] = future
+        return future
+
+    def unregister(self, correlation_id):
+        with self._lock:
+            return self._waiters.pop(correlation_id, None)
+
+    def complete(self, message_obj, future):
+        """Done callback of the future running the handler of message_obj"""
+        result, error, exc = None, None, None
+        if future.cancelled():
+            error = "Cancelled"
+        else:
+            exc = future.exception()
+            result = future.result() if exc is None else None
+            error = "{0}: {1}".format(exc.__class__.__name__, exc) if exc is not None else None
+        waiter = self.unregister(message_obj.CORRELATION_ID)
+        if waiter and waiter.set_running_or_notify_cancel():
+            waiter.set_result(result) if error is None else waiter.set_exception(exc if exc else RuntimeError(error))
+        if message_obj.REPLY_TO:
+            reply = MessageReply()
+            reply.set_reply(message_obj, result, error)
+            self.publish(message_obj, reply)
+
+    @staticmethod
+    def publish(message_obj, reply):
+        # replied through the transport the command came from, only the local transport delivers to unix: and tcp:
+        try:
+            if message_obj.origin is not None:
+                message_obj.origin.send_message(message_obj.REPLY_TO, reply.encode())
+            else:
+                logging.error("No transport to reply {0} to {1}".format(message_obj.CORRELATION_ID,
+                                                                        message_obj.REPLY_TO))
+        except Exception as ex:
+            logging.error("Could not reply {0} to {1}: {2}".format(message_obj.CORRELATION_ID,
+                                                                   message_obj.REPLY_TO, ex))
+
+
+class ReplyListener(object):
+    """One shot local socket receiving the reply of a command sent by this process"""
+
+    def __init__(self):
+        self._path = None
+        if oshelper.is_windows():
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.bind(("127.0.0.1", 0))
+            self._address = "{0}127.0.0.1:{1}".format(REPLY_SCHEME_TCP, self._socket.getsockname()[1])
+        else:
+            self._path = os.path.join(tempfile.gettempdir(), "ibridge-reply-{0}.sock".format(uuid4().hex))
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self._path)
+            self._address = "{0}{1}".format(REPLY_SCHEME_UNIX, self._path)
+        self._socket.listen(1)
+
+    def get_address(self):
+        return self._address
+
+    def wait(self, timeout=None):
+        """
+        Wait for the reply
+        @param timeout: seconds to wait, None waits forever
+        @return: MessageReply or None when timed out
+        """
+        self._socket.settimeout(timeout)
+        try:
+            conn, __ = self._socket.accept()
+        except socket.timeout:
+            return None
+        try:
+            conn.settimeout(timeout)
+            fp = conn.makefile('rb')
+            try:
+                message = fp.readline()
+            finally:
+                fp.close()
+        finally:
+            conn.close()
+        return MessageFactory.generate(message.strip()) if message else None
+
+    def close(self):
+        self._socket.close()
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import random
+from concurrent.futures import Future
+
+
+class RetryPolicy(object):
+    """Exponential backoff with jitter between attempts of a failing handler"""
+
+    __slots__ = ("retries", "delay", "max_delay")
+
+    def __init__(self, retries=0, delay=1.0, max_delay=60.0):
+        """
+        Initialize the policy
+        @param retries: attempts made after the first one fails, 0 disables retry
+        @param delay: seconds before the first retry, doubled on every following retry
+        @param max_delay: upper bound of the delay
+        """
+        self.retries = max(0, retries)
+        self.delay = max(0.0, delay)
+        self.max_delay = max(self.delay, max_delay)
+
+    def get_delay(self, attempt):
+        # equal jitter keeps at least half of the backoff while spreading retries of a failed burst
+        backoff = min(self.max_delay, self.delay * (2 ** (attempt - 1)))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class RetryingCall(object):
+    """Submit attempts of a handler until one succeeds or the retry policy is exhausted"""
+
+    def __init__(self, submit, policy, scheduler, exhausted_func=None, statistics=None):
+        """
+        Initialize the call
+        @param submit: callable submitting one attempt and returning its Future
+        @param policy: RetryPolicy
+        @param scheduler: DelayScheduler waiting out the backoff
+        @param exhausted_func: called with the last exception and the number of attempts once every attempt failed
+        @param statistics: MessageStatistics receiving retries and exhausted counters
+        """
+        self._submit = submit
+        self._policy = policy
+        self._scheduler = scheduler
+        self._exhausted = exhausted_func
+        self._statistics = statistics
+        self._attempt = 0
+        self.future = Future()
+
+    def start(self) -> Future:
+        """
+        Submit the first attempt
+        @return: Future of the outcome of the last attempt
+        """
+        self._run_attempt()
+        return self.future
+
+    def _run_attempt(self):
+        self._attempt += 1
+        try:
+            self._submit().add_done_callback(self._on_attempt_done)
+        except Exception as ex:
+            self._on_failure(ex)
+
+    def _on_attempt_done(self, attempt_future):
+        if attempt_future.cancelled():
+            self.future.cancel()
+            return
+        exc = attempt_future.exception()
+        if exc is None:
+            self.future.set_result(attempt_future.result()) if self.future.set_running_or_notify_cancel() else None
+        else:
+            self._on_failure(exc)
+
+    def _on_failure(self, exc):
+        if (self._attempt <= self._policy.retries) and self._scheduler and self._scheduler.is_running():
+            delay = self._policy.get_delay(self._attempt)
+            logging.warning("Attempt {0} of {1} failed: {2}, retrying in {3:.1f}s".format(
+                self._attempt, self._policy.retries + 1, exc, delay))
+            self._statistics.increment("retries") if self._statistics else None
+            self._scheduler.schedule(delay, self._run_attempt)
+            return
+        self._statistics.increment("exhausted") if self._statistics else None
+        try:
+            self._exhausted(exc, self._attempt) if self._exhausted else None
+        except Exception as ex:
+            logging.error("Could not handle exhausted message: {0}".format(ex))
+        self.future.set_exception(exc) if self.future.set_running_or_notify_cancel() else None
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import bisect
+import logging
+import mmap
+import os
+import os.path
+import struct
+import zlib
+from threading import Condition, Event, Lock, Thread
+
+SPOOL_FSYNC_SYNC = "sync"
+SPOOL_FSYNC_INTERVAL = "interval"
+SPOOL_FSYNC_NONE = "none"
+
+RECORD_DATA = 1
+RECORD_DONE = 2
+# record type, payload length, sequence, crc32 of payload
+RECORD_HEADER = struct.Struct("<BIQI")
+SEGMENT_SUFFIX = ".seg"
+
+
+class SpoolSegment(object):
+    """Preallocated memory mapped file holding spool records back to back, zero filled past the last record"""
+
+    def __init__(self, path, size):
+        self.path = path
+        self._lock = Lock()
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+        self._offset = 0
+        self._flushed = 0
+
+    def has_room(self, length):
+        return self._offset + RECORD_HEADER.size + length <= self._size
+
+    def append(self, record_type, sequence, payload):
+        with self._lock:
+            RECORD_HEADER.pack_into(self._map, self._offset, record_type, len(payload), sequence,
+                                    zlib.crc32(payload))
+            start = self._offset + RECORD_HEADER.size
+            self._map[start:start + len(payload)] = payload
+            self._offset = start + len(payload)
+
+    def flush(self):
+        """Write dirty pages to disk"""
+        with self._lock:
+            if self._map.closed or (self._flushed >= self._offset):
+                return
+            start = self._flushed - (self._flushed % mmap.ALLOCATIONGRANULARITY)
+            self._map.flush(start, self._offset - start)
+            self._flushed = self._offset
+
+    def read_records(self):
+        """Iterate (record type, sequence, payload) up to the first missing or torn record"""
+        offset = 0
+        while offset + RECORD_HEADER.size <= self._size:
+            record_type, length, sequence, crc = RECORD_HEADER.unpack_from(self._map, offset)
+            start = offset + RECORD_HEADER.size
+            if (record_type not in (RECORD_DATA, RECORD_DONE)) or (start + length > self._size):
+                break
+            payload = bytes(self._map[start:start + length])
+            if zlib.crc32(payload) != crc:
+                logging.warning("{0}: torn record at offset {1}, ignoring the rest".format(self.path, offset))
+                break
+            yield record_type, sequence, payload
+            offset = start + length
+        self._offset = self._flushed = offset
+
+    def close(self):
+        with self._lock:
+            if not self._map.closed:
+                self._map.flush()
+                self._map.close()
+            self._file.close()
+
+
+class MessageSpool(object):
+    """
+    Append only write ahead spool of queued messages split into fixed size segments.
+
+    A message is appended before it is queued and marked done once it is processed, messages not marked done
+    are returned by open after a restart. Under the sync policy appenders wait until their record reached the
+    disk, a single flusher thread syncs every record appended meanwhile at once (group commit).
+    """
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, fsync_policy=SPOOL_FSYNC_SYNC,
+                 fsync_interval=1.0):
+        """
+        Initialize the spool
+        @param directory: directory holding the segment files
+        @param segment_size: bytes preallocated for every segment file
+        @param fsync_policy: sync waits for the disk, interval syncs every fsync_interval seconds, none leaves it to OS
+        @param fsync_interval: seconds between two syncs of the interval policy
+        """
+        self._directory = directory
+        self._segment_size = segment_size
+        self._policy = fsync_policy
+        self._interval = fsync_interval
+        self._condition = Condition()
+        self._segments = list()
+        self._first_sequences = list()
+        self._active = None
+        self._segment_number = 0
+        self._sequence = 0
+        self._written = 0
+        self._durable = 0
+        self._flushes = 0
+        self._closing = False
+        self._stop_event = Event()
+        self._flusher = None
+
+    def open(self):
+        """
+        Open the spool, recovering segments left by a previous run
+        @return: list of (sequence, payload) appended but never marked done, in append order
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        self._segments, self._first_sequences = list(), list()
+        self._segment_number = self._sequence = 0
+        pending = dict()
+        names = sorted([name for name in os.listdir(self._directory) if name.endswith(SEGMENT_SUFFIX)])
+        for name in names:
+            path = os.path.join(self._directory, name)
+            self._segment_number = int(name[:-len(SEGMENT_SUFFIX)])
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+                continue
+            segment = SpoolSegment(path, 0)
+            try:
+                sequences = list()
+                for record_type, sequence, payload in segment.read_records():
+                    if record_type == RECORD_DATA:
+                        pending[sequence] = payload
+                        sequences.append(sequence)
+                    else:
+                        pending.pop(sequence, None)
+                    self._sequence = max(self._sequence, sequence)
+            finally:
+                segment.close()
+            # recovered segments are only kept on disk until every message they hold is done
+            self._segments.append([None, path, set(sequences)])
+            self._first_sequences.append(min(sequences) if sequences else self._sequence + 1)
+        for entry in self._segments:
+            entry[2].intersection_update(pending.keys())
+        self._written = self._durable = self._sequence
+        self._roll()
+        self._retire_segments()
+        if self._policy != SPOOL_FSYNC_NONE:
+            self._closing = False
+            self._stop_event.clear()
+            self._flusher = Thread(target=self._flush_loop, daemon=True, name="SpoolFlusher")
+            self._flusher.start()
+        logging.info("{0} opened with {1} messages to replay".format(self._directory, len(pending)))
+        return sorted(pending.items())
+
+    def is_open(self):
+        return self._active is not None
+
+    def append(self, payload):
+        """
+        Spool a message
+        @return: sequence of the message, durable on return under the sync policy
+        """
+        with self._condition:
+            if self._active is None:
+                raise RuntimeError("{0} is not open".format(self._directory))
+            self._sequence += 1
+            sequence = self._sequence
+            self._write(RECORD_DATA, sequence, payload)
+            self._segments[-1][2].add(sequence)
+            self._written = sequence
+            self._condition.notify_all()
+            if self._policy == SPOOL_FSYNC_SYNC:
+                self._condition.wait_for(lambda: (self._durable >= sequence) or self._closing)
+        return sequence
+
+    def mark_done(self, sequence):
+        """Forget a processed message, it is no longer replayed after a restart"""
+        with self._condition:
+            if self._active is None:
+                return
+            index = bisect.bisect_right(self._first_sequences, sequence) - 1
+            while (index >= 0) and (sequence not in self._segments[index][2]):
+                index -= 1
+            if index < 0:
+                return
+            self._segments[index][2].discard(sequence)
+            self._write(RECORD_DONE, sequence, b"")
+            self._retire_segments()
+
+    def close(self):
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._stop_event.set()
+        self._flusher.join() if self._flusher else None
+        with self._condition:
+            for entry in self._segments:
+                entry[0].close() if entry[0] else None
+                entry[0] = None
+            self._active = None
+
+    def get_statistics(self):
+        with self._condition:
+            return {"segments": len(self._segments), "written": self._written, "durable": self._durable,
+                    "flushes": self._flushes, "pending": sum([len(entry[2]) for entry in self._segments])}
+
+    def _write(self, record_type, sequence, payload):
+        """Append a record to the active segment, rolling over when full, must be called while holding condition"""
+        if not self._active.has_room(len(payload)):
+            self._roll(len(payload))
+        self._active.append(record_type, sequence, payload)
+
+    def _roll(self, length=0):
+        previous = self._active
+        self._segment_number += 1
+        path = os.path.join(self._directory, "{0:012d}{1}".format(self._segment_number, SEGMENT_SUFFIX))
+        self._active = SpoolSegment(path, max(self._segment_size, RECORD_HEADER.size * 2 + length))
+        self._segments.append([self._active, path, set()])
+        # lower bound of the sequences in the segment, mark_done searches backwards from there
+        self._first_sequences.append(self._sequence)
+        self._sync_directory()
+        if previous:
+            previous.flush()
+            previous.close()
+            self._segments[-2][0] = None
+
+    def _retire_segments(self):
+        # segments go in order, a DONE record may live in a later segment than the message it refers to
+        while (len(self._segments) > 1) and (not self._segments[0][2]):
+            segment, path, __ = self._segments.pop(0)
+            self._first_sequences.pop(0)
+            segment.close() if segment else None
+            try:
+                os.remove(path)
+            except OSError as ex:
+                logging.warning("Could not remove spool segment {0}: {1}".format(path, ex))
+
+    def _sync_directory(self):
+        try:
+            fd = os.open(self._directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: (self._written > self._durable) or self._closing)
+                if self._closing and (self._written <= self._durable):
+                    return
+                target, segment = self._written, self._active
+            segment.flush() if segment else None
+            with self._condition:
+                self._durable = max(self._durable, target)
+                self._flushes += 1
+                self._condition.notify_all()
+            if self._policy == SPOOL_FSYNC_INTERVAL:
+                self._stop_event.wait(self._interval)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import time
+from threading import Lock
+
+
+class MessageStatistics(object):
+    """Thread safe counters, gauges and timings collected by bridge components"""
+
+    def __init__(self, name=None):
+        self._name = name
+        self._lock = Lock()
+        self._counters = dict()
+        self._gauges = dict()
+        self._timings = dict()
+        self._logged = time.monotonic()
+
+    def get_name(self):
+        return self._name
+
+    def increment(self, key, value=1):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            return self._counters[key]
+
+    def decrement(self, key, value=1):
+        return self.increment(key, -value)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def set_gauge(self, key, value):
+        with self._lock:
+            self._gauges[key] = value
+
+    def track_max(self, key, value):
+        with self._lock:
+            current = self._gauges.get(key, None)
+            self._gauges[key] = value if (current is None) or (value > current) else current
+
+    def get_gauge(self, key):
+        with self._lock:
+            return self._gauges.get(key, None)
+
+    def record_timing(self, key, elapsed):
+        """
+        Record elapsed time (in seconds) of a measured operation
+        @param key: name of the measured operation
+        @param elapsed: elapsed time in seconds
+        """
+        with self._lock:
+            timing = self._timings.get(key, None)
+            if timing is None:
+                timing = [0, 0.0, elapsed, elapsed]
+                self._timings[key] = timing
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] = elapsed if elapsed < timing[2] else timing[2]
+            timing[3] = elapsed if elapsed > timing[3] else timing[3]
+
+    def get_timing(self, key):
+        with self._lock:
+            timing = self._timings.get(key, None)
+            if timing is None:
+                return None
+            count, total, minimum, maximum = timing
+            return {"count": count, "avg": total / count if count else 0.0, "min": minimum, "max": maximum}
+
+    def reset_timings(self):
+        with self._lock:
+            self._timings.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Take a copy of all collected values
+        @return: dictionary of counters, gauges and timings
+        """
+        with self._lock:
+            timings = dict()
+            for key, (count, total, minimum, maximum) in self._timings.items():
+                timings[key] = {"count": count, "avg": total / count if count else 0.0,
+                                "min": minimum, "max": maximum}
+            return {"counters": dict(self._counters),
+                    "gauges": dict(self._gauges),
+                    "timings": timings}
+
+    def log_statistics_every(self, interval, level=logging.INFO):
+        """Log statistics if the last report is older than interval seconds"""
+        if interval <= 0:
+            return
+        current_time = time.monotonic()
+        with self._lock:
+            if (current_time - self._logged) < interval:
+                return
+            self._logged = current_time
+        self.log_statistics(level)
+
+    def log_statistics(self, level=logging.INFO):
+        snapshot = self.snapshot()
+        items = ["{0}={1}".format(key, value) for key, value in snapshot["counters"].items()]
+        items += ["{0}={1}".format(key, value) for key, value in snapshot["gauges"].items()]
+        items += ["{0}=[n={1} avg={2:.3f}ms min={3:.3f}ms max={4:.3f}ms]".format(
+            key, value["count"], value["avg"] * 1000.0, value["min"] * 1000.0, value["max"] * 1000.0)
+            for key, value in snapshot["timings"].items()]
+        logging.log(level, "{0} statistics: {1}".format(self._name, ", ".join(items)))
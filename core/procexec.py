@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import inspect
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from common import consts
+from core import msgobject
+from core.objfactory import AbstractFactory
+
+# ---- state below lives in the worker processes, processors are imported and configured once per process
+_worker_config = None
+_worker_module_config = None
+_worker_processors = dict()
+
+
+class _ProcessorParent(object):
+    pass
+
+
+def _initialize_worker(config, module_config, script_path, log_level):
+    global _worker_config, _worker_module_config
+    consts.DEFAULT_SCRIPT_PATH = script_path
+    logging.basicConfig(level=log_level)
+    _worker_config = config
+    _worker_module_config = module_config
+
+
+def _get_processor(class_name):
+    processor = _worker_processors.get(class_name, None)
+    if processor is None:
+        processor = AbstractFactory.create_instance(AbstractFactory.import_klass(class_name))
+        processor.set_configuration(_worker_config)
+        processor.set_module_configuration(_worker_module_config)
+        processor.set_parent(_ProcessorParent())
+        processor.configure()
+        _worker_processors[class_name] = processor
+    return processor
+
+
+def execute_message(class_name, func, message_dict):
+    """Execute a decoded command or event message on a worker process"""
+    message_obj = msgobject.MessageFactory.generate(message_dict)
+    processor = _get_processor(class_name)
+    if isinstance(message_obj, msgobject.MessageEvent):
+        return processor.perform_notify(func, message_obj)
+    return processor.perform_exec(message_obj)
+
+
+def execute_batch(class_name, func, mq_type, message_dicts):
+    """Execute a batch of decoded messages on a worker process"""
+    messages = [msgobject.MessageFactory.generate(message_dict) for message_dict in message_dicts]
+    return _get_processor(class_name).perform_batch(func, messages, mq_type)
+
+
+def get_class_name(klass):
+    return "{0}.{1}".format(klass.__module__, klass.__name__)
+
+
+def get_module_dict(module_config):
+    """modules.properties content as plain dictionaries, which cross the process boundary"""
+    return dict([(section, dict(module_config.items(section))) for section in module_config.sections()]) \
+        if module_config else dict()
+
+
+def get_unsupported_options(module, dispatch_table, module_config):
+    """
+    Options and handlers of a module which worker processes could not honour
+    @param module: module name, EXECUTOR option of its section selects worker processes
+    @param dispatch_table: DispatchTable the module is served from
+    @param module_config: modules.properties content
+    @return: list of error messages, empty when the module runs on threads
+    """
+    section = module_config[module] if module_config and module in module_config else dict()
+    if str(section.get(consts.MODULE_EXECUTOR, consts.EXECUTOR_MODE_THREAD)).lower() != consts.EXECUTOR_MODE_PROCESS:
+        return []
+    errors = []
+    prefix = "{0}@".format(module)
+    # lanes and handler deadlines are kept by bridge threads, worker processes run a message as soon as it is sent
+    for module_id in [name for name in module_config.sections() if name.startswith(prefix)]:
+        options = [option.upper() for option in module_config.options(module_id)]
+        errors += ["{0} option {1} is not supported by worker processes".format(module_id, option)
+                   for option in options if option in (consts.MODULE_PARTITION_KEY, consts.MODULE_TIMEOUT) or
+                   option.endswith(".{0}".format(consts.MODULE_TIMEOUT))]
+    # a coroutine returned by a worker process could not be pickled back, let alone awaited
+    commands = dispatch_table.get_commands() if dispatch_table else dict()
+    for module_id, klass in [(module_id, klass) for module_id, klass in commands.items()
+                             if module_id.startswith(prefix)]:
+        errors += ["{0} command {1}.{2} is async def, which worker processes could not run".format(
+            module_id, klass.__name__, name) for name, __ in inspect.getmembers(klass, inspect.iscoroutinefunction)]
+    events = dispatch_table.get_events() if dispatch_table else dict()
+    for (module_id, event), handlers in [item for item in events.items() if item[0][0].startswith(prefix)]:
+        errors += ["{0} handler {1} of {2} is async def, which worker processes could not run".format(
+            module_id, handler, event) for handler in handlers
+            if inspect.iscoroutinefunction(getattr(handler.klass, handler.func, None))]
+    return errors
+
+
+def create_process_pool(workers, config, module_config):
+    """
+    Create a pool of reusable worker processes
+    @param workers: number of worker processes
+    @param config: bridge configuration dictionary
+    @param module_config: modules.properties content
+    @return: ProcessPoolExecutor
+    """
+    module_dict = get_module_dict(module_config)
+    # spawn keeps worker processes away from locks held by bridge threads at fork time
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_initialize_worker,
+                               initargs=(dict(config) if config else dict(), module_dict,
+                                         consts.DEFAULT_SCRIPT_PATH, logging.getLogger().level))
@@ -55,12 +55,24 @@ class BaseCommandProcessor(Configurable):
             return queue_func(*_args, **_kwargs)
         return None
 
+    def _perform_mq_batch(self, func, messages, mq_type):
+        error_type = 1 if func in [None, ''] else 0
+        queue_func = getattr(self, func, None) if error_type == 0 else None
+        if (error_type == 0) and (queue_func is not None) and self._is_mq_method(func, queue_func, mq_type) \
+                and getattr(queue_func, 'mq_batch', False):
+            logging.debug("executing batch {0} of {1} messages".format(func, len(messages)))
+            return queue_func([(message.PARAMS[0], message.PARAMS[1]) for message in messages])
+        return None
+
     def perform_exec(self, command):
         return self._perform_mq_exec(command)
 
     def perform_notify(self, func, event):
         return self._perform_mq_notify(func, event)
 
+    def perform_batch(self, func, messages, mq_type=msgobject.MODE_COMMAND):
+        return self._perform_mq_batch(func, messages, mq_type)
+
     def set_parent(self, parent):
         self._parent = parent
 
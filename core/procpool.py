@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import time
+from collections import deque
+from threading import Lock
+
+
+class ProcessorPool(object):
+    """
+    Keep configured processor instances of a single class for reuse.
+
+    An instance is handed to exactly one thread between borrow and release, processors therefore do not
+    need to be thread safe, but must not keep per message state between two calls.
+    """
+
+    def __init__(self, klass, factory, max_size=4, idle_timeout=300):
+        """
+        Initialize the pool
+        @param klass: processor class kept by this pool
+        @param factory: callable creating a new configured instance of klass
+        @param max_size: maximum number of idle instances kept for reuse
+        @param idle_timeout: seconds an idle instance is kept before being evicted, 0 to keep forever
+        """
+        self._klass = klass
+        self._factory = factory
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._idle = deque()
+        self._lock = Lock()
+        self._created = 0
+        self._reused = 0
+        self._evicted = 0
+
+    def get_klass(self):
+        return self._klass
+
+    def borrow(self):
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            if self._idle:
+                self._reused += 1
+                instance, __ = self._idle.pop()
+                return instance
+            self._created += 1
+        return self._factory(self._klass)
+
+    def release(self, instance):
+        if instance is None:
+            return
+        with self._lock:
+            if len(self._idle) < self._max_size:
+                self._idle.append((instance, time.monotonic()))
+            else:
+                self._evicted += 1
+
+    def discard(self, instance):
+        """Drop a borrowed instance which is no longer usable instead of returning it to the pool"""
+        with self._lock:
+            self._evicted += 1 if instance is not None else 0
+
+    def clear(self):
+        with self._lock:
+            self._evicted += len(self._idle)
+            self._idle.clear()
+
+    def get_idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def get_statistics(self):
+        with self._lock:
+            return {"created": self._created, "reused": self._reused,
+                    "evicted": self._evicted, "idle": len(self._idle)}
+
+    def _evict_idle(self, current_time):
+        if self._idle_timeout <= 0:
+            return
+        while self._idle and ((current_time - self._idle[0][1]) > self._idle_timeout):
+            self._idle.popleft()
+            self._evicted += 1
+            logging.debug("ProcessorPool: evicting idle instance of {0}".format(self._klass.__name__))
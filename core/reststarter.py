@@ -40,10 +40,13 @@ class RESTServerStarter(BaseAppServer):
         if self.is_production_mode() and oshelper.is_linux():
             pid_file = consts.DEFAULT_SCRIPT_PATH + '/data/temp/irest.pid'
             os.makedirs(os.path.dirname(pid_file), exist_ok=True)
+            config = self.get_configuration()
+            workers = config[consts.RESTAPI_WORKERS] if config and consts.RESTAPI_WORKERS in config \
+                and config[consts.RESTAPI_WORKERS] else consts.DEFAULT_RESTAPI_WORKERS
             run_args = [
                 consts.DEFAULT_SCRIPT_PATH + '/' +
                 'websvcsvr',
-                '-w', '4',
+                '-w', str(int(workers)),
                 '-k', 'uvicorn.workers.UvicornWorker',
                 '-b', '0.0.0.0:8000',
                 '-n', 'centric-rest-ibridge',
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import heapq
+import itertools
+import logging
+import time
+import traceback
+from threading import Condition, Thread
+from core.startable import Startable
+
+
+class ScheduledTask(object):
+
+    __slots__ = ("deadline", "func", "args", "cancelled")
+
+    def __init__(self, deadline, func, args):
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DelayScheduler(Startable):
+    """Run short callbacks after a delay on a single timer thread, callbacks must not block"""
+
+    def __init__(self, config=None):
+        super(DelayScheduler, self).__init__(config=config)
+        self._condition = Condition()
+        self._tasks = list()
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def do_start(self):
+        self._thread = Thread(target=self._run, daemon=True, name=self.__class__.__name__)
+        self._thread.start()
+
+    def do_stop(self):
+        with self._condition:
+            self._tasks = list()
+            self._condition.notify_all()
+
+    def schedule(self, delay, func, *args) -> ScheduledTask:
+        """
+        Run func(*args) after delay seconds
+        @return: ScheduledTask which could be cancelled
+        """
+        task = ScheduledTask(time.monotonic() + max(0.0, delay), func, args)
+        with self._condition:
+            heapq.heappush(self._tasks, (task.deadline, next(self._sequence), task))
+            self._condition.notify()
+        return task
+
+    def run_pending(self):
+        """Run every scheduled task right away regardless of its deadline"""
+        with self._condition:
+            tasks = [task for __, __, task in sorted(self._tasks)]
+            self._tasks = list()
+        for task in tasks:
+            self._execute(task)
+
+    def get_pending_count(self):
+        with self._condition:
+            return len(self._tasks)
+
+    def _run(self):
+        while self.is_running():
+            with self._condition:
+                task = None
+                while self.is_running() and (task is None):
+                    timeout = (self._tasks[0][0] - time.monotonic()) if self._tasks else None
+                    if (timeout is not None) and (timeout <= 0):
+                        task = heapq.heappop(self._tasks)[2]
+                    else:
+                        self._condition.wait(timeout)
+            self._execute(task) if task else None
+
+    @staticmethod
+    def _execute(task):
+        if task.cancelled:
+            return
+        try:
+            task.func(*task.args)
+        except Exception:
+            logging.error(traceback.format_exc())
@@ -34,6 +34,11 @@ class ShutdownHookMonitor(Startable):
         self.shutdown_thread = None
         self.shutdown_addr = None
         self.shutdown_port = None
+        self._report = list()
+
+    def add_report(self, line):
+        """Add a line to the report sent back to the client which requested the shutdown"""
+        self._report.append(line)
 
     def send_shutdown_signal(self):
         config = self.get_configuration()
@@ -42,13 +47,18 @@ class ShutdownHookMonitor(Startable):
         self.shutdown_port = config[consts.SHUTDOWN_PORT] if config and consts.SHUTDOWN_PORT in config \
             else consts.DEFAULT_SHUTDOWN_PORT
         self.shutdown_port = int(self.shutdown_port) if isinstance(self.shutdown_port, str) else self.shutdown_port
+        drain_timeout = float(config[consts.SHUTDOWN_DRAIN_TIMEOUT]) \
+            if config and consts.SHUTDOWN_DRAIN_TIMEOUT in config else consts.DEFAULT_SHUTDOWN_DRAIN_TIMEOUT
         client = socket(AF_INET, SOCK_STREAM)
         client.connect((self.shutdown_addr, self.shutdown_port))
         try:
-            fd = client.makefile(mode="w")
+            fd = client.makefile(mode="rw")
             try:
                 fd.write("shut\n")
                 fd.flush()
+                # the server answers with its drain report once stopped
+                client.settimeout(drain_timeout + 30)
+                return fd.read().strip()
             finally:
                 fd.close()
         finally:
@@ -78,6 +88,7 @@ class ShutdownHookMonitor(Startable):
 
     def listen(self):
         should_terminate = False
+        requester = None
         self.socket.bind((self.shutdown_addr, self.shutdown_port))
         self.socket.setblocking(False)
         self.socket.listen(1)
@@ -93,19 +104,33 @@ class ShutdownHookMonitor(Startable):
                         self.selector.register(conn, selectors.EVENT_READ)
                     else:
                         try:
+                            self.selector.unregister(event_socket)
+                            event_socket.setblocking(True)
                             fp = event_socket.makefile('r', buffering=1024)
                             message = fp.readline()
                             fp.close()
                             should_terminate = isinstance(message, str) and (message.strip().lower() == 'shut')
+                            requester = event_socket if should_terminate else None
                         finally:
-                            event_socket.close()
+                            event_socket.close() if requester is not event_socket else None
             except Exception as ex:
                 logging.error(ex)
             finally:
                 try:
+                    self._report = list() if should_terminate else self._report
                     self.stop() if should_terminate else None
                 except:
                     pass
+                self._send_report(requester) if requester else None
+                requester = None
+
+    def _send_report(self, requester):
+        try:
+            requester.sendall("{0}\n".format("\n".join(self._report)).encode("utf-8")) if self._report else None
+        except Exception as ex:
+            logging.error("Could not send shutdown report: {0}".format(ex))
+        finally:
+            requester.close()
 
     @classmethod
     def get_default_instance(cls):
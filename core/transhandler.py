@@ -21,6 +21,10 @@ from common import consts
 from core.msghandler import MessageNotifier, MessageHandler
 
 
+class IntakeStoppedError(RuntimeError):
+    pass
+
+
 class TransportMessageNotifier(MessageNotifier):
     pass
 
@@ -37,10 +41,51 @@ class TransportHandler(MessageHandler):
         self._transport_password = None
         self._transport_channel = None
         self._transport_client_id = None
+        self._flow_controller = None
+
+    def set_flow_controller(self, flow_controller):
+        """Make handle_message wait while the queue fed by this transport is above its high water mark"""
+        self._flow_controller = flow_controller
+
+    def get_flow_controller(self):
+        return self._flow_controller
+
+    def is_intake_paused(self):
+        return bool(self._flow_controller and self._flow_controller.is_paused())
+
+    def handle_message(self, message, origin=None):
+        """
+        Queue a received message, waiting while intake is paused
+        @raise IntakeStoppedError: when the transport stopped while waiting, the message is not queued and should
+        not be acknowledged so its broker delivers it again
+        """
+        if not self.wait_intake_resumed():
+            raise IntakeStoppedError("{0} stopped while intake was paused, message left unacknowledged".format(
+                self.__class__.__name__))
+        super(TransportHandler, self).handle_message(message, origin)
+
+    def wait_intake_resumed(self):
+        """
+        Block while intake is paused, transports which stop reading while paused need not to block here
+        @return: False when the transport stopped while waiting
+        """
+        # blocking here keeps the broker from delivering more, the message is acknowledged after it is queued
+        while self._flow_controller and (not self._flow_controller.wait_resumed(1)):
+            if not self.is_running():
+                return False
+        return True
 
     def do_listen(self):
         pass
 
+    def send_message(self, destination, payload):
+        """
+        Publish a message on this transport
+        @param destination: channel, topic or queue name understood by the transport
+        @param payload: encoded message
+        """
+        pass
+
     def do_configure(self):
         self._transport_address = self._get_config_value(consts.MQ_TRANSPORT_ADDR, "127.0.0.1")
         self._transport_port = self._get_config_value(consts.MQ_TRANSPORT_PORT, None)
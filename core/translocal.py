@@ -14,24 +14,275 @@
 # This module is part of Centric PLM Integration Bridge and is released under
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
-from core.transhandler import TransportHandler
-from threading import RLock
+import asyncio
+import logging
+import socket
+from common import consts
+from concurrent.futures import ThreadPoolExecutor
+from core.msgframe import FrameDecoder, FramedClient, encode_ack
+from core.msgreply import send_local_message, is_local_address
+from core.transhandler import TransportHandler, IntakeStoppedError
+from threading import RLock, Thread
+
+
+class ControlFailedError(RuntimeError):
+    pass
 
 
 class LocalTransportHandler(TransportHandler):
+    """
+    Base of the transports listening on a local socket, served by an asyncio event loop on the transport thread.
+    A connection either sends single lines and closes, as older clients do, or opens with the frame magic and
+    keeps sending length prefixed frames, see core.msgframe.
+    """
 
     VM_DEFAULT = None
     SINGLETON_LOCK = RLock()
 
     def __init__(self, config=None, transport_index=0):
         super(LocalTransportHandler, self).__init__(config=config, transport_index=transport_index)
+        self._control_handlers = dict()
+        self._client = None
+        self._client_lock = RLock()
+        self._loop = None
+        self._stop_event = None
+        self._executor = None
+        self._connections = set()
+        self._shut_requested = False
+        self._workers = consts.DEFAULT_LOCAL_TRANSPORT_WORKERS
+        self._max_connections = consts.DEFAULT_LOCAL_TRANSPORT_MAX_CONNECTIONS
+        self._idle_timeout = consts.DEFAULT_LOCAL_TRANSPORT_IDLE_TIMEOUT
+        self._buffer_size = consts.DEFAULT_LOCAL_TRANSPORT_BUFFER_SIZE
 
-    def notify_server(self, message_obj):
+    def get_socket_family(self):
+        """Address family of the local socket, socket.AF_UNIX or socket.AF_INET"""
         pass
 
-    def send_shutdown_signal(self):
+    def get_socket_address(self):
+        """Socket file name or (host, port) the bridge listens on"""
         pass
 
+    def create_server_socket(self):
+        """Create the listening socket bound to get_socket_address"""
+        pass
+
+    def connect(self, timeout=None, max_unacked=64) -> FramedClient:
+        """Open a framed session to the local transport of the running bridge"""
+        return FramedClient(self.get_socket_family(), self.get_socket_address(), timeout, max_unacked)
+
+    def notify_server(self, message_obj):
+        """
+        Send a message to the running bridge and wait until it is queued
+        @raise RuntimeError: when the bridge could not queue the message
+        """
+        # one session is kept for every message notified by this process, waiting for the acknowledgement
+        # tells a session the bridge closed meanwhile, whose message was lost, from a queued message
+        with self._client_lock:
+            payload = message_obj.encode()
+            reused = self._client is not None
+            try:
+                self._client = self._client if self._client else self.connect(consts.DEFAULT_BULK_TIMEOUT)
+                failures = self._send_acknowledged(payload)
+            except ConnectionError:
+                # a broken pipe, a reset or a session closed while idle, nothing was queued so it is sent once
+                # more, a timed out session may still queue the message so it is not
+                if not reused:
+                    raise
+                self._client = self.connect(consts.DEFAULT_BULK_TIMEOUT)
+                failures = self._send_acknowledged(payload)
+            if failures:
+                raise RuntimeError("Bridge could not queue the message: {0}".format(failures[0][1]))
+
+    def _send_acknowledged(self, payload):
+        try:
+            self._client.send(payload, ack=True)
+            return self._client.wait_acks()
+        except Exception:
+            self._close_client()
+            raise
+
+    def send_shutdown_signal(self):
+        self.send_control("shut")
+
+    def send_control(self, command, wait=False):
+        """
+        Send a control word to the running bridge
+        @param wait: wait until the bridge ran the control handler
+        @raise ControlFailedError: when the control handler waited for failed
+        """
+        client = self.connect(consts.DEFAULT_BULK_TIMEOUT if wait else None)
+        try:
+            client.send(command, ack=wait, control=True)
+            failures = client.wait_acks()
+        finally:
+            client.close()
+        if failures:
+            raise ControlFailedError(failures[0][1])
+
+    def register_control(self, command, func):
+        """
+        Run func when a single word control line is received
+        @param command: control word, case insensitive
+        @param func: callable without argument, run on its own thread so it does not hold the transport unless the
+        sender waits for it, returning False tells a waiting sender the control failed
+        """
+        self._control_handlers[command.lower()] = func
+
+    def handle_control(self, message, wait=False):
+        """
+        Dispatch a control line to its registered handler
+        @param wait: run the handler on the calling thread
+        @return: True when message is a control line, False for regular messages
+        @raise ControlFailedError: when the handler waited for returned False
+        """
+        command = message.strip().lower() if isinstance(message, str) else None
+        func = self._control_handlers.get(command, None) if command else None
+        if not func:
+            return False
+        logging.info("{0} received {1} control".format(self.__class__.__name__, command))
+        if not wait:
+            Thread(target=func, daemon=True, name="Control-{0}".format(command)).start()
+        elif func() is False:
+            raise ControlFailedError("{0} control failed, see the bridge log".format(command))
+        return True
+
+    def send_message(self, destination, payload):
+        if not is_local_address(destination):
+            raise ValueError("{0} is not a local reply address".format(destination))
+        send_local_message(destination, payload)
+
+    def do_configure(self):
+        super(LocalTransportHandler, self).do_configure()
+        self._workers = int(self._get_config_value(consts.LOCAL_TRANSPORT_WORKERS,
+                                                   consts.DEFAULT_LOCAL_TRANSPORT_WORKERS))
+        self._max_connections = int(self._get_config_value(consts.LOCAL_TRANSPORT_MAX_CONNECTIONS,
+                                                           consts.DEFAULT_LOCAL_TRANSPORT_MAX_CONNECTIONS))
+        self._idle_timeout = float(self._get_config_value(consts.LOCAL_TRANSPORT_IDLE_TIMEOUT,
+                                                          consts.DEFAULT_LOCAL_TRANSPORT_IDLE_TIMEOUT))
+        self._buffer_size = int(self._get_config_value(consts.LOCAL_TRANSPORT_BUFFER_SIZE,
+                                                       consts.DEFAULT_LOCAL_TRANSPORT_BUFFER_SIZE))
+
+    def do_stop(self):
+        loop, stop_event = self._loop, self._stop_event
+        loop.call_soon_threadsafe(stop_event.set) if loop and stop_event and (not loop.is_closed()) else None
+        self._close_client()
+
+    def get_connection_count(self):
+        return len(self._connections)
+
+    def do_listen(self):
+        # the event loop only moves bytes, messages are handed to the queue on executor threads since
+        # handle_message blocks while the queue is above its high water mark
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, self._workers),
+                                            thread_name_prefix=self.__class__.__name__)
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+            self._executor.shutdown(wait=False)
+            self._loop = None
+        self.stop() if self._shut_requested else None
+
+    async def _serve(self):
+        self._stop_event = asyncio.Event()
+        self._shut_requested = False
+        server_socket = self.create_server_socket()
+        server = await asyncio.start_server(self._serve_connection, sock=server_socket, limit=self._buffer_size,
+                                            backlog=socket.SOMAXCONN)
+        try:
+            # stop may have been requested before the event existed
+            while self.is_running() and (not self._stop_event.is_set()):
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), 2)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+
+    async def _serve_connection(self, reader, writer):
+        task = asyncio.current_task()
+        if len(self._connections) >= self._max_connections:
+            logging.warning("{0}: refusing connection, {1} connections open".format(self.__class__.__name__,
+                                                                                    len(self._connections)))
+            writer.close()
+            return
+        self._connections.add(task)
+        decoder = FrameDecoder()
+        try:
+            while not self._stop_event.is_set():
+                data = await asyncio.wait_for(reader.read(self._buffer_size),
+                                              self._idle_timeout if self._idle_timeout > 0 else None)
+                items = decoder.feed(data) if data else list()
+                remainder = decoder.finish() if not data else None
+                items.append(remainder) if remainder else None
+                # nothing more is read from this connection until its messages are queued, which bounds its buffer
+                acks = await self._loop.run_in_executor(self._executor, self._handle_items, items) if items else None
+                if acks:
+                    writer.write(acks)
+                    await writer.drain()
+                if (not data) or self._shut_requested:
+                    break
+        except asyncio.TimeoutError:
+            logging.debug("{0}: closing idle connection".format(self.__class__.__name__))
+        except asyncio.CancelledError:
+            pass
+        except Exception as ex:
+            logging.error("{0}: closing connection, {1}".format(self.__class__.__name__, ex))
+        finally:
+            self._connections.discard(task)
+            writer.close()
+        if self._shut_requested:
+            self._stop_event.set()
+
+    def _handle_items(self, items):
+        """
+        Queue lines and frames received at once on a connection, runs on an executor thread
+        @return: acknowledgements to write back
+        """
+        acks = bytearray()
+        stopped = None
+        for item in items:
+            if isinstance(item, str):
+                self._shut_requested = self._handle_line(item) or self._shut_requested
+                continue
+            error = None
+            try:
+                if item.is_control():
+                    # a sender asking for the acknowledgement of a control waits for its outcome
+                    self._shut_requested = self._handle_line(item.payload.decode("utf-8"), item.is_ack_requested()) \
+                        or self._shut_requested
+                elif stopped:
+                    # the frames following one refused by a stopped transport are refused without waiting again
+                    raise stopped
+                else:
+                    self.handle_message(item.payload)
+            except IntakeStoppedError as ex:
+                stopped = ex
+                error = "{0}: {1}".format(ex.__class__.__name__, ex)
+            except Exception as ex:
+                error = "{0}: {1}".format(ex.__class__.__name__, ex)
+                logging.error(error)
+            # a failed acknowledgement tells the client the frame was not queued, so it could be sent again
+            acks.extend(encode_ack(item.frame_id, error)) if item.is_ack_requested() else None
+        logging.warning(stopped) if stopped else None
+        return bytes(acks)
+
+    def _handle_line(self, message, wait=False):
+        if message.strip().lower() == "shut":
+            return True
+        self.handle_message(message) if not self.handle_control(message, wait) else None
+        return False
+
+    def _close_client(self):
+        with self._client_lock:
+            self._client.close() if self._client else None
+            self._client = None
+
     @classmethod
     def get_default_instance(cls):
         cls.SINGLETON_LOCK.acquire(blocking=True)
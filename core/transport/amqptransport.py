@@ -16,9 +16,10 @@
 
 import amqp
 import logging
-from common import consts
-from core.transhandler import TransportHandler
-import time
+import select
+import socket
+import threading
+from core.transhandler import TransportHandler, IntakeStoppedError
 
 
 class AmqpTransport(TransportHandler):
@@ -27,6 +28,8 @@ class AmqpTransport(TransportHandler):
         self.amqp_config = None
         self.host = None
         self.client = None
+        # the connection is shared by the consuming transport thread and the worker threads publishing replies
+        self.client_lock = threading.Lock()
 
     def do_configure(self):
         super(AmqpTransport, self).do_configure()
@@ -35,18 +38,44 @@ class AmqpTransport(TransportHandler):
     def doConnect(self):
         with amqp.Connection(host=self.host, userid=self.get_transport_user(),
                              password=self.get_transport_password()) as self.amqp_config:
+            deliveries = list()
             self.client = self.amqp_config.channel()
-            self.client.basic_consume(queue=self.get_transport_channel(), callback=self.handle_message)
+            self.client.basic_consume(queue=self.get_transport_channel(), callback=deliveries.append)
+            while self.is_running():
+                # wait for data without the lock, publishers may use the connection meanwhile
+                readable, __, __ = select.select([self.amqp_config.sock], [], [], 1)
+                if not readable:
+                    continue
+                with self.client_lock:
+                    try:
+                        self.amqp_config.drain_events(timeout=0.1)
+                    except socket.timeout:
+                        pass
+                # handed over once the lock is released since handle_message blocks while intake is paused,
+                # acknowledged after it is queued
+                while deliveries:
+                    message = deliveries.pop(0)
+                    try:
+                        self.handle_message(message.body)
+                    except IntakeStoppedError as ex:
+                        # closing the connection leaves this delivery and the following ones unacknowledged,
+                        # the broker delivers them again
+                        logging.warning(ex)
+                        return
+                    with self.client_lock:
+                        self.client.basic_ack(message.delivery_tag)
+
+    def send_message(self, destination, payload):
+        if self.client is None:
+            raise ConnectionError("{0} is not connected".format(self.host))
+        with self.client_lock:
+            self.client.basic_publish(amqp.Message(payload), routing_key=destination)
 
     def do_listen(self):
         try:
-            try:
-                while self.is_running():
-                    self.doConnect()
-                self.client.close()
-            except Exception as ex:
-                logging.error(ex)
-                self.client.close()
-                raise
+            self.doConnect()
+        except Exception as ex:
+            logging.error(ex)
+            raise
         finally:
-            self.amqp_config.close()
+            self.client = None
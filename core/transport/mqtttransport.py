@@ -15,8 +15,9 @@
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
 import logging
-from uuid import uuid4
-from paho.mqtt import client
+import socket
+from paho.mqtt import client as mqtt
+from common import consts
 from core.transhandler import TransportHandler
 
 
@@ -26,14 +27,41 @@ class MqttTransport(TransportHandler):
         super(MqttTransport, self).__init__(config=config, transport_index=transport_index)
         self.client = None
         self.subscribed = False
+        self._qos = consts.DEFAULT_MQTT_QOS
+        self._max_inflight = consts.DEFAULT_MQTT_MAX_INFLIGHT
+        self._group = None
 
     def do_configure(self):
         super(MqttTransport, self).do_configure()
-        self.set_transport_client_id(str(uuid4()))
+        # the broker keeps the session of a client id while it is disconnected, so the id has to stay the same
+        # between connections and restarts
+        client_id = self.get_transport_client_id()
+        self.set_transport_client_id(client_id if client_id else "ibridge-{0}-{1}".format(socket.gethostname(),
+                                                                                          self.get_transport_index()))
+        self._qos = min(max(int(self._get_config_value(consts.MQ_TRANSPORT_QOS, consts.DEFAULT_MQTT_QOS)), 0), 2)
+        self._max_inflight = int(self._get_config_value(consts.MQ_TRANSPORT_MAX_INFLIGHT,
+                                                        consts.DEFAULT_MQTT_MAX_INFLIGHT))
+        self._group = self._get_config_value(consts.MQ_TRANSPORT_GROUP, None)
+
+    def get_subscription_topic(self):
+        """Channel topic, shared by every bridge of the same group when a group is configured"""
+        channel = self.get_transport_channel()
+        return "$share/{0}/{1}".format(self._group, channel) if self._group else channel
 
     def on_message(self, client, usrdata, msg):
-        if msg:
-            self.handle_message(bytes(msg.payload.decode(), 'utf-8'))
+        # the payload is already bytes, the queue decodes it
+        if msg and msg.payload:
+            self.handle_message(msg.payload)
+
+    def wait_intake_resumed(self):
+        # paho sends PUBACK and PUBREC before on_message runs, so a message read is queued right away whatever
+        # happens meanwhile; do_listen stops reading while paused instead
+        return True
+
+    def send_message(self, destination, payload):
+        if self.client is None:
+            raise ConnectionError("{0} is not connected".format(self.get_transport_address()))
+        self.client.publish(destination, payload, qos=self._qos)
 
     def on_subscribe(self, client, obj, mid, granted_qos):
         self.subscribed = True
@@ -43,19 +71,44 @@ class MqttTransport(TransportHandler):
         self.subscribed = False
 
     def on_connect(self, client, obj, flags, rc):
+        if rc != 0:
+            logging.error("Could not connect to mqtt broker: {0}".format(mqtt.connack_string(rc)))
+            return
         logging.info("Connected to mqtt broker")
+        # the session kept by the broker holds the subscription already, subscribing again covers a broker
+        # which lost it
         if not self.subscribed:
-            self.client.subscribe(self.get_transport_channel())
+            self.client.subscribe(self.get_subscription_topic(), qos=self._qos)
 
     def do_listen(self):
-        logging.info("Subscribing {} on {}".format(self.get_transport_address(), self.get_transport_channel()))
-        self.client = client.Client(self.get_transport_client_id())
+        # connecting while paused would have the broker deliver the messages it kept meanwhile right away
+        while self.is_intake_paused() and self.is_running():
+            self.get_flow_controller().wait_resumed(1)
+        if not self.is_running():
+            return
+        logging.info("Subscribing {} on {}".format(self.get_transport_address(), self.get_subscription_topic()))
+        # persistent session, subscription and QoS 1 and 2 messages are kept by the broker while disconnected
+        self.client = mqtt.Client(self.get_transport_client_id(), clean_session=False)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.client.on_subscribe = self.on_subscribe
         self.client.on_disconnect = self.on_disconnect
+        self.client.max_inflight_messages_set(self._max_inflight) if self._max_inflight > 0 else None
         self.client.connect(self.get_transport_address(), int(self.get_transport_port()))
-        self.client.subscribe(self.get_transport_channel())
-
-        while self.is_running():
-            self.client.loop_start()
+        try:
+            # single network loop on the transport thread, waits on the socket for at most a second
+            while self.is_running():
+                if self.is_intake_paused():
+                    # nothing is read while paused so the broker keeps the messages. PINGRESP is not read either,
+                    # a pause longer than the keep alive drops the connection, which is made again once resumed
+                    # and the persistent session delivers what the broker kept meanwhile
+                    self.get_flow_controller().wait_resumed(1)
+                    rc = self.client.loop_misc()
+                    rc = self.client.loop_write() if rc == mqtt.MQTT_ERR_SUCCESS else rc
+                else:
+                    rc = self.client.loop(timeout=1.0)
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    raise ConnectionError("Connection to mqtt broker lost: {0}".format(mqtt.error_string(rc)))
+        finally:
+            self.client.disconnect()
+            self.subscribed = False
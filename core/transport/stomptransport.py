@@ -15,24 +15,91 @@
 # the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
 
 from core.transhandler import TransportHandler
+from core.msgobject import MessageFactory
 from stompest.config import StompConfig
 from stompest.protocol.spec import StompSpec
 from stompest.sync import Stomp
+from collections import OrderedDict
 from common import consts
+import functools
 import logging
+import threading
 import time
 
 
+class StompAckTracker(object):
+    """
+    Acknowledge frames of one connection once their messages completed. Cumulative acknowledgements go out in
+    receive order, a single ACK covers every completed frame received before the first one still in progress.
+    """
+
+    def __init__(self, ack_func, cumulative=True):
+        self._ack_func = ack_func
+        self._cumulative = cumulative
+        self._frames = OrderedDict()
+        self._sequence = 0
+        self._acks = 0
+        self._lock = threading.Lock()
+
+    def add(self, frame):
+        with self._lock:
+            self._sequence += 1
+            self._frames[self._sequence] = [frame, False]
+            return self._sequence
+
+    def complete(self, sequence):
+        # sent while holding the lock so acknowledgements never overtake each other
+        with self._lock:
+            entry = self._frames.get(sequence, None)
+            if entry is None:
+                return
+            entry[1] = True
+            if not self._cumulative:
+                self._frames.pop(sequence)
+                self._send_ack(entry[0])
+                return
+            last_frame = None
+            while self._frames and next(iter(self._frames.values()))[1]:
+                last_frame = self._frames.popitem(last=False)[1][0]
+            self._send_ack(last_frame) if last_frame else None
+
+    def get_pending_count(self):
+        with self._lock:
+            return len(self._frames)
+
+    def get_ack_count(self):
+        return self._acks
+
+    def close(self):
+        """Drop frames still in progress, the broker redelivers them to the next connection"""
+        with self._lock:
+            self._frames.clear()
+            self._ack_func = None
+
+    def _send_ack(self, frame):
+        try:
+            self._ack_func(frame) if self._ack_func else None
+            self._acks += 1
+        except Exception as ex:
+            logging.error("Could not acknowledge frame: {0}".format(ex))
+
+
 class StompTransport(TransportHandler):
 
     def __init__(self, config=None, transport_index=0):
         super(StompTransport, self).__init__(config=config, transport_index=transport_index)
         self._stomp_config = None
         self._client_heartbeat = None
+        self._prefetch = consts.DEFAULT_MQ_PREFETCH
+        self._ack_mode = consts.MQ_ACK_CUMULATIVE
+        self._client = None
+        self._client_lock = threading.Lock()
 
     def do_configure(self):
         super(StompTransport, self).do_configure()
         self._client_heartbeat = self._get_config_value(consts.MQ_CLIENT_HEARTBEAT, 20000)
+        self._prefetch = int(self._get_config_value(consts.MQ_TRANSPORT_PREFETCH, consts.DEFAULT_MQ_PREFETCH))
+        self._ack_mode = str(self._get_config_value(consts.MQ_TRANSPORT_ACK_MODE, consts.MQ_ACK_CUMULATIVE)).lower()
         self._stomp_config = StompConfig("tcp://{0}:{1}".format(self.get_transport_address(),
                                                                 self.get_transport_port()),
                                          login=self.get_transport_user(),
@@ -45,30 +112,88 @@ class StompTransport(TransportHandler):
         client.connect(versions=[StompSpec.VERSION_1_2], heartBeats=(self.get_client_heartbeat(),
                                                                      self.get_client_heartbeat()))
         client_heartbeat = client.clientHeartBeat / 1000.0
-        token = client.subscribe(self.get_transport_channel(), {StompSpec.ACK_HEADER: StompSpec.ACK_CLIENT_INDIVIDUAL,
-                                                                StompSpec.ID_HEADER: self.get_transport_client_id()})
+        server_heartbeat = client.serverHeartBeat / 1000.0
+        cumulative = self._ack_mode != consts.MQ_ACK_INDIVIDUAL
+        tracker = StompAckTracker(functools.partial(self._ack, client), cumulative)
+        self._client = client
+        token = client.subscribe(self.get_transport_channel(), self.get_subscribe_headers(cumulative))
         try:
             try:
                 while self.is_running():
-                    if client.canRead(2):
-                        frame = client.receiveFrame()
-                        cmd_str = frame.body
-                        client.ack(frame)
-                        if cmd_str is not None:
-                            self.handle_message(cmd_str)
-                        else:
-                            logging.info("Message is Empty, bypassing")
-                    else:
-                        time.sleep(0.4)
-                    if (time.time() - client.lastSent) > client_heartbeat:
-                        client.beat()
+                    # block until a frame arrives or our next heart beat is due, never longer than a second
+                    # so stopping is noticed
+                    timeout = (client.lastSent + client_heartbeat - time.time()) if client_heartbeat else 1
+                    timeout = min(max(timeout, 0), 1)
+                    paused = self.is_intake_paused()
+                    if paused:
+                        # unread frames stay with the broker while paused, heart beating goes on
+                        self.get_flow_controller().wait_resumed(timeout)
+                    elif client.canRead(timeout):
+                        self._receive_frame(client.receiveFrame(), tracker)
+                    if client_heartbeat and ((time.time() - client.lastSent) >= client_heartbeat):
+                        with self._client_lock:
+                            client.beat()
+                    # server heart beats are not read while paused either, they are waiting on the socket and
+                    # counted once reading resumes
+                    if server_heartbeat and (not paused) and \
+                            ((time.time() - client.lastReceived) > server_heartbeat * 2):
+                        raise ConnectionError("No heart beat from {0} within {1}s".format(
+                            self.get_transport_address(), server_heartbeat * 2))
                 client.unsubscribe(token)
             except Exception as ex:
                 logging.error(ex)
                 client.unsubscribe(token)
                 raise
         finally:
+            tracker.close()
+            self._client = None
             client.disconnect()
 
+    def get_subscribe_headers(self, cumulative=True):
+        headers = {StompSpec.ACK_HEADER: StompSpec.ACK_CLIENT if cumulative else StompSpec.ACK_CLIENT_INDIVIDUAL,
+                   StompSpec.ID_HEADER: self.get_transport_client_id()}
+        if self._prefetch > 0:
+            # unacknowledged frames the broker sends ahead, header names of ActiveMQ and RabbitMQ
+            headers["activemq.prefetchSize"] = str(self._prefetch)
+            headers["prefetch-count"] = str(self._prefetch)
+        return headers
+
+    def _receive_frame(self, frame, tracker):
+        if frame.command == StompSpec.ERROR:
+            raise ConnectionError("{0} reported {1}".format(self.get_transport_address(),
+                                                            frame.headers.get("message", frame.body)))
+        if frame.command != StompSpec.MESSAGE:
+            return
+        sequence = tracker.add(frame)
+        message_obj = None
+        try:
+            message_obj = MessageFactory.generate(frame.body) if frame.body else None
+        except Exception as ex:
+            logging.error("Could not parse message correctly: {0}".format(ex))
+        if message_obj is None:
+            # redelivering would not make it any better
+            logging.info("Message is Empty, bypassing") if not frame.body else None
+            tracker.complete(sequence)
+            return
+        # acknowledged once every handler of the message finished, or once it is spooled
+        message_obj.set_completion(functools.partial(tracker.complete, sequence))
+        self.handle_message(message_obj)
+
+    def wait_intake_resumed(self):
+        # do_listen stops reading while paused, blocking a frame already read would hold back heart beats and
+        # the acknowledgements of messages completed meanwhile
+        return True
+
+    def _ack(self, client, frame):
+        with self._client_lock:
+            client.ack(frame)
+
+    def send_message(self, destination, payload):
+        client = self._client
+        if client is None:
+            raise ConnectionError("{0} is not connected".format(self.get_transport_address()))
+        with self._client_lock:
+            client.send(destination, body=payload)
+
     def get_client_heartbeat(self):
         return self._client_heartbeat
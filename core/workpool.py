@@ -0,0 +1,498 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import sys
+import time
+import traceback
+import zlib
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread, Lock, Event, current_thread, get_ident
+from common import consts
+from core import msgobject
+from core.msgstats import MessageStatistics
+from core.startable import Startable
+
+
+class WorkItem(object):
+
+    __slots__ = ("module", "func", "args", "kwargs", "future", "submitted", "timeout", "deadline")
+
+    def __init__(self, module, func, args, kwargs, timeout=0):
+        self.module = module
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.timeout = timeout
+        self.deadline = None
+
+    def run(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        self.deadline = (time.monotonic() + self.timeout) if self.timeout > 0 else None
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except BaseException as exc:
+            self._set_outcome(exc=exc)
+        else:
+            self._set_outcome(result=result)
+
+    def expire(self):
+        """Fail the future of an item running past its deadline, the function itself keeps running"""
+        self._set_outcome(exc=TimeoutError("{0} of {1} exceeded {2}s".format(self.get_name(), self.module,
+                                                                             self.timeout)))
+
+    def get_name(self):
+        return getattr(self.func, "__qualname__", repr(self.func))
+
+    def _set_outcome(self, result=None, exc=None):
+        # the watchdog may already have expired the future
+        if self.future.done():
+            return
+        try:
+            self.future.set_result(result) if exc is None else self.future.set_exception(exc)
+        except Exception:
+            pass
+
+
+class ModuleQuota(object):
+
+    __slots__ = ("min_workers", "max_workers", "running", "pending")
+
+    def __init__(self, min_workers=0, max_workers=0):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.running = 0
+        self.pending = deque()
+
+
+class WorkerPool(Startable):
+    """
+    Process wide bounded thread pool shared by every executor.
+
+    Work is queued per module, idle workers serve modules running below their minimum quota first,
+    then every other module in round robin order as long as it is below its maximum quota.
+
+    Work submitted with a timeout is watched, once it runs past its deadline its future fails with
+    TimeoutError and the worker stuck on it is replaced, so the pool keeps its capacity.
+
+    The pool grows toward its maximum size while work waits longer than the scale wait time for a worker,
+    and shrinks toward its minimum size when workers stay idle longer than the scale idle time.
+    """
+
+    def __init__(self, config=None):
+        super(WorkerPool, self).__init__(config=config)
+        self._workers = consts.DEFAULT_EXECUTOR_WORKERS_MIN
+        self._min_workers = consts.DEFAULT_EXECUTOR_WORKERS_MIN
+        self._max_workers = consts.DEFAULT_EXECUTOR_WORKERS
+        self._scale_wait = consts.DEFAULT_EXECUTOR_SCALE_WAIT
+        self._scale_idle = consts.DEFAULT_EXECUTOR_SCALE_IDLE
+        self._idle_since = dict()
+        self._retire_count = 0
+        self._window_wait = 0.0
+        self._window_count = 0
+        self._threads = list()
+        self._condition = Condition()
+        self._quotas = dict()
+        self._ready_modules = deque()
+        self._stopping = False
+        self._worker_index = 0
+        self._running = dict()
+        self._abandoned = set()
+        self._missing_workers = 0
+        self._watchdog_interval = consts.DEFAULT_WATCHDOG_INTERVAL
+        self._watchdog_event = Event()
+        self._stats_interval = consts.DEFAULT_EXECUTOR_STATS_INTERVAL
+        self._statistics = MessageStatistics(self.__class__.__name__)
+
+    def do_configure(self):
+        config = self.get_configuration()
+        # a fixed executor.workers keeps the pool size constant unless min or max is given as well
+        workers = config[consts.EXECUTOR_WORKERS] if config and consts.EXECUTOR_WORKERS in config else None
+        workers = int(workers) if workers and int(workers) > 0 else None
+        max_workers = config[consts.EXECUTOR_WORKERS_MAX] if config and consts.EXECUTOR_WORKERS_MAX in config \
+            else None
+        min_workers = config[consts.EXECUTOR_WORKERS_MIN] if config and consts.EXECUTOR_WORKERS_MIN in config \
+            else None
+        self._max_workers = int(max_workers) if max_workers else workers if workers \
+            else consts.DEFAULT_EXECUTOR_WORKERS
+        self._max_workers = self._max_workers if self._max_workers > 0 else consts.DEFAULT_EXECUTOR_WORKERS
+        self._min_workers = int(min_workers) if min_workers else workers if workers \
+            else consts.DEFAULT_EXECUTOR_WORKERS_MIN
+        self._min_workers = min(max(1, self._min_workers), self._max_workers)
+        self._workers = self._min_workers
+        self._scale_wait = float(config[consts.EXECUTOR_SCALE_WAIT]) \
+            if config and consts.EXECUTOR_SCALE_WAIT in config else consts.DEFAULT_EXECUTOR_SCALE_WAIT
+        self._scale_idle = float(config[consts.EXECUTOR_SCALE_IDLE]) \
+            if config and consts.EXECUTOR_SCALE_IDLE in config else consts.DEFAULT_EXECUTOR_SCALE_IDLE
+        self._stats_interval = float(config[consts.EXECUTOR_STATS_INTERVAL]) \
+            if config and consts.EXECUTOR_STATS_INTERVAL in config else consts.DEFAULT_EXECUTOR_STATS_INTERVAL
+        self._watchdog_interval = float(config[consts.EXECUTOR_WATCHDOG_INTERVAL]) \
+            if config and consts.EXECUTOR_WATCHDOG_INTERVAL in config else consts.DEFAULT_WATCHDOG_INTERVAL
+
+    def do_start(self):
+        with self._condition:
+            self._stopping = False
+            self._workers = self._min_workers
+            self._retire_count = 0
+            self._threads = [self._create_worker() for _ in range(self._workers)]
+        self._statistics.set_gauge("workers", self._workers)
+        self._watchdog_event.clear()
+        Thread(target=self._watch, daemon=True, name="WorkerWatchdog").start()
+        logging.info("{0} started with {1} workers, scaling between {2} and {3}".format(
+            self.__class__.__name__, self._workers, self._min_workers, self._max_workers))
+
+    def do_stop(self):
+        with self._condition:
+            self._stopping = True
+            for quota in self._quotas.values():
+                while quota.pending:
+                    quota.pending.popleft().future.cancel()
+            self._ready_modules.clear()
+            self._condition.notify_all()
+            self._threads = list()
+        self._watchdog_event.set()
+        self._statistics.log_statistics()
+
+    def get_worker_count(self):
+        return self._workers
+
+    def get_min_workers(self):
+        return self._min_workers
+
+    def get_max_workers(self):
+        return self._max_workers
+
+    def get_statistics(self):
+        return self._statistics
+
+    def set_module_quota(self, module, min_workers=0, max_workers=0):
+        """
+        Define how many workers a module could occupy
+        @param module: module name
+        @param min_workers: workers the module is served first up to, 0 for none
+        @param max_workers: maximum workers occupied by the module at once, 0 for the whole pool
+        """
+        with self._condition:
+            quota = self._get_quota(module)
+            quota.min_workers = max(0, min_workers)
+            quota.max_workers = max(0, max_workers)
+            self._condition.notify_all()
+
+    def submit(self, module, func, *args, **kwargs) -> Future:
+        """
+        Queue a function to be run by the pool on behalf of a module
+        @return: Future of the function result
+        """
+        return self.submit_timed(module, 0, func, *args, **kwargs)
+
+    def submit_timed(self, module, timeout, func, *args, **kwargs) -> Future:
+        """
+        Queue a function to be run by the pool on behalf of a module within timeout seconds
+        @return: Future of the function result, failed with TimeoutError once the function runs past timeout
+        """
+        item = WorkItem(module, func, args, kwargs, timeout)
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("{0} is not running".format(self.__class__.__name__))
+            quota = self._get_quota(module)
+            quota.pending.append(item)
+            if len(quota.pending) == 1:
+                self._ready_modules.append(module)
+            self._condition.notify()
+        self._statistics.increment("submitted")
+        return item.future
+
+    def get_pending_count(self):
+        with self._condition:
+            return sum([len(quota.pending) for quota in self._quotas.values()])
+
+    def get_running_count(self):
+        with self._condition:
+            return sum([quota.running for quota in self._quotas.values()])
+
+    def get_abandoned_count(self):
+        with self._condition:
+            return len(self._abandoned)
+
+    def run_item(self, item):
+        """Run a work item on the calling worker thread while the watchdog keeps an eye on its deadline"""
+        ident = get_ident()
+        with self._condition:
+            previous = self._running.get(ident, None)
+            self._running[ident] = item
+        try:
+            item.run()
+        finally:
+            with self._condition:
+                if previous:
+                    self._running[ident] = previous
+                else:
+                    self._running.pop(ident, None)
+
+    def check_deadlines(self):
+        """Expire work running past its deadline and replace the workers stuck on it"""
+        now = time.monotonic()
+        with self._condition:
+            expired = [(ident, item) for ident, item in self._running.items()
+                       if (item.deadline is not None) and (now > item.deadline) and (ident not in self._abandoned)]
+            for ident, item in expired:
+                # the stuck thread no longer counts against the module quota nor the pool size
+                self._abandoned.add(ident)
+                self._quotas[item.module].running -= 1
+                if (not self._stopping) and (len(self._abandoned) <= self._max_workers):
+                    self._threads.append(self._create_worker())
+                else:
+                    # keep the thread count bounded, the next stuck worker returning takes over instead
+                    self._missing_workers += 1
+                    logging.error("{0} has {1} stuck workers, no more workers are added".format(
+                        self.__class__.__name__, len(self._abandoned)))
+            self._condition.notify_all() if expired else None
+            abandoned = len(self._abandoned)
+        frames = sys._current_frames() if expired else dict()
+        for ident, item in expired:
+            item.expire()
+            self._statistics.increment("stuck_workers")
+            stack = "".join(traceback.format_stack(frames[ident])) if ident in frames else ""
+            logging.error("{0} of {1} running for {2:.1f}s, {3:.1f}s past its {4}s timeout, replacing worker\n"
+                          "{5}".format(item.get_name(), item.module, now - item.deadline + item.timeout,
+                                       now - item.deadline, item.timeout, stack))
+        self._statistics.set_gauge("abandoned_workers", abandoned)
+
+    def autoscale(self):
+        """Grow the pool while work waits too long for a worker, shrink it while workers stay idle"""
+        if self._min_workers >= self._max_workers:
+            return
+        now = time.monotonic()
+        with self._condition:
+            if self._stopping:
+                return
+            average_wait = (self._window_wait / self._window_count) if self._window_count else 0.0
+            self._window_wait, self._window_count = 0.0, 0
+            # work held back by a module quota would not be served sooner by more workers
+            oldest_wait = max([now - quota.pending[0].submitted for quota in self._quotas.values()
+                               if quota.pending and self._has_capacity(quota)] or [0.0])
+            queue_wait = max(average_wait, oldest_wait)
+            previous = self._workers
+            if (queue_wait > self._scale_wait) and (self._workers < self._max_workers):
+                grow = min(self._max_workers - self._workers, max(1, self._workers // 2))
+                self._workers += grow
+                self._threads.extend([self._create_worker() for _ in range(grow)])
+            elif (oldest_wait == 0) and (self._workers > self._min_workers):
+                idle = len([since for since in self._idle_since.values() if (now - since) > self._scale_idle])
+                shrink = min(idle - self._retire_count, self._workers - self._min_workers)
+                if shrink > 0:
+                    self._workers -= shrink
+                    self._retire_count += shrink
+                    self._condition.notify_all()
+            workers = self._workers
+        self._statistics.set_gauge("workers", workers)
+        self._statistics.set_gauge("scale_queue_wait", round(queue_wait, 3))
+        if workers != previous:
+            self._statistics.increment("scale_ups" if workers > previous else "scale_downs")
+            logging.info("{0} scaled {1} from {2} to {3} workers, queue wait {4:.3f}s".format(
+                self.__class__.__name__, "up" if workers > previous else "down", previous, workers, queue_wait))
+
+    def _watch(self):
+        while not self._watchdog_event.wait(self._watchdog_interval):
+            try:
+                self.check_deadlines()
+                self.autoscale()
+            except Exception:
+                logging.error(traceback.format_exc())
+
+    def _get_quota(self, module):
+        quota = self._quotas.get(module, None)
+        if quota is None:
+            quota = ModuleQuota()
+            self._quotas[module] = quota
+        return quota
+
+    def _has_capacity(self, quota):
+        max_workers = quota.max_workers if quota.max_workers > 0 else self._max_workers
+        return quota.running < max_workers
+
+    def _next_item(self):
+        """Pick the next work item, must be called while holding the condition"""
+        if not self._ready_modules:
+            return None
+        selected = None
+        for module in self._ready_modules:
+            quota = self._quotas[module]
+            if quota.running < quota.min_workers:
+                selected = module
+                break
+        if selected is None:
+            for module in self._ready_modules:
+                if self._has_capacity(self._quotas[module]):
+                    selected = module
+                    break
+        if selected is None:
+            return None
+        quota = self._quotas[selected]
+        item = quota.pending.popleft()
+        quota.running += 1
+        self._ready_modules.remove(selected)
+        self._ready_modules.append(selected) if quota.pending else None
+        return item
+
+    def _create_worker(self):
+        """Start a new worker thread, must be called while holding the condition"""
+        worker = Thread(target=self._work, daemon=True, name="Worker-{0}".format(self._worker_index))
+        self._worker_index += 1
+        worker.start()
+        return worker
+
+    def _work(self):
+        while True:
+            with self._condition:
+                item = self._next_item()
+                if item is None:
+                    self._idle_since[get_ident()] = time.monotonic()
+                while (item is None) and (not self._stopping) and (self._retire_count == 0):
+                    self._condition.wait()
+                    item = self._next_item()
+                self._idle_since.pop(get_ident(), None)
+                if item is None:
+                    if self._retire_count > 0:
+                        self._retire_count -= 1
+                        self._threads.remove(current_thread()) if current_thread() in self._threads else None
+                    return
+                queue_wait = time.monotonic() - item.submitted
+                self._window_wait += queue_wait
+                self._window_count += 1
+            self._statistics.record_timing("queue_wait", queue_wait)
+            try:
+                self.run_item(item)
+            except Exception:
+                logging.error(traceback.format_exc())
+            finally:
+                with self._condition:
+                    retired = get_ident() in self._abandoned
+                    quota = self._quotas[item.module]
+                    if retired:
+                        self._abandoned.discard(get_ident())
+                        retired = self._missing_workers == 0
+                        self._missing_workers -= 0 if retired else 1
+                        self._threads.remove(current_thread()) if retired and (current_thread() in self._threads) \
+                            else None
+                    else:
+                        quota.running -= 1
+                    if quota.pending and (item.module not in self._ready_modules):
+                        self._ready_modules.append(item.module)
+                    self._condition.notify()
+                self._statistics.increment("completed")
+                self._statistics.log_statistics_every(self._stats_interval)
+            if retired:
+                logging.warning("{0} returned from {1} of {2} after being replaced, retiring".format(
+                    current_thread().name, item.get_name(), item.module))
+                return
+
+
+class SerialLane(object):
+    """Run submitted work one at a time, in submission order, on behalf of a module of the worker pool"""
+
+    def __init__(self, worker_pool, module):
+        self._worker_pool = worker_pool
+        self._module = module
+        self._pending = deque()
+        self._lock = Lock()
+        self._active = False
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        return self.submit_timed(0, func, *args, **kwargs)
+
+    def submit_timed(self, timeout, func, *args, **kwargs) -> Future:
+        item = WorkItem(self._module, func, args, kwargs, timeout)
+        with self._lock:
+            self._pending.append(item)
+            if self._active:
+                return item.future
+            self._active = True
+        self._schedule()
+        return item.future
+
+    def get_pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _schedule(self):
+        try:
+            self._worker_pool.submit(self._module, self._run_next)
+        except Exception as ex:
+            with self._lock:
+                pending = list(self._pending)
+                self._pending.clear()
+                self._active = False
+            for item in pending:
+                item.future.set_exception(ex) if item.future.set_running_or_notify_cancel() else None
+
+    def _run_next(self):
+        with self._lock:
+            item = self._pending.popleft()
+        # the lane moves on once the item completed or expired, an expired item stuck on its worker no longer
+        # holds back the work queued behind it but may still be running alongside it
+        item.future.add_done_callback(self._on_item_done)
+        self._worker_pool.run_item(item)
+
+    def _on_item_done(self, future):
+        with self._lock:
+            self._active = len(self._pending) > 0
+            should_schedule = self._active
+        self._schedule() if should_schedule else None
+
+
+class PartitionedLanes(object):
+    """
+    Spread work over a fixed number of serial lanes by a partition key.
+
+    Work sharing the same key always lands on the same lane and therefore runs in submission order,
+    work with different keys runs in parallel as far as the worker pool allows.
+    """
+
+    def __init__(self, worker_pool, module, key_names, lane_count):
+        """
+        Initialize the lanes
+        @param worker_pool: shared WorkerPool running the lanes
+        @param module: module name the lanes are accounted to in the worker pool
+        @param key_names: message parameter names making the partition key, a number refers to positional argument
+        @param lane_count: number of serial lanes
+        """
+        self._key_names = key_names
+        self._lanes = [SerialLane(worker_pool, module) for _ in range(max(1, lane_count))]
+
+    def get_key_names(self):
+        return self._key_names
+
+    def get_lane_count(self):
+        return len(self._lanes)
+
+    def get_partition_key(self, params):
+        return msgobject.get_parameter_values(params, self._key_names)
+
+    def get_lane_index(self, params):
+        # crc32 keeps the lane of a key stable between restarts unlike the salted builtin hash
+        key = repr(self.get_partition_key(params)).encode("utf-8")
+        return zlib.crc32(key) % len(self._lanes)
+
+    def submit(self, params, func, *args, **kwargs) -> Future:
+        return self.submit_timed(params, 0, func, *args, **kwargs)
+
+    def submit_timed(self, params, timeout, func, *args, **kwargs) -> Future:
+        return self._lanes[self.get_lane_index(params)].submit_timed(timeout, func, *args, **kwargs)
@@ -22,9 +22,14 @@ import re
 from logging.handlers import TimedRotatingFileHandler
 from dotenv import dotenv_values
 from common import consts
+from common import modconfig
 from core.baseappsrv import BaseAppServer
 from core.shutdn import ShutdownHookMonitor
-from core.msgobject import MessageEvent, MessageCommand
+from core.msgobject import MessageEvent, MessageCommand, MessageFactory, PRIORITY_NAMES
+from core.deadletter import DeadLetterStore
+from core.msgreply import ReplyListener
+from core import msgbulk
+from uuid import uuid4
 
 
 class StoreDictKeyPair(argparse.Action):
@@ -53,22 +58,54 @@ class BridgeApp(BaseAppServer):
         sub_parser.add_parser('stop', help='Stop %(prog)s daemon').set_defaults(func=self.do_stop_command)
         sub_parser.add_parser('altstop', help='Stop %(prog)s daemon in alternate way') \
             .set_defaults(func=self.do_alt_stop_command)
+        sub_parser.add_parser('reload', help='Reload commands, events and modules configuration of %(prog)s daemon') \
+            .set_defaults(func=self.do_reload_command)
 
         notify_parser = sub_parser.add_parser('notify', help='Send notification to %(prog)s daemon')
-        notify_parser.add_argument('event', help='Event in format MODULE@SUBMODULE:EVENT_NAME')
+        notify_parser.add_argument('event', help='Event in format MODULE@SUBMODULE:EVENT_NAME, default event of '
+                                                 'records read with --file', nargs="?")
         notify_parser.add_argument('-a', '--args', help='List of parameter required', nargs="+", dest="args",
                                    metavar="val1 ")
         notify_parser.add_argument('-k', '--kwargs', help='List of parameter required', nargs="+", dest="kwargs",
                                    action=StoreDictKeyPair, metavar="key1=val1")
+        notify_parser.add_argument('-p', '--priority', help='Message priority', dest="priority",
+                                   choices=sorted(PRIORITY_NAMES.keys()))
+        self.add_bulk_arguments(notify_parser)
         notify_parser.set_defaults(func=self.do_send_notification)
 
         command_parser = sub_parser.add_parser('command', help='Send command to %(prog)s daemon')
-        command_parser.add_argument('command', help='Command in format MODULE@SUBMODULE:proc_name')
+        command_parser.add_argument('command', help='Command in format MODULE@SUBMODULE:proc_name, default command '
+                                                     'of records read with --file', nargs="?")
         command_parser.add_argument('-a', '--args', help='List of parameter required', nargs="+", dest="args",
                                     metavar="val1 ")
         command_parser.add_argument('-k', '--kwargs', help='List of parameter required', nargs="+", dest="kwargs",
                                     action=StoreDictKeyPair, metavar="key1=val1")
+        command_parser.add_argument('-p', '--priority', help='Message priority', dest="priority",
+                                    choices=sorted(PRIORITY_NAMES.keys()))
+        command_parser.add_argument('-w', '--wait', help='Wait for the command result', action="store_true",
+                                    dest="wait")
+        command_parser.add_argument('-t', '--timeout', help='Seconds to wait for the command result', type=float,
+                                    dest="timeout", default=60)
+        self.add_bulk_arguments(command_parser)
         command_parser.set_defaults(func=self.do_send_command)
+
+        deadletter_parser = sub_parser.add_parser('deadletter', help='List or replay dead lettered messages')
+        deadletter_sub_parser = deadletter_parser.add_subparsers()
+        list_parser = deadletter_sub_parser.add_parser('list', help='List dead lettered messages')
+        list_parser.add_argument('-m', '--module', help='Only messages of MODULE@SUBMODULE', dest="module")
+        list_parser.set_defaults(func=self.do_list_dead_letters)
+        replay_parser = deadletter_sub_parser.add_parser('replay',
+                                                         help='Send dead lettered messages to %(prog)s daemon')
+        replay_parser.add_argument('-m', '--module', help='Only messages of MODULE@SUBMODULE', dest="module")
+        replay_parser.add_argument('-r', '--rate', help='Messages sent per second', type=float, dest="rate",
+                                   default=consts.DEFAULT_DEADLETTER_RATE)
+        replay_parser.add_argument('--archive', help='Move the dead letter file aside once every message is '
+                                                     'acknowledged by %(prog)s daemon', action="store_true",
+                                   dest="archive")
+        replay_parser.add_argument('--unordered', help='Replay messages of modules with PARTITION_KEY as well, '
+                                                       'they run out of order with messages of the same key',
+                                   action="store_true", dest="unordered")
+        replay_parser.set_defaults(func=self.do_replay_dead_letters)
         super(BridgeApp, self).do_configure()
 
     def do_start(self):
@@ -114,8 +151,9 @@ class BridgeApp(BaseAppServer):
     def do_stop_command(self, args):
         print("Stopping ", end=" ...")
         try:
-            self.send_shutdown_signal()
+            report = self.send_shutdown_signal()
             print("Done")
+            print("\n{0}".format(report)) if report else None
         except Exception as ex:
             print("Unable to shutdown \n\nReason: {0}".format(ex))
 
@@ -129,7 +167,29 @@ class BridgeApp(BaseAppServer):
         except Exception as ex:
             print("Unable to shutdown \n\nReason: {0}".format(ex))
 
+    @staticmethod
+    def add_bulk_arguments(parser):
+        parser.add_argument('-f', '--file', help='Send every message of a newline delimited JSON or CSV file, '
+                                                 '- reads standard input', dest="file")
+        parser.add_argument('--format', help='Format of --file, guessed from its extension by default',
+                            dest="format", choices=msgbulk.BULK_FORMATS)
+        parser.add_argument('--window', help='Messages sent ahead of the server acknowledgement', type=int,
+                            dest="window", default=consts.DEFAULT_BULK_WINDOW)
+
+    def do_reload_command(self, args):
+        print("Reloading configuration ", end=" ...")
+        appserver_klass = self._get_klass(consts.BRIDGE_SERVICE)
+        bridgesrv = appserver_klass.get_default_instance()
+        bridgesrv.set_configuration(self.get_configuration())
+        if not bridgesrv.reload_signal():
+            sys.exit(1)
+        print("Done")
+
     def do_send_notification(self, args):
+        if args.file:
+            return self.do_send_bulk(args, MessageEvent, args.event)
+        if not args.event:
+            return self.parser.error("event or --file is required")
         print("Notifying ", end=" ...")
         data, event = args.event.split(":")
         module, submodule = data.split("@")
@@ -140,6 +200,7 @@ class BridgeApp(BaseAppServer):
         message_object = MessageEvent()
         message_object.set_event(module, submodule, event)
         message_object.set_parameters(*arg, **kwarg)
+        message_object.set_priority(args.priority)
         appserver_klass = self._get_klass(consts.BRIDGE_SERVICE)
         bridgesrv = appserver_klass.get_default_instance()
         bridgesrv.set_configuration(self.get_configuration())
@@ -150,6 +211,10 @@ class BridgeApp(BaseAppServer):
             print("Unable to send notification \n\nReason: {0}".format(ex))
 
     def do_send_command(self, args):
+        if args.file:
+            return self.do_send_bulk(args, MessageCommand, args.command)
+        if not args.command:
+            return self.parser.error("command or --file is required")
         print("Sending command ", end=" ...")
         data, command = args.command.split(":")
         module, submodule = data.split("@")
@@ -160,20 +225,111 @@ class BridgeApp(BaseAppServer):
         message_object = MessageCommand()
         message_object.set_command(module, submodule, command)
         message_object.set_parameters(*arg, **kwarg)
+        message_object.set_priority(args.priority)
         appserver_klass = self._get_klass(consts.BRIDGE_SERVICE)
         bridgesrv = appserver_klass.get_default_instance()
         bridgesrv.set_configuration(self.get_configuration())
+        reply_listener = ReplyListener() if args.wait else None
         try:
+            message_object.set_reply_to(str(uuid4()), reply_listener.get_address()) if reply_listener else None
             bridgesrv.notify_server(message_object)
             print("Done")
+            self.print_command_reply(reply_listener.wait(args.timeout), args.timeout) if reply_listener else None
         except Exception as ex:
             print("Unable to send notification \n\nReason: {0}".format(ex))
+        finally:
+            reply_listener.close() if reply_listener else None
+
+    def do_send_bulk(self, args, message_klass, target):
+        print("Sending messages from {0} ...".format(args.file if args.file != "-" else "standard input"))
+        fmt = args.format if args.format else msgbulk.guess_format(args.file)
+        appserver_klass = self._get_klass(consts.BRIDGE_SERVICE)
+        bridgesrv = appserver_klass.get_default_instance()
+        bridgesrv.set_configuration(self.get_configuration())
+        stream = None
+        try:
+            stream = sys.stdin if args.file == "-" else open(args.file, "r", newline="", encoding="utf-8")
+            client = bridgesrv.connect_server(args.window)
+            try:
+                summary = msgbulk.BulkSubmitter(client).submit(
+                    msgbulk.read_records(stream, fmt),
+                    lambda record: msgbulk.build_message(record, message_klass, target, args.priority),
+                    lambda line_number, ex: print("Skipping line {0}: {1}".format(line_number, ex)))
+            finally:
+                client.close()
+            print("{sent} messages sent in {elapsed:.2f}s ({rate:.0f} messages/s), {rejected} rejected by server, "
+                  "{invalid} invalid".format(**summary))
+        except Exception as ex:
+            print("Unable to send messages \n\nReason: {0}".format(ex))
+        finally:
+            stream.close() if stream and (stream is not sys.stdin) else None
+
+    @staticmethod
+    def print_command_reply(reply, timeout):
+        if reply is None:
+            print("No reply received within {0} seconds".format(timeout))
+        elif reply.ERROR:
+            print("Command failed \n\nReason: {0}".format(reply.ERROR))
+        else:
+            print("Result: {0}".format(reply.RESULT))
+
+    def do_list_dead_letters(self, args):
+        store = DeadLetterStore.from_configuration(self.get_configuration())
+        count = 0
+        for record in store.read(args.module):
+            count += 1
+            message = record['message']
+            print("{0} {1} {2}:{3} {4} after {5} attempts: {6}".format(
+                record['time'], record['id'], record['module_id'],
+                message.get('command', message.get('event', None)), record['handler'], record['attempts'],
+                record['error']))
+        print("{0} dead lettered messages in {1}".format(count, store.get_file_name()))
+
+    def do_replay_dead_letters(self, args):
+        store = DeadLetterStore.from_configuration(self.get_configuration())
+        module_config = modconfig.get_configuration()
+        appserver_klass = self._get_klass(consts.BRIDGE_SERVICE)
+        bridgesrv = appserver_klass.get_default_instance()
+        bridgesrv.set_configuration(self.get_configuration())
+        interval = 1.0 / args.rate if args.rate and args.rate > 0 else 0
+        try:
+            # sent over one framed session, every message counts as replayed only once the server queued it
+            client = bridgesrv.connect_server(consts.DEFAULT_BULK_WINDOW)
+            try:
+                summary = msgbulk.BulkSubmitter(client, interval).submit(
+                    ((record['id'], record) for record in store.read(args.module)),
+                    lambda record: self.build_replay_message(record, module_config, args.unordered),
+                    lambda record_id, ex: print("Unable to replay {0} \n\nReason: {1}".format(record_id, ex)))
+            finally:
+                client.close()
+        except Exception as ex:
+            print("Unable to replay messages \n\nReason: {0}".format(ex))
+            return
+        print("{0} messages replayed, {1} rejected by server, {2} skipped".format(
+            summary['sent'] - summary['rejected'], summary['rejected'], summary['invalid']))
+        if args.archive and (summary['rejected'] == 0) and (summary['invalid'] == 0) and (not args.module):
+            print("Dead letter file archived to {0}".format(store.archive()))
+
+    @staticmethod
+    def build_replay_message(record, module_config, unordered=False):
+        module_id = record['module_id']
+        if (not unordered) and module_config.has_section(module_id) and \
+                module_config.get(module_id, consts.MODULE_PARTITION_KEY, fallback=None):
+            # later messages of the same key already ran, replaying would run this one after them
+            raise ValueError("{0} is partitioned by {1}, use --unordered to replay it anyway".format(
+                module_id, consts.MODULE_PARTITION_KEY))
+        message_object = MessageFactory.generate(record['message'])
+        if not message_object:
+            raise ValueError("Not a command nor an event")
+        # the original requester is long gone, do not reply to it
+        message_object.set_reply_to(None, None)
+        return message_object
 
     def send_shutdown_signal(self):
         try:
             shutdown_monitor = self.configure_shutdown_monitor()
             shutdown_monitor = ShutdownHookMonitor.get_default_instance() if not shutdown_monitor else shutdown_monitor
-            shutdown_monitor.send_shutdown_signal() if shutdown_monitor else None
+            return shutdown_monitor.send_shutdown_signal() if shutdown_monitor else None
         except Exception as ex:
             print("Unable to connect to server")
 
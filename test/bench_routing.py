@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+"""
+Microbenchmark of executor routing, run with: python -m test.bench_routing
+
+Compares the routing index lookup of MessageExecutionManager with a scan over every registered executor, as
+routing used to be done, for a growing number of modules each served by an event and a command executor.
+The index lookup should cost the same whatever the number of modules.
+"""
+
+import timeit
+from core.msgexec import MessageExecutionManager, EventExecutor, CommandExecutor
+from core.msgobject import MessageEvent
+
+MODULE_COUNTS = [1, 10, 100, 1000]
+LOOKUPS = 5000
+
+
+def create_manager(module_count):
+    manager = MessageExecutionManager(dict())
+    for index in range(module_count):
+        manager.add_object(EventExecutor(module="MODULE{0}".format(index)))
+        manager.add_object(CommandExecutor(module="MODULE{0}".format(index)))
+    return manager
+
+
+def scan_executors(manager, message_obj):
+    for obj in manager.get_objects():
+        if isinstance(obj, (EventExecutor, CommandExecutor)) and obj.is_valid_module(message_obj):
+            return obj
+    return None
+
+
+def measure(func, manager, message_obj):
+    """Best of 5 runs, in microseconds per lookup"""
+    return min(timeit.repeat(lambda: func(manager, message_obj), number=LOOKUPS, repeat=5)) / LOOKUPS * 1e6
+
+
+def main():
+    print("{0:>8} {1:>12} {2:>12}".format("modules", "index (us)", "scan (us)"))
+    for module_count in MODULE_COUNTS:
+        manager = create_manager(module_count)
+        # the last module registered is the worst case of a scan
+        message_obj = MessageEvent()
+        message_obj.set_event("MODULE{0}".format(module_count - 1), "SUBMODULE", "EVENT")
+        indexed = measure(MessageExecutionManager.get_valid_module, manager, message_obj)
+        scanned = measure(scan_executors, manager, message_obj)
+        print("{0:>8} {1:>12.3f} {2:>12.3f}".format(module_count, indexed, scanned))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import threading
+import unittest
+from common import consts
+from core.asyncexec import AsyncLoopRunner
+
+
+class AsyncLoopRunnerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.runner = AsyncLoopRunner({consts.EXECUTOR_ASYNC_LIMIT: "1"})
+        self.runner.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.runner.stop()
+
+    async def hold(self, value):
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        return value
+
+    async def fail(self):
+        raise ValueError("failed")
+
+    def test_pending_count_includes_coroutines_over_the_limit(self):
+        futures = [self.runner.submit(self.hold, index) for index in range(3)]
+        self.assertEqual(3, self.runner.get_pending_count())
+        self.release.set()
+        self.assertEqual([0, 1, 2], [future.result(2) for future in futures])
+        self.assertEqual(0, self.runner.get_pending_count())
+        self.assertEqual(1, self.runner.get_statistics().get_gauge("peak_active"))
+
+    def test_result_and_exception_are_returned(self):
+        self.release.set()
+        self.assertEqual("value", self.runner.submit(self.hold, "value").result(2))
+        self.assertRaises(ValueError, self.runner.submit(self.fail).result, 2)
+        self.assertEqual(2, self.runner.get_statistics().get_counter("completed"))
+
+    def test_stop_cancels_running_coroutines(self):
+        future = self.runner.submit(self.hold, "value")
+        self.runner.stop()
+        self.assertTrue(future.cancelled())
+        self.assertEqual(0, self.runner.get_pending_count())
+        self.assertRaises(RuntimeError, self.runner.submit, self.hold, "value")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import unittest
+from common import consts
+from core.cfgwatch import ConfigurationWatcher
+
+
+class ConfigurationWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "modules.properties")
+        self.write("[MODULE@SUBMODULE]\n")
+        self.changed = threading.Event()
+        self.watcher = ConfigurationWatcher({consts.CONFIG_RELOAD_INTERVAL: "0.05"}, [self.file_name],
+                                            self.changed.set)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, content):
+        with open(self.file_name, "w") as file:
+            file.write(content)
+
+    def test_unchanged_files_are_not_reloaded(self):
+        self.assertFalse(self.changed.wait(0.3))
+
+    def test_changed_file_is_reloaded(self):
+        self.write("[MODULE@SUBMODULE]\nTIMEOUT = 5\n")
+        self.assertTrue(self.changed.wait(2))
+
+    def test_removed_file_is_reloaded(self):
+        os.remove(self.file_name)
+        self.assertTrue(self.changed.wait(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import os
+import shutil
+import tempfile
+import unittest
+from core.deadletter import DeadLetterStore
+from core.msgobject import MessageCommand
+
+
+def create_command(submodule, value):
+    command = MessageCommand()
+    command.set_command("MODULE", submodule, "command")
+    command.set_parameters(value=value)
+    return command
+
+
+class DeadLetterStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = DeadLetterStore(os.path.join(self.directory, "dead", "letters.jsonl"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_records_are_read_back_in_order(self):
+        self.store.append(create_command("FIRST", 1), "Processor.command", ValueError("failed"), 4)
+        self.store.append(create_command("SECOND", 2), "Processor.command", KeyError("value"), 1)
+        records = list(self.store.read())
+        self.assertEqual(["MODULE@FIRST", "MODULE@SECOND"], [record['module_id'] for record in records])
+        self.assertEqual("ValueError: failed", records[0]['error'])
+        self.assertEqual(4, records[0]['attempts'])
+        self.assertEqual([[], {"value": 1}], records[0]['message']['data'])
+        self.assertEqual(["MODULE@SECOND"], [record['module_id'] for record in self.store.read("MODULE@SECOND")])
+
+    def test_invalid_lines_are_skipped(self):
+        self.store.append(create_command("FIRST", 1), "Processor.command", ValueError("failed"), 1)
+        with open(self.store.get_file_name(), "a", encoding="utf-8") as file:
+            file.write('{"torn": \n')
+        self.store.append(create_command("SECOND", 2), "Processor.command", ValueError("failed"), 1)
+        self.assertEqual(2, len(list(self.store.read())))
+
+    def test_archive(self):
+        self.assertIsNone(self.store.archive())
+        self.store.append(create_command("FIRST", 1), "Processor.command", ValueError("failed"), 1)
+        archive_name = self.store.archive()
+        self.assertTrue(os.path.exists(archive_name))
+        self.assertEqual([], list(self.store.read()))
+        self.assertEqual(1, len(list(DeadLetterStore(archive_name).read())))
+
+
+if __name__ == '__main__':
+    unittest.main()
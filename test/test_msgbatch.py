@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from core.msgbatch import MessageBatcher
+from core.msgstats import MessageStatistics
+from core.scheduler import DelayScheduler
+
+
+class MessageBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.delivered = list()
+        # never started, the tests run the wait timers with run_pending
+        self.scheduler = DelayScheduler()
+        self.statistics = MessageStatistics()
+        self.batcher = MessageBatcher(self.scheduler, lambda key, messages: self.delivered.append((key, messages)),
+                                      self.statistics)
+
+    def test_full_batch_is_delivered_at_once(self):
+        for index in range(3):
+            self.batcher.add("handler", index, 3, 5)
+        self.assertEqual([("handler", [0, 1, 2])], self.delivered)
+        self.assertEqual(0, self.batcher.get_pending_count())
+        # the wait timer of the delivered batch does not deliver it again
+        self.scheduler.run_pending()
+        self.assertEqual(1, len(self.delivered))
+
+    def test_batch_is_delivered_once_its_first_message_waited(self):
+        self.batcher.add("handler", 0, 3, 5)
+        self.batcher.add("handler", 1, 3, 5)
+        self.assertEqual([], self.delivered)
+        self.assertEqual(1, self.scheduler.get_pending_count())
+        self.scheduler.run_pending()
+        self.assertEqual([("handler", [0, 1])], self.delivered)
+
+    def test_handlers_are_batched_apart(self):
+        self.batcher.add("first", 0, 2, 5)
+        self.batcher.add("second", 1, 2, 5)
+        self.batcher.add("first", 2, 2, 5)
+        self.assertEqual([("first", [0, 2])], self.delivered)
+        self.assertEqual(1, self.batcher.get_pending_count())
+
+    def test_flush(self):
+        self.batcher.add("first", 0, 10, 5)
+        self.batcher.add("second", 1, 10, 5)
+        self.batcher.flush()
+        self.assertEqual([("first", [0]), ("second", [1])], sorted(self.delivered))
+        self.scheduler.run_pending()
+        self.assertEqual(2, len(self.delivered))
+        self.assertEqual(2, self.statistics.get_counter("batches"))
+        self.assertEqual(2, self.statistics.get_counter("batched_messages"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import io
+import unittest
+from core import msgbulk
+from core.msgobject import MessageCommand, MessageEvent, MessageFactory, PRIORITY_HIGH
+
+
+class RecordingClient(object):
+    """Framed client keeping the payloads sent, the server rejects the frames listed in rejected"""
+
+    def __init__(self, rejected=None):
+        self.payloads = list()
+        self.rejected = rejected if rejected else list()
+
+    def send(self, payload, ack=False, control=False):
+        self.payloads.append(payload)
+        return len(self.payloads)
+
+    def wait_acks(self):
+        return [(frame_id, "rejected") for frame_id in self.rejected]
+
+
+class ReadRecordsTest(unittest.TestCase):
+
+    def test_ndjson(self):
+        stream = io.StringIO('{"cono": 600}\n\n# comment\nnot json\n[1, 2]\n{"cono": 700}\n')
+        records = list(msgbulk.read_records(stream))
+        self.assertEqual([1, 4, 5, 6], [line_number for line_number, __ in records])
+        self.assertEqual({"cono": 600}, records[0][1])
+        self.assertIsInstance(records[1][1], ValueError)
+        self.assertIsInstance(records[2][1], ValueError)
+        self.assertEqual({"cono": 700}, records[3][1])
+
+    def test_csv(self):
+        records = list(msgbulk.read_records(io.StringIO("cono,dvno\n600,USG\n700,USH\n"), msgbulk.BULK_FORMAT_CSV))
+        self.assertEqual([(2, {"cono": "600", "dvno": "USG"}), (3, {"cono": "700", "dvno": "USH"})], records)
+
+    def test_guess_format(self):
+        self.assertEqual(msgbulk.BULK_FORMAT_CSV, msgbulk.guess_format("rows.CSV"))
+        self.assertEqual(msgbulk.BULK_FORMAT_NDJSON, msgbulk.guess_format("commands.ndjson"))
+        self.assertEqual(msgbulk.BULK_FORMAT_NDJSON, msgbulk.guess_format("-"))
+
+
+class BuildMessageTest(unittest.TestCase):
+
+    def test_record_target_and_parameters(self):
+        record = {"command": "MODULE@SUBMODULE:command", "args": [1], "kwargs": {"cono": 600}, "dvno": "USG",
+                  "priority": "high"}
+        message = msgbulk.build_message(record, MessageCommand, "OTHER@SUBMODULE:other")
+        self.assertEqual(("MODULE", "SUBMODULE", "command"), (message.MODULE, message.SUBMODULE, message.COMMAND))
+        self.assertEqual(([1], {"cono": 600, "dvno": "USG"}), (list(message.PARAMS[0]), message.PARAMS[1]))
+        self.assertEqual(PRIORITY_HIGH, message.PRIORITY)
+
+    def test_default_target(self):
+        message = msgbulk.build_message({"cono": "600"}, MessageEvent, "MODULE@SUBMODULE:EVENT")
+        self.assertEqual(("MODULE", "SUBMODULE", "EVENT"), (message.MODULE, message.SUBMODULE, message.EVENT))
+        self.assertEqual({"cono": "600"}, message.PARAMS[1])
+
+    def test_missing_target(self):
+        self.assertRaises(ValueError, msgbulk.build_message, {"cono": "600"}, MessageEvent)
+
+
+class BulkSubmitterTest(unittest.TestCase):
+
+    def test_summary(self):
+        client = RecordingClient(rejected=[2])
+        records = msgbulk.read_records(io.StringIO('{"cono": 600}\nnot json\n{"cono": 700}\n{}\n'))
+        invalid = list()
+        summary = msgbulk.BulkSubmitter(client).submit(
+            records, lambda record: msgbulk.build_message(record, MessageEvent, "MODULE@SUBMODULE:EVENT"),
+            lambda line_number, ex: invalid.append(line_number))
+        self.assertEqual((3, 1, 1), (summary["sent"], summary["rejected"], summary["invalid"]))
+        self.assertEqual([2], invalid)
+        self.assertEqual([600, 700], [MessageFactory.generate(payload).PARAMS[1]["cono"]
+                                      for payload in client.payloads[:2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
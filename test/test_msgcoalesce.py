@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from core.msgcoalesce import EventCoalescer
+from core.msgobject import MessageEvent
+from core.msgstats import MessageStatistics
+
+
+class ManualScheduler(object):
+    """Scheduler whose tasks run only when the test closes the windows"""
+
+    def __init__(self):
+        self.tasks = list()
+
+    def schedule(self, delay, func, *args):
+        self.tasks.append((delay, func, args))
+
+    def run_all(self):
+        tasks, self.tasks = self.tasks, list()
+        for __, func, args in tasks:
+            func(*args)
+
+
+def create_event(**kwargs):
+    event = MessageEvent()
+    event.set_event("MODULE", "SUBMODULE", "EVENT")
+    event.set_parameters(**kwargs)
+    return event
+
+
+class EventCoalescerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.emitted = list()
+        self.scheduler = ManualScheduler()
+        self.statistics = MessageStatistics()
+        self.coalescer = EventCoalescer(self.scheduler, self.emitted.append, self.statistics)
+
+    def test_latest_event_of_a_window_is_emitted(self):
+        first, second = create_event(cono=1, value="a"), create_event(cono=1, value="b")
+        self.assertIsNone(self.coalescer.offer(first, ["cono"], 5))
+        self.assertIs(first, self.coalescer.offer(second, ["cono"], 5))
+        self.assertEqual([5], [delay for delay, __, __ in self.scheduler.tasks])
+        self.scheduler.run_all()
+        self.assertEqual([second], self.emitted)
+        self.assertEqual(1, self.statistics.get_counter("coalesce_absorbed"))
+        self.assertEqual(1, self.statistics.get_counter("coalesce_emitted"))
+
+    def test_events_with_other_keys_are_kept(self):
+        events = [create_event(cono=1), create_event(cono=2)]
+        for event in events:
+            self.assertIsNone(self.coalescer.offer(event, ["cono"], 5))
+        self.assertEqual(2, self.coalescer.get_pending_count())
+        self.scheduler.run_all()
+        self.assertEqual(events, self.emitted)
+
+    def test_every_parameter_is_the_key_without_key_names(self):
+        self.coalescer.offer(create_event(cono=1, value="a"), [], 5)
+        self.assertIsNone(self.coalescer.offer(create_event(cono=1, value="b"), [], 5))
+        self.assertIsNotNone(self.coalescer.offer(create_event(value="b", cono=1), [], 5))
+
+    def test_flush_emits_before_the_window_closes(self):
+        event = create_event(cono=1)
+        self.coalescer.offer(event, ["cono"], 5)
+        self.coalescer.flush()
+        self.assertEqual([event], self.emitted)
+        # the window closing later finds nothing left to emit
+        self.scheduler.run_all()
+        self.assertEqual([event], self.emitted)
+        self.assertEqual(0, self.coalescer.get_pending_count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import os.path
+import shutil
+import tempfile
+import threading
+import unittest
+from configparser import ConfigParser
+from unittest import mock
+from common import consts
+from common import modconfig
+from core.msgdispatch import DispatchTable, EventHandler
+from core.msgexec import BaseExecutor, MessageExecutionManager, EventExecutor, CommandExecutor
+from core.msgobject import MessageCommand, MessageEvent, mq_batch, mq_command, mq_event
+from core.prochandler import CommandProcessor
+
+
+def create_message(klass, module):
+    message = klass()
+    if isinstance(message, MessageEvent):
+        message.set_event(module, "SUBMODULE", "EVENT")
+    else:
+        message.set_command(module, "SUBMODULE", "command")
+    return message
+
+
+class RoutingIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = MessageExecutionManager(dict())
+
+    def register(self, modules):
+        executors = dict()
+        for module in modules:
+            for klass in (EventExecutor, CommandExecutor):
+                executor = klass(module=module)
+                self.manager.add_object(executor)
+                executors[executor.get_routing_key()] = executor
+        return executors
+
+    def test_lookup_by_module_and_mode(self):
+        executors = self.register(["MODULE{0}".format(index) for index in range(50)])
+        for (module, __), executor in executors.items():
+            message_klass = MessageEvent if isinstance(executor, EventExecutor) else MessageCommand
+            self.assertIs(executor, self.manager.get_valid_module(create_message(message_klass, module)))
+        self.assertIsNone(self.manager.get_valid_module(create_message(MessageEvent, "UNKNOWN")))
+
+    def test_lookup_does_not_scan_executors(self):
+        self.register(["MODULE{0}".format(index) for index in range(50)])
+        with mock.patch.object(EventExecutor, "is_valid_module") as event_check, \
+                mock.patch.object(CommandExecutor, "is_valid_module") as command_check:
+            self.assertIsNotNone(self.manager.get_valid_module(create_message(MessageEvent, "MODULE49")))
+        event_check.assert_not_called()
+        command_check.assert_not_called()
+
+    def test_remove_object(self):
+        executors = self.register(["MODULE"])
+        event_executor = executors[("MODULE", EventExecutor(module="MODULE").get_message_mode())]
+        self.manager.remove_object(event_executor)
+        self.assertIsNone(self.manager.get_valid_module(create_message(MessageEvent, "MODULE")))
+        self.assertIsNotNone(self.manager.get_valid_module(create_message(MessageCommand, "MODULE")))
+        # removing an executor no longer registered leaves the one serving its routing key in place
+        replacement = EventExecutor(module="MODULE")
+        self.manager.add_object(replacement)
+        self.manager.remove_object(event_executor)
+        self.assertIs(replacement, self.manager.get_valid_module(create_message(MessageEvent, "MODULE")))
+
+
+class OrderedProcessor(object):
+
+    def command(self):
+        pass
+
+    def on_event(self):
+        pass
+
+
+class UnorderedCommands(object):
+
+    @mq_batch
+    def batch_command(self, items):
+        pass
+
+    async def async_command(self):
+        pass
+
+
+class UnorderedEvents(object):
+
+    @mq_batch
+    def on_batch_event(self, items):
+        pass
+
+    async def on_async_event(self):
+        pass
+
+
+def create_table(command_klass, event_klass, events):
+    return DispatchTable({"MODULE@SUBMODULE": command_klass},
+                         {("MODULE@SUBMODULE", "EVENT"): [EventHandler(event_klass, event) for event in events]})
+
+
+class PartitionOptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.module_config = ConfigParser()
+        self.module_config.read_dict({"MODULE@SUBMODULE": {"PARTITION_KEY": "cono"}})
+
+    def test_ordered_handlers_are_supported(self):
+        dispatch_table = create_table(OrderedProcessor, OrderedProcessor, ["on_event"])
+        self.assertEqual([], BaseExecutor.get_unsupported_partition_options("MODULE", dispatch_table,
+                                                                            self.module_config))
+
+    def test_batch_and_async_handlers_are_refused(self):
+        dispatch_table = create_table(UnorderedCommands, UnorderedEvents, ["on_batch_event", "on_async_event"])
+        errors = BaseExecutor.get_unsupported_partition_options("MODULE", dispatch_table, self.module_config)
+        self.assertEqual(4, len(errors))
+        for name in ["batch_command", "async_command", "on_batch_event", "on_async_event"]:
+            self.assertTrue([error for error in errors if name in error], name)
+
+    def test_unpartitioned_submodule_is_not_checked(self):
+        dispatch_table = create_table(UnorderedCommands, UnorderedEvents, ["on_batch_event", "on_async_event"])
+        self.assertEqual([], BaseExecutor.get_unsupported_partition_options("MODULE", dispatch_table, ConfigParser()))
+
+    def test_manager_refuses_reloaded_configuration(self):
+        dispatch_table = create_table(UnorderedCommands, UnorderedEvents, ["on_batch_event"])
+        self.assertEqual(3, len(MessageExecutionManager._get_unsupported_options(dispatch_table,
+                                                                                 self.module_config)))
+
+
+class ReloadProcessor(CommandProcessor):
+
+    @mq_command
+    def command(self):
+        pass
+
+    @mq_event
+    def on_event(self):
+        pass
+
+
+class ReloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.patches = [mock.patch.object(consts, "DEFAULT_SCRIPT_PATH", self.directory),
+                        mock.patch.object(modconfig, "module_config", None)]
+        for patch in self.patches:
+            patch.start()
+        self.write_configuration("MODULE@FIRST", "TIMEOUT = 5")
+        self.manager = MessageExecutionManager(dict())
+        self.manager.configure()
+        self.executor = self.manager._register_module_object(create_message(MessageCommand, "MODULE"))
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_configuration(self, module_id, options, class_name=None):
+        class_name = class_name if class_name else "{0}.{1}".format(__name__, ReloadProcessor.__name__)
+        for file_name, content in [(consts.DEFAULT_COMMAND_FILE, "{0}={1}\n".format(module_id, class_name)),
+                                   (consts.DEFAULT_EVENT_FILE, "[{0}]\nEVENT={1}:on_event\n".format(module_id,
+                                                                                                   class_name)),
+                                   (consts.MODULE_CONFIG_FILE, "[{0}]\n{1}\n".format(module_id, options))]:
+            with open(os.path.join(self.directory, file_name), "w") as file:
+                file.write(content)
+
+    def test_reloaded_configuration_is_swapped_into_executors(self):
+        self.assertEqual(5, self.executor.get_handler_timeout("MODULE@FIRST"))
+        self.write_configuration("MODULE@SECOND", "TIMEOUT = 7")
+        self.assertTrue(self.manager.reload_configuration())
+        self.assertTrue(self.executor.get_dispatch_table().has_command_module("MODULE@SECOND"))
+        self.assertFalse(self.executor.get_dispatch_table().has_command_module("MODULE@FIRST"))
+        self.assertEqual(7, self.executor.get_handler_timeout("MODULE@SECOND"))
+
+    def test_invalid_configuration_keeps_the_current_one(self):
+        dispatch_table = self.executor.get_dispatch_table()
+        self.write_configuration("MODULE@SECOND", "TIMEOUT = 7", "missing.module.Processor")
+        self.assertFalse(self.manager.reload_configuration())
+        self.assertIs(dispatch_table, self.executor.get_dispatch_table())
+        self.assertEqual(5, self.executor.get_handler_timeout("MODULE@FIRST"))
+
+    def test_refused_options_keep_the_current_one(self):
+        self.write_configuration("MODULE@FIRST", "PARTITION_KEY = cono\n[MODULE]\nEXECUTOR = process")
+        self.assertFalse(self.manager.reload_configuration())
+        self.assertEqual(5, self.executor.get_handler_timeout("MODULE@FIRST"))
+
+
+class DrainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.release = threading.Event()
+        self.patches = [mock.patch.object(consts, "DEFAULT_SCRIPT_PATH", self.directory),
+                        mock.patch.object(modconfig, "module_config", None)]
+        for patch in self.patches:
+            patch.start()
+        self.manager = MessageExecutionManager({consts.EXECUTOR_ASYNC_LIMIT: "1"})
+        self.manager.configure()
+        self.manager.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.manager.stop()
+        for patch in self.patches:
+            patch.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    async def hold(self):
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+
+    def test_waits_for_threads_and_coroutines(self):
+        for __ in range(2):
+            self.manager._worker_pool.submit("MODULE", self.release.wait, 10)
+            # the second coroutine waits for the async limit, it is outstanding all the same
+            self.manager._async_runner.submit(self.hold)
+        threading.Timer(0.3, self.release.set).start()
+        self.assertEqual((4, 0), self.manager.drain(5))
+
+    def test_returns_work_left_once_timed_out(self):
+        self.manager._worker_pool.submit("MODULE", self.release.wait, 10)
+        self.manager._async_runner.submit(self.hold)
+        self.manager._async_runner.submit(self.hold)
+        self.assertEqual((0, 3), self.manager.drain(0.2))
+
+
+if __name__ == '__main__':
+    unittest.main()
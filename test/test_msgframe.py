@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import os.path
+import shutil
+import socket
+import tempfile
+import unittest
+from threading import Thread
+from core.msgframe import FrameDecoder, FrameError, FramedClient, encode_ack, encode_frame, FRAME_MAGIC, \
+    FLAG_ACK_REQUESTED, FLAG_CONTROL
+
+
+class FrameDecoderTest(unittest.TestCase):
+
+    def test_line_mode(self):
+        decoder = FrameDecoder()
+        self.assertEqual(["first\n"], decoder.feed(b"first\nsec"))
+        self.assertFalse(decoder.is_framed())
+        self.assertEqual(["second\n"], decoder.feed(b"ond\n"))
+        self.assertEqual([], decoder.feed(b"last"))
+        self.assertEqual("last", decoder.finish())
+
+    def test_frame_mode(self):
+        decoder = FrameDecoder()
+        frames = decoder.feed(FRAME_MAGIC + encode_frame(FLAG_ACK_REQUESTED, 1, b"hello") +
+                              encode_frame(FLAG_CONTROL, 2, b"reload"))
+        self.assertTrue(decoder.is_framed())
+        self.assertEqual([(1, b"hello"), (2, b"reload")], [(frame.frame_id, frame.payload) for frame in frames])
+        self.assertTrue(frames[0].is_ack_requested())
+        self.assertFalse(frames[0].is_control())
+        self.assertTrue(frames[1].is_control())
+        self.assertIsNone(decoder.finish())
+
+    def test_frame_split_across_feeds(self):
+        data = FRAME_MAGIC + encode_frame(0, 7, b"payload") + encode_frame(0, 8, b"")
+        decoder = FrameDecoder()
+        frames = list()
+        for index in range(len(data)):
+            frames += decoder.feed(data[index:index + 1])
+        self.assertEqual([(7, b"payload"), (8, b"")], [(frame.frame_id, frame.payload) for frame in frames])
+        self.assertEqual(0, decoder.get_buffered_size())
+
+    def test_partial_magic_waits(self):
+        decoder = FrameDecoder()
+        self.assertEqual([], decoder.feed(FRAME_MAGIC[:2]))
+        self.assertEqual([], decoder.feed(FRAME_MAGIC[2:]))
+        self.assertTrue(decoder.is_framed())
+
+    def test_oversize_frame(self):
+        decoder = FrameDecoder(max_frame_size=4)
+        self.assertRaises(FrameError, decoder.feed, FRAME_MAGIC + encode_frame(0, 1, b"too long"))
+
+    def test_oversize_line(self):
+        decoder = FrameDecoder(max_line_size=4)
+        self.assertRaises(FrameError, decoder.feed, b"too long")
+
+    def test_error_ack(self):
+        frames = FrameDecoder().feed(FRAME_MAGIC + encode_ack(3, "queue full") + encode_ack(4))
+        self.assertTrue(frames[0].is_error())
+        self.assertEqual(b"queue full", frames[0].payload)
+        self.assertFalse(frames[1].is_error())
+
+
+class FramedClientTest(unittest.TestCase):
+    """
+    FramedClient against a server acknowledging every frame asking for it, payloads starting with bad are
+    rejected and close ends the session without acknowledgement
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.address = os.path.join(self.directory, "frame.sock")
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server_socket.bind(self.address)
+        self.server_socket.listen(1)
+        self.received = list()
+        self.server_thread = Thread(target=self.serve, daemon=True)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server_socket.close()
+        self.server_thread.join(5)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def serve(self):
+        connection, __ = self.server_socket.accept()
+        decoder = FrameDecoder()
+        with connection:
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    return
+                for frame in decoder.feed(data):
+                    if frame.payload == b"close":
+                        return
+                    self.received.append(frame)
+                    error = "rejected" if frame.payload.startswith(b"bad") else None
+                    connection.sendall(encode_ack(frame.frame_id, error)) if frame.is_ack_requested() else None
+
+    def test_acknowledged_session(self):
+        client = FramedClient(socket.AF_UNIX, self.address, timeout=5, max_unacked=2)
+        try:
+            frame_ids = [client.send(payload, ack=True) for payload in ["one", b"bad two", "three", "four"]]
+            # sending past max_unacked collected the acknowledgements of the earliest frames
+            self.assertLessEqual(client.get_unacked_count(), 2)
+            self.assertEqual([(frame_ids[1], "rejected")], client.wait_acks())
+            self.assertEqual(0, client.get_unacked_count())
+            self.assertEqual([], client.wait_acks())
+        finally:
+            client.close()
+        self.server_thread.join(5)
+        self.assertEqual([b"one", b"bad two", b"three", b"four"], [frame.payload for frame in self.received])
+
+    def test_control_frame(self):
+        client = FramedClient(socket.AF_UNIX, self.address, timeout=5)
+        client.send("reload", control=True)
+        client.close()
+        self.server_thread.join(5)
+        self.assertEqual(1, len(self.received))
+        self.assertTrue(self.received[0].is_control())
+        self.assertFalse(self.received[0].is_ack_requested())
+
+    def test_closed_session(self):
+        client = FramedClient(socket.AF_UNIX, self.address, timeout=5)
+        try:
+            client.send("one", ack=True)
+            self.assertEqual([], client.wait_acks())
+            client.send("close", ack=True)
+            self.assertRaises(ConnectionError, client.wait_acks)
+        finally:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
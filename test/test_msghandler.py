@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import shutil
+import tempfile
+import threading
+import unittest
+from common import consts
+from core.msgexec import MessageExecutionManager
+from core.msghandler import QueuePoolHandler, MessageNotifier
+from core.msgobject import MessageEvent
+
+
+def create_event(index):
+    message = MessageEvent()
+    message.set_event("MODULE", "EXAMPLE", "EVENT")
+    message.set_parameters(index=index)
+    return message
+
+
+class SpooledQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = {consts.QUEUE_SPOOL_ENABLED: "true", consts.QUEUE_SPOOL_PATH: self.directory,
+                       consts.QUEUE_SPOOL_SEGMENT_SIZE: "65536", consts.QUEUE_SPOOL_FSYNC: "none"}
+        self.pools = list()
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_pool(self, execution_manager=None):
+        pool = QueuePoolHandler(self.config)
+        if execution_manager:
+            listener = MessageNotifier()
+            execution_manager.register_listener(listener)
+            pool.add_listener(listener)
+        self.pools.append(pool)
+        return pool
+
+    def test_messages_reaching_stopped_manager_are_replayed(self):
+        execution_manager = MessageExecutionManager(dict())
+        execution_manager.start()
+        execution_manager.stop()
+        pool = self.create_pool(execution_manager)
+        pool.start()
+        for index in range(5):
+            pool.on_handle_message(None, create_event(index))
+        # handed over to the stopped manager, which neither executes them nor completes them
+        self.assertEqual((5, 0), pool.drain(5))
+        pool.stop()
+        replay_pool = self.create_pool()
+        replay_pool.configure()
+        self.assertEqual(5, replay_pool.get_queue_size())
+        self.assertEqual(5, replay_pool.get_statistics().get_counter("replayed"))
+
+
+class QueuePoolRestartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.handled = list()
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.pool = QueuePoolHandler(dict())
+        self.pool.add_listener(MessageNotifier(self.on_message))
+
+    def tearDown(self):
+        self.proceed.set()
+        self.pool.stop()
+
+    def on_message(self, obj, message):
+        index = message.PARAMS[1]["index"]
+        if index == 0:
+            self.entered.set()
+            self.proceed.wait(5)
+        self.handled.append(index)
+
+    def test_restart_after_stop_with_busy_consumer(self):
+        self.pool.start()
+        self.pool.on_handle_message(None, create_event(0))
+        self.assertTrue(self.entered.wait(5))
+        # the busy consumer does not take the stop sentinel, the restarted consumer must not take it either
+        self.pool.stop()
+        self.pool.start()
+        for index in range(1, 4):
+            self.pool.on_handle_message(None, create_event(index))
+        self.assertEqual((3, 0), self.pool.drain(2))
+        self.assertEqual([1, 2, 3], self.handled)
+        # the consumer of the previous start leaves once done
+        consumers = [thread for thread in threading.enumerate() if thread.name.startswith("QueueConsumer")]
+        self.proceed.set()
+        for consumer in consumers:
+            consumer.join(0.2)
+        self.assertEqual(1, len([consumer for consumer in consumers if consumer.is_alive()]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from concurrent.futures import Future
+from core.msgobject import MessageCompletion, MessageEvent
+
+
+class MessageCompletionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def on_complete(self):
+        self.calls += 1
+
+    def test_message_holds_one_count(self):
+        completion = MessageCompletion(self.on_complete)
+        completion.release()
+        self.assertEqual(1, self.calls)
+
+    def test_callback_waits_for_every_hold(self):
+        completion = MessageCompletion(self.on_complete)
+        completion.hold()
+        completion.hold()
+        completion.release()
+        completion.release()
+        self.assertEqual(0, self.calls)
+        completion.release()
+        self.assertEqual(1, self.calls)
+
+    def test_finish_runs_callback_once(self):
+        completion = MessageCompletion(self.on_complete)
+        completion.hold()
+        completion.finish()
+        self.assertEqual(1, self.calls)
+        completion.release()
+        completion.release()
+        completion.finish()
+        self.assertEqual(1, self.calls)
+
+    def test_message_tracks_futures(self):
+        message = MessageEvent()
+        message.set_event("MODULE", "EXAMPLE", "HELLO_EVENT")
+        message.set_completion(self.on_complete)
+        futures = [Future(), Future()]
+        for future in futures:
+            message.track_completion(future)
+        message.release_completion()
+        futures[0].set_result(None)
+        self.assertEqual(0, self.calls)
+        futures[1].set_exception(RuntimeError("handler failed"))
+        self.assertEqual(1, self.calls)
+
+    def test_message_without_completion(self):
+        message = MessageEvent()
+        message.hold_completion()
+        message.track_completion(Future())
+        message.release_completion()
+        message.finish_completion()
+        self.assertIsNone(message.completion)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from unittest import mock
+from core.msgobject import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from core.msgqueue import PriorityLaneQueue
+
+
+class PriorityLaneQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("core.msgqueue.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_strict_priority(self):
+        queue = PriorityLaneQueue(aging=0)
+        queue.put("low", PRIORITY_LOW)
+        queue.put("normal", PRIORITY_NORMAL)
+        self.now += 3600
+        queue.put("high-1", PRIORITY_HIGH)
+        queue.put("high-2", PRIORITY_HIGH)
+        self.assertEqual([2, 1, 1], queue.get_lane_sizes())
+        self.assertEqual([(PRIORITY_HIGH, "high-1"), (PRIORITY_HIGH, "high-2"), (PRIORITY_NORMAL, "normal"),
+                          (PRIORITY_LOW, "low")], [queue.get() for __ in range(4)])
+        self.assertEqual(0, queue.get_aged_count())
+
+    def test_aging_promotes_waiting_items(self):
+        queue = PriorityLaneQueue(aging=5)
+        queue.put("low", PRIORITY_LOW)
+        self.now += 4.9
+        queue.put("high", PRIORITY_HIGH)
+        # not aged yet, low is still two levels behind
+        self.assertEqual((PRIORITY_HIGH, "high"), queue.get())
+        self.now += 5.1
+        queue.put("high", PRIORITY_HIGH)
+        # aged by two levels, ties go to the more urgent lane
+        self.assertEqual((PRIORITY_HIGH, "high"), queue.get())
+        self.now += 5
+        queue.put("high", PRIORITY_HIGH)
+        self.assertEqual((PRIORITY_LOW, "low"), queue.get())
+        self.assertEqual(1, queue.get_aged_count())
+        self.assertEqual((PRIORITY_HIGH, "high"), queue.get())
+
+    def test_priority_out_of_range(self):
+        queue = PriorityLaneQueue(aging=0)
+        queue.put("below", -1)
+        queue.put("above", 9)
+        self.assertEqual([(PRIORITY_HIGH, "below"), (PRIORITY_LOW, "above")], [queue.get(), queue.get()])
+
+    def test_get_timeout(self):
+        queue = PriorityLaneQueue(aging=0)
+        self.assertIsNone(queue.get(timeout=0))
+        queue.put("item")
+        queue.clear()
+        self.assertEqual(0, queue.qsize())
+        self.assertIsNone(queue.get(timeout=0))
+
+
+    def test_discard(self):
+        queue = PriorityLaneQueue(aging=0)
+        queue.put(None, PRIORITY_HIGH)
+        queue.put("item", PRIORITY_NORMAL)
+        queue.put(None, PRIORITY_LOW)
+        self.assertEqual(2, queue.discard(None))
+        self.assertEqual(1, queue.qsize())
+        self.assertEqual((PRIORITY_NORMAL, "item"), queue.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import socket
+import unittest
+from core.msgobject import MessageCommand, MessageReply
+from core.msgreply import ReplyManager, ReplyListener
+from core.transport.xsocktransport import UnixSocketTransport
+
+
+class BrokerTransport(object):
+
+    def __init__(self):
+        self.published = list()
+
+    def send_message(self, destination, payload):
+        self.published.append(destination)
+
+
+def create_command(origin, reply_to):
+    message = MessageCommand()
+    message.set_command("MODULE", "EXAMPLE", "command")
+    message.set_reply_to("correlation", reply_to)
+    message.origin = origin
+    return message
+
+
+def create_reply(message):
+    reply = MessageReply()
+    reply.set_reply(message, "result")
+    return reply
+
+
+class ReplyPublishTest(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = ReplyListener()
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_local_transport_replies_to_local_address(self):
+        message = create_command(UnixSocketTransport(dict()), self.listener.get_address())
+        ReplyManager.publish(message, create_reply(message))
+        reply = self.listener.wait(2)
+        self.assertEqual("correlation", reply.CORRELATION_ID)
+        self.assertEqual("result", reply.RESULT)
+
+    def test_broker_command_is_replied_through_the_broker(self):
+        transport = BrokerTransport()
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        server.settimeout(0.2)
+        try:
+            address = "tcp:127.0.0.1:{0}".format(server.getsockname()[1])
+            message = create_command(transport, address)
+            ReplyManager.publish(message, create_reply(message))
+            self.assertEqual([address], transport.published)
+            self.assertRaises(socket.timeout, server.accept)
+        finally:
+            server.close()
+
+    def test_local_address_without_transport_is_not_connected(self):
+        message = create_command(None, self.listener.get_address())
+        ReplyManager.publish(message, create_reply(message))
+        self.assertIsNone(self.listener.wait(0.2))
+
+    def test_local_transport_refuses_broker_destination(self):
+        self.assertRaises(ValueError, UnixSocketTransport(dict()).send_message, "reply/topic", b"payload")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from concurrent.futures import Future
+from core.msgretry import RetryPolicy, RetryingCall
+from core.msgstats import MessageStatistics
+from core.scheduler import DelayScheduler
+
+
+class FlakyHandler(object):
+    """Submits attempts failing until the given attempt"""
+
+    def __init__(self, succeed_at):
+        self.succeed_at = succeed_at
+        self.attempts = 0
+
+    def submit(self):
+        self.attempts += 1
+        future = Future()
+        if self.attempts >= self.succeed_at:
+            future.set_result(self.attempts)
+        else:
+            future.set_exception(ValueError("attempt {0}".format(self.attempts)))
+        return future
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_delay_doubles_up_to_max_delay(self):
+        policy = RetryPolicy(5, 1, 6)
+        for attempt, backoff in [(1, 1), (2, 2), (3, 4), (4, 6), (5, 6)]:
+            delay = policy.get_delay(attempt)
+            self.assertTrue(backoff / 2 <= delay <= backoff, (attempt, delay))
+
+
+class RetryingCallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.exhausted = list()
+        self.statistics = MessageStatistics()
+        self.scheduler = DelayScheduler()
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def start(self, handler, retries):
+        return RetryingCall(handler.submit, RetryPolicy(retries, 0.01, 0.02), self.scheduler,
+                            lambda exc, attempts: self.exhausted.append((str(exc), attempts)), self.statistics).start()
+
+    def test_succeeds_after_retries(self):
+        handler = FlakyHandler(3)
+        self.assertEqual(3, self.start(handler, 3).result(2))
+        self.assertEqual(2, self.statistics.get_counter("retries"))
+        self.assertEqual([], self.exhausted)
+
+    def test_exhausted_after_every_attempt_failed(self):
+        handler = FlakyHandler(10)
+        future = self.start(handler, 2)
+        self.assertRaises(ValueError, future.result, 2)
+        self.assertEqual(3, handler.attempts)
+        self.assertEqual([("attempt 3", 3)], self.exhausted)
+        self.assertEqual(1, self.statistics.get_counter("exhausted"))
+
+    def test_not_retried_once_scheduler_stopped(self):
+        self.scheduler.stop()
+        handler = FlakyHandler(2)
+        self.assertRaises(ValueError, self.start(handler, 3).result, 2)
+        self.assertEqual([("attempt 1", 1)], self.exhausted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+import zlib
+from core.msgspool import MessageSpool, RECORD_DATA, RECORD_DONE, RECORD_HEADER, SEGMENT_SUFFIX, SPOOL_FSYNC_NONE
+
+
+class MessageSpoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.spool = None
+
+    def tearDown(self):
+        self.spool.close() if self.spool else None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open_spool(self, segment_size=4096, fsync_policy=SPOOL_FSYNC_NONE):
+        self.spool.close() if self.spool else None
+        self.spool = MessageSpool(self.directory, segment_size=segment_size, fsync_policy=fsync_policy)
+        return self.spool.open()
+
+    def read_segment(self, name):
+        with open(os.path.join(self.directory, name), "rb") as segment_file:
+            return segment_file.read()
+
+    def get_segment_names(self):
+        return sorted([name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)])
+
+    def test_record_format(self):
+        self.open_spool()
+        sequence = self.spool.append(b"hello")
+        self.spool.mark_done(sequence)
+        self.spool.close()
+        self.spool = None
+        data = self.read_segment(self.get_segment_names()[0])
+        self.assertEqual((RECORD_DATA, 5, sequence, zlib.crc32(b"hello")), RECORD_HEADER.unpack_from(data, 0))
+        self.assertEqual(b"hello", data[RECORD_HEADER.size:RECORD_HEADER.size + 5])
+        self.assertEqual((RECORD_DONE, 0, sequence, zlib.crc32(b"")),
+                         RECORD_HEADER.unpack_from(data, RECORD_HEADER.size + 5))
+        # segments are preallocated and zero filled past the last record
+        self.assertEqual(4096, len(data))
+        self.assertFalse(any(data[RECORD_HEADER.size * 2 + 5:]))
+
+    def test_replay_pending_messages(self):
+        self.assertEqual([], self.open_spool())
+        first = self.spool.append(b"first")
+        second = self.spool.append(b"second")
+        third = self.spool.append(b"third")
+        self.spool.mark_done(second)
+        self.assertEqual([(first, b"first"), (third, b"third")], self.open_spool())
+        # sequences keep growing across restarts
+        self.assertGreater(self.spool.append(b"fourth"), third)
+
+    def test_torn_record_is_ignored(self):
+        self.open_spool()
+        first = self.spool.append(b"first")
+        self.spool.append(b"second")
+        self.spool.close()
+        self.spool = None
+        path = os.path.join(self.directory, self.get_segment_names()[0])
+        # the second payload was only partially written before the crash
+        with open(path, "r+b") as segment_file:
+            segment_file.seek(RECORD_HEADER.size * 2 + len(b"first") + 1)
+            segment_file.write(b"X")
+        self.assertEqual([(first, b"first")], self.open_spool())
+        # the next append overwrites the torn record instead of following it
+        third = self.spool.append(b"third")
+        self.assertEqual([(first, b"first"), (third, b"third")], self.open_spool())
+
+    def test_truncated_header_is_ignored(self):
+        self.open_spool()
+        first = self.spool.append(b"first")
+        self.spool.close()
+        self.spool = None
+        path = os.path.join(self.directory, self.get_segment_names()[0])
+        with open(path, "r+b") as segment_file:
+            segment_file.seek(RECORD_HEADER.size + len(b"first"))
+            segment_file.write(bytes([RECORD_DATA]) + b"\xff" * 4)
+        self.assertEqual([(first, b"first")], self.open_spool())
+
+    def test_segments_retired_once_done(self):
+        self.open_spool(segment_size=256)
+        sequences = [self.spool.append(b"x" * 100) for __ in range(6)]
+        self.assertGreater(len(self.get_segment_names()), 2)
+        for sequence in sequences[:-1]:
+            self.spool.mark_done(sequence)
+        self.assertEqual(1, self.spool.get_statistics()["pending"])
+        self.assertLessEqual(len(self.get_segment_names()), 2)
+        self.assertEqual([(sequences[-1], b"x" * 100)], self.open_spool(segment_size=256))
+
+    def test_sync_policy_waits_for_flush(self):
+        self.open_spool(fsync_policy="sync")
+        sequence = self.spool.append(b"durable")
+        statistics = self.spool.get_statistics()
+        self.assertGreaterEqual(statistics["durable"], sequence)
+        self.assertGreaterEqual(statistics["flushes"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from configparser import ConfigParser
+from core import procexec
+from core.msgdispatch import DispatchTable, EventHandler
+from core.msgobject import MessageCommand, MODE_COMMAND, mq_command, mq_event, mq_batch
+from core.prochandler import CommandProcessor
+
+
+class SquareProcessor(CommandProcessor):
+
+    @mq_command
+    def square(self, value):
+        return value * value
+
+    @mq_batch
+    @mq_command
+    def total(self, items):
+        return sum([kwargs["value"] for __, kwargs in items])
+
+
+class AsyncProcessor(CommandProcessor):
+
+    @mq_event
+    async def on_event(self):
+        pass
+
+
+def create_command(value):
+    command = MessageCommand()
+    command.set_command("MODULE", "SUBMODULE", "square")
+    command.set_parameters(value=value)
+    return command
+
+
+def create_module_config(sections):
+    module_config = ConfigParser()
+    module_config.read_dict(sections)
+    return module_config
+
+
+class UnsupportedOptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatch_table = DispatchTable({"MODULE@SUBMODULE": SquareProcessor},
+                                            {("MODULE@SUBMODULE", "EVENT"): [EventHandler(AsyncProcessor, "on_event")]})
+
+    def test_thread_mode_supports_every_option(self):
+        module_config = create_module_config({"MODULE@SUBMODULE": {"PARTITION_KEY": "cono", "TIMEOUT": "5"}})
+        self.assertEqual([], procexec.get_unsupported_options("MODULE", self.dispatch_table, module_config))
+
+    def test_process_mode_refuses_lanes_timeouts_and_coroutines(self):
+        module_config = create_module_config({"MODULE": {"EXECUTOR": "process"},
+                                              "MODULE@SUBMODULE": {"PARTITION_KEY": "cono", "square.TIMEOUT": "5"}})
+        errors = procexec.get_unsupported_options("MODULE", self.dispatch_table, module_config)
+        self.assertEqual(3, len(errors))
+        for name in ["PARTITION_KEY", "SQUARE.TIMEOUT", "on_event"]:
+            self.assertTrue([error for error in errors if name in error], name)
+
+
+class ProcessPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = procexec.create_process_pool(1, dict(), create_module_config({"MODULE": {"EXECUTOR": "process"}}))
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_messages_run_on_worker_process(self):
+        class_name = procexec.get_class_name(SquareProcessor)
+        self.assertEqual(9, self.pool.submit(procexec.execute_message, class_name, None,
+                                             create_command(3).to_dict()).result(30))
+        messages = [create_command(value).to_dict() for value in range(4)]
+        self.assertEqual(6, self.pool.submit(procexec.execute_batch, class_name, "total", MODE_COMMAND,
+                                             messages).result(30))
+
+
+if __name__ == '__main__':
+    unittest.main()
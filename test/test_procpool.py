@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from unittest import mock
+from core.procpool import ProcessorPool
+
+
+class Processor(object):
+    pass
+
+
+class ProcessorPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = ProcessorPool(Processor, lambda klass: klass(), max_size=2, idle_timeout=60)
+
+    def test_released_instance_is_reused(self):
+        instance = self.pool.borrow()
+        self.pool.release(instance)
+        self.assertIs(instance, self.pool.borrow())
+        self.assertEqual({"created": 1, "reused": 1, "evicted": 0, "idle": 0}, self.pool.get_statistics())
+
+    def test_borrowed_instances_are_not_shared(self):
+        first, second = self.pool.borrow(), self.pool.borrow()
+        self.assertIsNot(first, second)
+        self.assertEqual(2, self.pool.get_statistics()["created"])
+
+    def test_idle_instances_above_max_size_are_evicted(self):
+        instances = [self.pool.borrow() for __ in range(3)]
+        for instance in instances:
+            self.pool.release(instance)
+        self.assertEqual(2, self.pool.get_idle_count())
+        self.assertEqual(1, self.pool.get_statistics()["evicted"])
+
+    def test_discarded_instance_is_not_reused(self):
+        instance = self.pool.borrow()
+        self.pool.discard(instance)
+        self.assertIsNot(instance, self.pool.borrow())
+        self.assertEqual(0, self.pool.get_statistics()["reused"])
+
+    def test_idle_timeout(self):
+        with mock.patch("core.procpool.time.monotonic", return_value=100.0):
+            instance = self.pool.borrow()
+            self.pool.release(instance)
+        with mock.patch("core.procpool.time.monotonic", return_value=161.0):
+            self.assertIsNot(instance, self.pool.borrow())
+        self.assertEqual(1, self.pool.get_statistics()["evicted"])
+
+
+if __name__ == '__main__':
+    unittest.main()
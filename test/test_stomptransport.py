@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from core.transport.stomptransport import StompAckTracker
+
+
+class StompAckTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.acked = list()
+
+    def create_tracker(self, cumulative):
+        tracker = StompAckTracker(self.acked.append, cumulative)
+        return tracker, [tracker.add(frame) for frame in ["frame-1", "frame-2", "frame-3", "frame-4"]]
+
+    def test_cumulative_waits_for_earlier_frames(self):
+        tracker, sequences = self.create_tracker(True)
+        tracker.complete(sequences[1])
+        tracker.complete(sequences[2])
+        self.assertEqual([], self.acked)
+        # the oldest frame completing acknowledges every completed frame received after it at once
+        tracker.complete(sequences[0])
+        self.assertEqual(["frame-3"], self.acked)
+        self.assertEqual(1, tracker.get_pending_count())
+        tracker.complete(sequences[3])
+        self.assertEqual(["frame-3", "frame-4"], self.acked)
+        self.assertEqual(2, tracker.get_ack_count())
+        self.assertEqual(0, tracker.get_pending_count())
+
+    def test_individual_acknowledges_in_completion_order(self):
+        tracker, sequences = self.create_tracker(False)
+        tracker.complete(sequences[2])
+        tracker.complete(sequences[0])
+        self.assertEqual(["frame-3", "frame-1"], self.acked)
+        self.assertEqual(2, tracker.get_pending_count())
+
+    def test_complete_twice(self):
+        tracker, sequences = self.create_tracker(False)
+        tracker.complete(sequences[0])
+        tracker.complete(sequences[0])
+        self.assertEqual(["frame-1"], self.acked)
+
+    def test_closed_tracker_does_not_acknowledge(self):
+        tracker, sequences = self.create_tracker(True)
+        tracker.close()
+        tracker.complete(sequences[0])
+        self.assertEqual([], self.acked)
+        self.assertEqual(0, tracker.get_pending_count())
+
+    def test_failed_acknowledgement(self):
+        tracker = StompAckTracker(self.fail_ack, True)
+        tracker.complete(tracker.add("frame-1"))
+        self.assertEqual(0, tracker.get_ack_count())
+        self.assertEqual(0, tracker.get_pending_count())
+
+    @staticmethod
+    def fail_ack(frame):
+        raise ConnectionError("Broker connection lost")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import threading
+import time
+import unittest
+from core.msgflow import FlowController
+from core.msgframe import FrameDecoder, encode_frame, FRAME_MAGIC, FLAG_ACK_REQUESTED
+from core.msghandler import MessageNotifier
+from core.transhandler import TransportHandler, IntakeStoppedError
+from core.transport.xsocktransport import UnixSocketTransport
+
+
+class IdleTransport(TransportHandler):
+    """Transport without a listening thread, messages are handed to handle_message by the test"""
+
+    def do_start(self):
+        pass
+
+
+class PausedIntakeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.received = list()
+        self.errors = list()
+        self.flow_controller = FlowController(name="test")
+        self.flow_controller.hold()
+        self.transport = IdleTransport(dict())
+        self.transport.set_flow_controller(self.flow_controller)
+        self.transport.add_listener(MessageNotifier(lambda obj, message: self.received.append(message)))
+        self.transport.start()
+        self.thread = threading.Thread(target=self.deliver, args=("message",), daemon=True)
+
+    def tearDown(self):
+        self.flow_controller.resume()
+        self.transport.stop()
+
+    def deliver(self, message):
+        try:
+            self.transport.handle_message(message)
+        except IntakeStoppedError as ex:
+            self.errors.append(ex)
+
+    def test_message_waits_until_resumed(self):
+        self.thread.start()
+        time.sleep(0.2)
+        self.assertEqual([], self.received)
+        self.flow_controller.resume()
+        self.thread.join(5)
+        self.assertEqual(["message"], self.received)
+        self.assertEqual([], self.errors)
+
+    def test_stopped_while_paused_is_not_queued(self):
+        self.thread.start()
+        time.sleep(0.2)
+        self.transport.stop()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual([], self.received)
+        self.assertEqual(1, len(self.errors))
+
+    def test_local_frames_refused_once_stopped(self):
+        transport = UnixSocketTransport(dict())
+        transport.set_flow_controller(self.flow_controller)
+        transport.add_listener(MessageNotifier(lambda obj, message: self.received.append(message)))
+        frames = FrameDecoder().feed(FRAME_MAGIC + b"".join([encode_frame(FLAG_ACK_REQUESTED, frame_id, b"message")
+                                                             for frame_id in range(1, 4)]))
+        start_time = time.monotonic()
+        acks = FrameDecoder().feed(FRAME_MAGIC + transport._handle_items(frames))
+        # only the first frame waited for the paused intake
+        self.assertLess(time.monotonic() - start_time, 2.5)
+        self.assertEqual([1, 2, 3], [ack.frame_id for ack in acks])
+        self.assertTrue(all([ack.is_error() for ack in acks]))
+        self.assertEqual([], self.received)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+from core.msgframe import FrameDecoder, encode_frame, FRAME_MAGIC, FLAG_ACK_REQUESTED, FLAG_CONTROL
+from core.transport.xsocktransport import UnixSocketTransport
+
+
+def control_frames(command, flags):
+    return FrameDecoder().feed(FRAME_MAGIC + encode_frame(flags | FLAG_CONTROL, 1, command.encode("utf-8")))
+
+
+class ControlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.outcome = True
+        self.calls = list()
+        self.transport = UnixSocketTransport(dict())
+        self.transport.register_control("reload", self.reload)
+
+    def reload(self):
+        self.calls.append("reload")
+        return self.outcome
+
+    def handle(self, frames):
+        return FrameDecoder().feed(FRAME_MAGIC + self.transport._handle_items(frames))
+
+    def test_acknowledged_after_handler_ran(self):
+        acks = self.handle(control_frames("reload", FLAG_ACK_REQUESTED))
+        self.assertEqual(["reload"], self.calls)
+        self.assertEqual([1], [ack.frame_id for ack in acks])
+        self.assertFalse(acks[0].is_error())
+
+    def test_failed_handler_acknowledged_with_error(self):
+        self.outcome = False
+        acks = self.handle(control_frames("reload", FLAG_ACK_REQUESTED))
+        self.assertEqual(["reload"], self.calls)
+        self.assertTrue(acks[0].is_error())
+        self.assertIn("reload", acks[0].payload.decode("utf-8"))
+
+    def test_unacknowledged_control_is_not_awaited(self):
+        self.outcome = False
+        self.assertEqual([], self.handle(control_frames("reload", 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2022 Busana Apparel Group. All rights reserved.
+#
+# This product and it's source code is protected by patents, copyright laws and
+# international copyright treaties, as well as other intellectual property
+# laws and treaties. The product is licensed, not sold.
+#
+# The source code and sample programs in this package or parts hereof
+# as well as the documentation shall not be copied, modified or redistributed
+# without permission, explicit or implied, of the author.
+#
+# This module is part of Centric PLM Integration Bridge and is released under
+# the Apache-2.0 License: https://www.apache.org/licenses/LICENSE-2.0
+
+import threading
+import time
+import unittest
+from common import consts
+from core.workpool import WorkerPool, PartitionedLanes
+
+
+class QuotaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.entered = threading.Semaphore(0)
+        self.order = list()
+        self.pools = list()
+
+    def tearDown(self):
+        self.release.set()
+        for pool in self.pools:
+            pool.stop()
+
+    def create_pool(self, workers):
+        pool = WorkerPool({consts.EXECUTOR_WORKERS: str(workers)})
+        pool.start()
+        self.pools.append(pool)
+        return pool
+
+    def hold(self, name):
+        self.entered.release()
+        self.release.wait(10)
+        self.order.append(name)
+
+    def test_module_never_exceeds_max_workers(self):
+        pool = self.create_pool(2)
+        pool.set_module_quota("LIMITED", 0, 1)
+        futures = [pool.submit("LIMITED", self.hold, "LIMITED") for __ in range(2)]
+        self.assertTrue(self.entered.acquire(timeout=2))
+        # the worker left over serves another module instead of the second LIMITED item
+        self.assertEqual("other", pool.submit("OTHER", lambda: "other").result(2))
+        self.assertFalse(self.entered.acquire(timeout=0.2))
+        self.assertEqual(1, pool.get_pending_count())
+        self.release.set()
+        for future in futures:
+            future.result(2)
+        self.assertEqual(["LIMITED", "LIMITED"], self.order)
+
+    def test_module_below_min_workers_is_served_first(self):
+        pool = self.create_pool(1)
+        pool.set_module_quota("RESERVED", 1, 0)
+        gate = pool.submit("GATE", self.hold, "GATE")
+        self.assertTrue(self.entered.acquire(timeout=2))
+        futures = [pool.submit("SHARED", self.order.append, "SHARED"),
+                   pool.submit("RESERVED", self.order.append, "RESERVED")]
+        self.release.set()
+        gate.result(2)
+        for future in futures:
+            future.result(2)
+        self.assertEqual(["GATE", "RESERVED", "SHARED"], self.order)
+
+
+class AutoscaleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        # the watchdog stays out of the way, the tests run autoscale themselves
+        self.pool = WorkerPool({consts.EXECUTOR_WORKERS_MIN: "1", consts.EXECUTOR_WORKERS_MAX: "4",
+                                consts.EXECUTOR_SCALE_WAIT: "0.05", consts.EXECUTOR_SCALE_IDLE: "0.05",
+                                consts.EXECUTOR_WATCHDOG_INTERVAL: "60"})
+        self.pool.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.stop()
+
+    def test_grows_while_work_waits_and_shrinks_once_idle(self):
+        futures = [self.pool.submit("MODULE", self.release.wait, 10) for __ in range(4)]
+        for expected in [2, 3, 4, 4]:
+            time.sleep(0.1)
+            self.pool.autoscale()
+            self.assertEqual(expected, self.pool.get_worker_count())
+        self.release.set()
+        for future in futures:
+            future.result(2)
+        time.sleep(0.1)
+        self.pool.autoscale()
+        self.assertEqual(1, self.pool.get_worker_count())
+        self.assertEqual(3, self.pool.get_statistics().get_counter("scale_ups"))
+        self.assertEqual(1, self.pool.get_statistics().get_counter("scale_downs"))
+        # the workers left serve new work
+        self.assertEqual("done", self.pool.submit("MODULE", lambda: "done").result(2))
+
+    def test_work_held_by_a_quota_does_not_grow_the_pool(self):
+        self.pool.set_module_quota("MODULE", 0, 1)
+        futures = [self.pool.submit("MODULE", self.release.wait, 10) for __ in range(3)]
+        time.sleep(0.1)
+        self.pool.autoscale()
+        self.assertEqual(1, self.pool.get_worker_count())
+        self.release.set()
+        for future in futures:
+            future.result(2)
+
+
+class WatchdogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.pool = WorkerPool({consts.EXECUTOR_WORKERS: "2", consts.EXECUTOR_WATCHDOG_INTERVAL: "0.1"})
+        self.pool.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.stop()
+
+    def hang(self):
+        self.release.wait(10)
+        return "late"
+
+    def test_expired_work_fails_and_worker_is_replaced(self):
+        future = self.pool.submit_timed("MODULE", 0.3, self.hang)
+        self.assertRaises(TimeoutError, future.result, 2)
+        self.assertEqual(1, self.pool.get_abandoned_count())
+        self.assertEqual(1, self.pool.get_statistics().get_counter("stuck_workers"))
+        # the pool keeps its capacity while the stuck thread hangs
+        self.assertEqual("done", self.pool.submit("MODULE", lambda: "done").result(2))
+        self.release.set()
+        self.assertRaises(TimeoutError, future.result, 0)
+
+    def test_work_within_timeout(self):
+        self.assertEqual("done", self.pool.submit_timed("MODULE", 5, lambda: "done").result(2))
+        self.assertEqual(0, self.pool.get_abandoned_count())
+
+    def test_expired_work_releases_its_lane(self):
+        lanes = PartitionedLanes(self.pool, "MODULE", ["key"], 1)
+        params = [[], {"key": 1}]
+        hung = lanes.submit_timed(params, 0.3, self.hang)
+        following = lanes.submit_timed(params, 0, lambda: "next")
+        self.assertRaises(TimeoutError, hung.result, 2)
+        # the work queued behind the hung handler runs without waiting for it to return
+        self.assertEqual("next", following.result(2))
+
+
+if __name__ == '__main__':
+    unittest.main()